@@ -1,40 +1,589 @@
 # ./index_project.py
+#
+# Usage:
+#   python index_project.py                      # build ./storage once, load it afterwards
+#   python index_project.py --refresh            # re-embed only new/changed files, drop removed ones
+#   python index_project.py --refresh --data-dir content
+#   python index_project.py --embed-batch-size 64 --embed-concurrency 8 --embed-url http://127.0.0.1:11435
+#   python index_project.py --serve              # warm HTTP query server on 127.0.0.1:8765
+#   python index_project.py --repl               # same engine, questions on stdin
 
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext, load_index_from_storage
+from urllib.parse import parse_qs, urlparse
+from llama_index.core import (
+    Document, VectorStoreIndex, SimpleDirectoryReader, StorageContext, get_response_synthesizer,
+    load_index_from_storage,
+)
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.node_parser import SentenceSplitter
 from llama_index.embeddings.ollama import OllamaEmbedding
 from llama_index.llms.ollama import Ollama
 
-# Setup Ollama LLM and Embedding
-llm = Ollama(model="mistral")
-embed_model = OllamaEmbedding(model_name="nomic-embed-text")  # optionally: "all-minilm"
-
 # Path setup
 DATA_DIR = Path("./docs")
 INDEX_DIR = Path("./storage")
 INDEX_DIR.mkdir(exist_ok=True)
+MANIFEST_PATH = INDEX_DIR / "manifest.json"
+# Kept outside ./storage: create_or_load_index treats any file there as an existing index.
+EMBED_CACHE_PATH = Path("./.cache/embeddings.sqlite")
 
-def load_docs(limit=None):
-    docs = SimpleDirectoryReader(str(DATA_DIR)).load_data()
-    if limit:
-        docs = docs[:limit]
-    print(f"📄 Loaded {len(docs)} documents.")
-    return docs
+EMBED_MODEL_NAME = "nomic-embed-text"  # optionally: "all-minilm"
+EMBED_BATCH_SIZE = 32
+EMBED_CONCURRENCY = 4
 
-def create_or_load_index(documents):
-    if INDEX_DIR.exists() and any(INDEX_DIR.iterdir()):
-        print("✅ Loading existing index...")
-        return load_index_from_storage(StorageContext.from_defaults(persist_dir=str(INDEX_DIR)))
+class EmbeddingCache:
+    """SQLite store of float32 vectors keyed by (model name, sha256 of chunk text)."""
+
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, vec BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash))"
+        )
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model, keys):
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vec FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model, items):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vec) VALUES (?, ?, ?)",
+                [(model, key, array("f", vec).tobytes()) for key, vec in items],
+            )
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Wraps another embed model: serves repeated chunks from EmbeddingCache and
+    sends only the misses, de-duplicated, to the inner model. Async batches
+    run at most `concurrency` inner requests at a time.
+    """
+
+    concurrency: int = EMBED_CONCURRENCY
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _semaphore: object = PrivateAttr(default=None)
+    _semaphore_loop: object = PrivateAttr(default=None)
+    _stats: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, inner, cache_path=EMBED_CACHE_PATH, embed_batch_size=EMBED_BATCH_SIZE,
+                 concurrency=EMBED_CONCURRENCY, **kwargs):
+        super().__init__(model_name=inner.model_name, embed_batch_size=embed_batch_size,
+                         concurrency=concurrency, **kwargs)
+        inner.embed_batch_size = embed_batch_size
+        self._inner = inner
+        self._cache = EmbeddingCache(cache_path)
+        self._stats = {"hits": 0, "misses": 0, "requests": 0, "seconds": 0.0}
+
+    @classmethod
+    def class_name(cls):
+        return "CachedEmbedding"
+
+    def stats(self):
+        return dict(self._stats)
+
+    def _loop_semaphore(self):
+        # asyncio.Semaphore belongs to one loop; keep only the current loop's.
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore, self._semaphore_loop = asyncio.Semaphore(self.concurrency), loop
+        return self._semaphore
+
+    def _split(self, texts):
+        keys = [EmbeddingCache.key(t) for t in texts]
+        found = self._cache.get_many(self.model_name, sorted(set(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        self._stats["hits"] += sum(1 for k in keys if k in found)
+        self._stats["misses"] += len(missing)
+        return keys, found, missing
+
+    def _finish(self, keys, found, missing, vectors):
+        fresh = list(zip(missing.keys(), vectors))
+        if fresh:
+            self._cache.put_many(self.model_name, fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    def _get_text_embeddings(self, texts):
+        keys, found, missing = self._split(texts)
+        vectors = []
+        if missing:
+            started = time.perf_counter()
+            vectors = self._inner.get_text_embedding_batch(list(missing.values()))
+            self._stats["requests"] += 1
+            self._stats["seconds"] += time.perf_counter() - started
+        return self._finish(keys, found, missing, vectors)
+
+    async def _aget_text_embeddings(self, texts):
+        keys, found, missing = self._split(texts)
+        vectors = []
+        if missing:
+            # BaseEmbedding gathers every batch at once; bound the inner calls here.
+            async with self._loop_semaphore():
+                started = time.perf_counter()
+                vectors = await self._inner.aget_text_embedding_batch(list(missing.values()))
+                self._stats["requests"] += 1
+                self._stats["seconds"] += time.perf_counter() - started
+        return self._finish(keys, found, missing, vectors)
+
+    def _get_text_embedding(self, text):
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text):
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_query_embedding(self, query):
+        return self._inner.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query):
+        return await self._inner.aget_query_embedding(query)
+
+def build_embed_model(batch_size=EMBED_BATCH_SIZE, concurrency=EMBED_CONCURRENCY, base_url=None, cache=True):
+    kwargs = {"base_url": base_url} if base_url else {}
+    inner = OllamaEmbedding(model_name=EMBED_MODEL_NAME, embed_batch_size=batch_size, **kwargs)
+    if not cache:
+        return inner
+    return CachedEmbedding(inner, EMBED_CACHE_PATH, embed_batch_size=batch_size, concurrency=concurrency)
+
+def report_embed_stats(started):
+    elapsed = time.perf_counter() - started
+    if not isinstance(embed_model, CachedEmbedding):
+        print(f"⏱️ Indexing took {elapsed:.1f}s.")
+        return
+    s = embed_model.stats()
+    total = s["hits"] + s["misses"]
+    # Requests overlap when async, so throughput is measured on wall-clock time.
+    rate = s["misses"] / elapsed if elapsed else 0.0
+    print(f"⚡ {total} chunks: {s['hits']} from cache, {s['misses']} embedded in {s['requests']} request(s) "
+          f"({s['seconds']:.1f}s in the model); {rate:.1f} embedded chunks/s, {elapsed:.1f}s total.")
+
+# Setup Ollama LLM and Embedding
+llm = Ollama(model="mistral")
+# Built on first use (or by __main__ with the CLI options), so importing this
+# module does not open the embedding cache.
+embed_model = None
+
+def get_embed_model():
+    global embed_model
+    if embed_model is None:
+        embed_model = build_embed_model()
+    return embed_model
+
+# Persist the store + manifest after this many re-embedded files, so an
+# interrupted refresh keeps the work it already paid for.
+PERSIST_EVERY = 20
+
+# Streaming ingestion: documents are split and embedded WINDOW_DOCS at a time,
+# and plain-text files over LARGE_FILE_BYTES (SQL dumps, transcripts, bill
+# text) are read TEXT_WINDOW_BYTES at a time instead of in one piece.
+WINDOW_DOCS = 32
+LARGE_FILE_BYTES = 4 * 1024 * 1024
+TEXT_WINDOW_BYTES = 1024 * 1024
+TEXT_EXTS = {".txt", ".md", ".sql", ".csv", ".json", ".vtt", ".html", ".toml", ".js", ".mjs", ".py"}
+
+splitter = SentenceSplitter()
+
+def iter_source_paths(data_dir=DATA_DIR, limit=None):
+    """Lazily walk data_dir in a stable order, stopping after `limit` files (before reading any)."""
+    count = 0
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            if limit and count >= limit:
+                return
+            count += 1
+            yield Path(root, name)
+
+def iter_file_docs(path):
+    """Yield the Documents of one file; large text files come out as fixed-size windows."""
+    path = Path(path)
+    if path.suffix.lower() not in TEXT_EXTS or path.stat().st_size <= LARGE_FILE_BYTES:
+        yield from SimpleDirectoryReader(input_files=[str(path)]).load_data()
+        return
+    metadata = {"file_path": str(path.resolve()), "file_name": path.name}
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        window, size, part = [], 0, 0
+        for line in f:
+            window.append(line)
+            size += len(line)
+            if size >= TEXT_WINDOW_BYTES:
+                yield Document(text="".join(window), metadata={**metadata, "window": part})
+                window, size, part = [], 0, part + 1
+        if window:
+            yield Document(text="".join(window), metadata={**metadata, "window": part})
+
+def ingest_files(index, paths, manifest, hashes=None):
+    """
+    Stream `paths` into `index`: split and embed WINDOW_DOCS documents at a
+    time, recording path → {hash, doc_ids, node_ids} in the manifest and
+    persisting every PERSIST_EVERY files. Returns the number of nodes added.
+
+    All windows are awaited on one event loop, because the async Ollama
+    client stays bound to the loop it first ran on.
+    """
+    return asyncio.run(_ingest_files(index, paths, manifest, hashes))
+
+async def _ingest_files(index, paths, manifest, hashes=None):
+    window, added = [], 0
+
+    async def flush():
+        nonlocal added
+        if not window:
+            return
+        nodes = splitter.get_nodes_from_documents(window)
+        await index.ainsert_nodes(nodes)
+        by_doc = {}
+        for node in nodes:
+            by_doc.setdefault(node.ref_doc_id, []).append(node.node_id)
+        for doc in window:
+            entry = manifest[doc.metadata["file_path"]]
+            entry["doc_ids"].append(doc.doc_id)
+            entry["node_ids"].extend(by_doc.get(doc.doc_id, []))
+        added += len(nodes)
+        window.clear()
+
+    for i, path in enumerate(paths, 1):
+        key = str(Path(path).resolve())
+        print(f"🔍 Embedding: {key}")
+        manifest[key] = {"hash": (hashes or {}).get(key) or file_hash(key), "doc_ids": [], "node_ids": []}
+        for doc in iter_file_docs(key):
+            doc.metadata["file_path"] = key
+            window.append(doc)
+            if len(window) >= WINDOW_DOCS:
+                await flush()
+        if i % PERSIST_EVERY == 0:
+            await flush()
+            index.storage_context.persist(persist_dir=str(INDEX_DIR))
+            save_manifest(manifest)
+    await flush()
+    return added
 
-    print("⚙️ Creating new index...")
-    for doc in documents:
-        print(f"🔍 Embedding: {doc.metadata.get('file_path', 'unknown')}")
-    index = VectorStoreIndex.from_documents(documents, embed_model=embed_model)
+def build_index_streaming(data_dir=DATA_DIR, limit=None):
+    print("⚙️ Creating new index (streaming)...")
+    index = VectorStoreIndex([], embed_model=get_embed_model())
+    manifest = {}
+    added = ingest_files(index, iter_source_paths(data_dir, limit), manifest)
     index.storage_context.persist(persist_dir=str(INDEX_DIR))
-    print("✅ Indexing complete.")
+    save_manifest(manifest)
+    print(f"✅ Indexing complete ({len(manifest)} files, {added} nodes).")
     return index
 
+def load_index():
+    return load_index_from_storage(StorageContext.from_defaults(persist_dir=str(INDEX_DIR)), embed_model=get_embed_model())
+
+def create_or_load_index(limit=None):
+    if INDEX_DIR.exists() and (INDEX_DIR / "docstore.json").exists():
+        print("✅ Loading existing index...")
+        return load_index()
+    return build_index_streaming(DATA_DIR, limit)
+
+# --- Incremental refresh ---------------------------------------------------
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def list_source_files(data_dir=DATA_DIR):
+    """Every non-hidden file under data_dir, keyed the way the manifest stores them."""
+    return sorted(str(p.resolve()) for p in iter_source_paths(data_dir))
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+def save_manifest(manifest):
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+
+def manifest_from_index(index):
+    """
+    Rebuild path → {hash, doc_ids, node_ids} from the docstore's ref-doc info.
+    The hashes are left empty, so the next refresh re-embeds those files once
+    and records real hashes.
+    """
+    manifest = {}
+    for doc_id, info in index.ref_doc_info.items():
+        file_path = (info.metadata or {}).get("file_path")
+        if not file_path:
+            continue
+        key = str(Path(file_path).resolve())
+        entry = manifest.setdefault(key, {"hash": None, "doc_ids": [], "node_ids": []})
+        entry["doc_ids"].append(doc_id)
+        entry["node_ids"].extend(info.node_ids)
+    return manifest
+
+def refresh_index(data_dir=DATA_DIR):
+    """Embed only new or changed files, delete nodes of removed ones, persist as we go."""
+    has_store = INDEX_DIR.exists() and (INDEX_DIR / "docstore.json").exists()
+    if has_store:
+        index = load_index()
+    else:
+        index = VectorStoreIndex([], embed_model=get_embed_model())
+
+    manifest = load_manifest()
+    if has_store and not manifest:
+        print("ℹ️ No manifest yet; rebuilding it from the existing docstore.")
+        manifest = manifest_from_index(index)
+
+    current = {path: file_hash(path) for path in list_source_files(data_dir)}
+    changed = [p for p, h in current.items() if manifest.get(p, {}).get("hash") != h]
+    removed = [p for p in manifest if p not in current]
+    print(f"📄 {len(current)} files: {len(changed)} new/changed, {len(removed)} removed, "
+          f"{len(current) - len(changed)} unchanged.")
+
+    for path in removed + [p for p in changed if p in manifest]:
+        for doc_id in manifest[path]["doc_ids"]:
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        if path in removed:
+            print(f"🗑️ Removed: {path}")
+            del manifest[path]
+
+    ingest_files(index, changed, manifest, hashes=current)
+
+    if changed or removed or not MANIFEST_PATH.exists():
+        index.storage_context.persist(persist_dir=str(INDEX_DIR))
+        save_manifest(manifest)
+    print("✅ Refresh complete.")
+    return index
+
+# --- Query server ----------------------------------------------------------
+
+QUERY_TOP_K = 4
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL = 15 * 60  # seconds; a --refresh run is the usual reason answers change
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire ttl seconds after insertion."""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+class DocsAssistant:
+    """Holds one loaded index, a warm retriever and a retrieval cache for repeated questions."""
+
+    def __init__(self, index, top_k=QUERY_TOP_K, cache_size=QUERY_CACHE_SIZE, cache_ttl=QUERY_CACHE_TTL):
+        self.retriever = index.as_retriever(similarity_top_k=top_k)
+        self.synthesizer = get_response_synthesizer(llm=llm)
+        self.cache = TTLCache(cache_size, cache_ttl)
+
+    @staticmethod
+    def cache_key(question):
+        return " ".join(question.lower().split())
+
+    def ask(self, question, synthesize=True):
+        t0 = time.perf_counter()
+        key = self.cache_key(question)
+        nodes = self.cache.get(key)
+        cached = nodes is not None
+        if not cached:
+            nodes = self.retriever.retrieve(question)
+            self.cache.put(key, nodes)
+        t1 = time.perf_counter()
+        answer = str(self.synthesizer.synthesize(question, nodes=nodes)) if synthesize else None
+        t2 = time.perf_counter()
+        return {
+            "question": question,
+            "answer": answer,
+            "sources": [
+                {"file_path": n.node.metadata.get("file_path"), "score": n.score} for n in nodes
+            ],
+            "retrieval_cached": cached,
+            "timings_ms": {
+                "retrieve": round((t1 - t0) * 1000, 1),
+                "synthesize": round((t2 - t1) * 1000, 1),
+                "total": round((t2 - t0) * 1000, 1),
+            },
+        }
+
+def start_assistant(top_k=QUERY_TOP_K, cache_size=QUERY_CACHE_SIZE, cache_ttl=QUERY_CACHE_TTL):
+    started = time.perf_counter()
+    assistant = DocsAssistant(load_index(), top_k, cache_size, cache_ttl)
+    loaded = time.perf_counter()
+    # First query pays for loading the embed model in Ollama; do it before serving.
+    assistant.retriever.retrieve("warm up")
+    print(f"✅ Index loaded in {(loaded - started) * 1000:.0f} ms, retriever warmed in "
+          f"{(time.perf_counter() - loaded) * 1000:.0f} ms.")
+    return assistant
+
+def parse_flag(value, default=True):
+    """Boolean from a query-string or JSON value: "0", "false", "no", "off" and "" are false."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() not in ("0", "false", "no", "off", "")
+    return bool(value)
+
+def make_handler(assistant):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _answer(self, question, synthesize):
+            if not question:
+                return self._send(400, {"error": "missing question"})
+            try:
+                result = assistant.ask(question, synthesize=synthesize)
+            except Exception as e:
+                return self._send(500, {"error": str(e)})
+            t = result["timings_ms"]
+            print(f"❓ {question[:60]!r}: retrieve {t['retrieve']} ms"
+                  f"{' (cached)' if result['retrieval_cached'] else ''}, synthesize {t['synthesize']} ms")
+            self._send(200, result)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self._send(200, {"ok": True})
+            if url.path != "/query":
+                return self._send(404, {"error": "not found"})
+            params = parse_qs(url.query)
+            self._answer(params.get("q", [""])[0], parse_flag(params.get("synthesize", [None])[0]))
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/query":
+                return self._send(404, {"error": "not found"})
+            try:
+                data = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            except json.JSONDecodeError:
+                return self._send(400, {"error": "invalid JSON"})
+            self._answer(data.get("question", ""), parse_flag(data.get("synthesize")))
+
+        def log_message(self, fmt, *args):
+            pass  # the per-query timing line below is the useful log
+
+    return QueryHandler
+
+def serve(assistant, host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(assistant))
+    print(f"🚀 Docs assistant on http://{host}:{port}/query?q=... (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def repl(assistant, synthesize=True):
+    print("💬 Ask a question (empty line or Ctrl+D to quit).")
+    while True:
+        try:
+            question = input("? ").strip()
+        except EOFError:
+            break
+        if not question:
+            break
+        result = assistant.ask(question, synthesize=synthesize)
+        if result["answer"]:
+            print(result["answer"])
+        for src in result["sources"]:
+            print(f"  📄 {src['file_path']} ({src['score']:.3f})" if src["score"] is not None else f"  📄 {src['file_path']}")
+        t = result["timings_ms"]
+        print(f"  ⏱️ retrieve {t['retrieve']} ms{' (cached)' if result['retrieval_cached'] else ''}, "
+              f"synthesize {t['synthesize']} ms")
+
 if __name__ == "__main__":
-    docs = load_docs(limit=None)  # or limit=2 for testing
-    index = create_or_load_index(docs)
+    parser = argparse.ArgumentParser(description="Build, load or incrementally refresh the docs vector index.")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory of documents to index (default: ./docs)")
+    parser.add_argument("--limit", type=int, help="Only read the first N files (initial build only)")
+    parser.add_argument("--refresh", action="store_true", help="Re-embed only new or changed files")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks per embedding request")
+    parser.add_argument("--embed-concurrency", type=int, default=EMBED_CONCURRENCY, help="Embedding requests in flight at once")
+    parser.add_argument("--embed-url", help="Ollama base URL (e.g. a local stand-in for benchmarking)")
+    parser.add_argument("--no-embed-cache", action="store_true", help="Always call the embed model")
+    parser.add_argument("--serve", action="store_true", help="Load the index once and answer queries over HTTP")
+    parser.add_argument("--repl", action="store_true", help="Load the index once and answer questions from stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--top-k", type=int, default=QUERY_TOP_K, help="Chunks retrieved per question")
+    parser.add_argument("--cache-size", type=int, default=QUERY_CACHE_SIZE, help="Cached questions kept (LRU)")
+    parser.add_argument("--cache-ttl", type=float, default=QUERY_CACHE_TTL, help="Seconds a cached retrieval stays valid")
+    parser.add_argument("--retrieve-only", action="store_true", help="REPL: skip LLM synthesis")
+    args = parser.parse_args()
+    DATA_DIR = Path(args.data_dir)
+    embed_model = build_embed_model(args.embed_batch_size, args.embed_concurrency, args.embed_url,
+                                    cache=not args.no_embed_cache)
+
+    if args.serve or args.repl:
+        if not (INDEX_DIR / "docstore.json").exists():
+            print(f"❌ No index in {INDEX_DIR}/ yet; build it first with `python index_project.py`.")
+            raise SystemExit(1)
+        assistant = start_assistant(args.top_k, args.cache_size, args.cache_ttl)
+        if args.serve:
+            serve(assistant, args.host, args.port)
+        else:
+            repl(assistant, synthesize=not args.retrieve_only)
+        raise SystemExit(0)
+
+    started = time.perf_counter()
+    if args.refresh:
+        index = refresh_index(DATA_DIR)
+    else:
+        index = create_or_load_index(limit=args.limit)  # or --limit 2 for testing
+    report_embed_stats(started)
@@ -0,0 +1,109 @@
+# scripts/bench-analyze-file-code.py
+"""
+Benchmark summarizev7's analyzers on this repo: the combined single-pass
+scanner (`analyze_file_code`) against the previous one-regex-per-category
+analyzer (`analyze_file_code_multipass`).
+
+Sources are read once up front so only analysis is timed. Each engine runs
+--rounds times over the same files; the best round is reported, per file
+type and overall, followed by how often the two engines agree. The combined
+engine parses .py files with `ast`, so they are left out of the comparison
+(the AST sees real definitions and imports only); --python-regex times and
+compares them on the regex fallback instead.
+
+Usage:
+    python scripts/bench-analyze-file-code.py [--rounds 5] [--python-regex]
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import sys
+import time
+from collections import defaultdict
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+summarizer = SourceFileLoader("summarizev7", str(SCRIPTS_DIR / "summarizev7")).load_module()
+
+GREEN, YELLOW, CYAN, RESET = '\u001b[32m', '\u001b[33m', '\u001b[36m', '\u001b[0m'
+
+def colour(text: str, col: str) -> str:
+    return f"{col}{text}{RESET}"
+
+def collect_sources(base: Path) -> list[tuple[Path, str]]:
+    """Every file summarizev7 would index, with its (windowed) text."""
+    sources = []
+    for root, dirs, files in os.walk(base):
+        dirs[:] = sorted(d for d in dirs if d not in summarizer.IGNORED_DIRS)
+        for fname in sorted(files):
+            fpath = Path(root) / fname
+            if summarizer.should_skip(fpath) or fpath.suffix.lower() not in summarizer.TARGET_EXTENSIONS:
+                continue
+            _, code, _ = summarizer.read_source(fpath)
+            if code is not None:
+                sources.append((fpath.relative_to(base), code))
+    return sources
+
+def time_engine(engine, sources, rounds: int) -> tuple[float, dict[str, float], list]:
+    """Best-of-*rounds* wall time, per-suffix time for that round, and its outputs."""
+    best = None
+    for _ in range(rounds):
+        per_type: dict[str, float] = defaultdict(float)
+        outputs = []
+        started = time.perf_counter()
+        for path, code in sources:
+            t0 = time.perf_counter()
+            outputs.append(engine(path, code))
+            per_type[path.suffix] += time.perf_counter() - t0
+        total = time.perf_counter() - started
+        if best is None or total < best[0]:
+            best = (total, dict(per_type), outputs)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summarizev7 analyzers (combined scanner vs multi-pass).")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per engine (best is reported)")
+    parser.add_argument("--root", default=".", help="Repository root to index (default: current directory)")
+    parser.add_argument("--python-regex", action="store_true", help="Time the combined engine with regexes for .py files")
+    args = parser.parse_args()
+    python_ast = not args.python_regex
+
+    sources = collect_sources(Path(args.root))
+    total_bytes = sum(len(code.encode('utf-8')) for _, code in sources)
+    counts: dict[str, int] = defaultdict(int)
+    for path, _ in sources:
+        counts[path.suffix] += 1
+    print(colour(f"📊 {len(sources)} files, {total_bytes / 1e6:.1f} MB of source, best of {args.rounds} round(s)", CYAN))
+
+    old_total, old_types, old_out = time_engine(summarizer.analyze_file_code_multipass, sources, args.rounds)
+    new_total, new_types, new_out = time_engine(
+        functools.partial(summarizer.analyze_file_code, python_ast=python_ast), sources, args.rounds)
+
+    print(f"\n{'type':<8} {'files':>6} {'multi-pass':>12} {'combined':>12} {'speed-up':>9}")
+    for suffix in sorted(counts):
+        old_t, new_t = old_types.get(suffix, 0.0), new_types.get(suffix, 0.0)
+        ratio = old_t / new_t if new_t else float('inf')
+        print(f"{suffix:<8} {counts[suffix]:>6} {old_t * 1000:>10.1f}ms {new_t * 1000:>10.1f}ms {ratio:>8.2f}x")
+    print(f"{'total':<8} {len(sources):>6} {old_total * 1000:>10.1f}ms {new_total * 1000:>10.1f}ms "
+          f"{old_total / new_total if new_total else float('inf'):>8.2f}x")
+    for label, total in (("multi-pass", old_total), ("combined", new_total)):
+        print(f"  {label:<11} {len(sources) / total:>8.0f} files/s  {total_bytes / 1e6 / total:>6.1f} MB/s")
+
+    compared = mismatched = 0
+    for (path, _), old, new in zip(sources, old_out, new_out):
+        if path.suffix == '.py' and python_ast:
+            continue
+        compared += 1
+        if dict(old) != dict(new):
+            mismatched += 1
+            print(colour(f"  ≠ {path}", YELLOW))
+    status = GREEN if not mismatched else YELLOW
+    scope = "non-Python files" if python_ast else "files"
+    print(colour(f"\n✅ Outputs agree on {compared - mismatched}/{compared} {scope}", status))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+# scripts/bench-events-create.py
+"""
+Load test for POST /api/events/create: N concurrent multipart uploads
+against the local wrangler dev worker (or a built-in stand-in), checking the
+201/409 duplicate-PDF semantics from tests/test_events_api.py under
+contention.
+
+The request mix is planned up front and seeded. It contains unique PDFs
+(worker/dummy.pdf stamped with a per-run nonce and padded to each --sizes
+entry) plus --duplicate-ratio re-uploads of those same bytes. The order is
+shuffled so copies of one PDF are in flight at the same time. Uploads run on
+--concurrency asyncio workers, each holding one keep-alive connection (raw
+HTTP/1.1 over asyncio streams, so the client adds no threads or
+dependencies).
+
+Reported: p50/p95/p99 latency (overall, per size, per status), requests/s,
+MB/s, and dedupe correctness per distinct PDF. The server should answer with
+exactly one 201; every other copy should be 409 {"duplicate": true}. More
+than one 201 is a double-create (a dedupe race); a 409 with no 201 is a
+false duplicate. Results are written to JSON, and --compare prints the
+deltas against an earlier run.
+
+--standin serves a local stand-in instead of the worker. In `atomic` mode it
+uses a UNIQUE(pdf_hash) insert; in `racy` mode it does check-then-insert with
+--standin-delay between the two steps. Running both shows what the harness
+catches.
+
+Usage:
+    python scripts/bench-events-create.py --requests 500 --concurrency 50
+    python scripts/bench-events-create.py --standin racy --standin-delay 5
+    python scripts/bench-events-create.py --compare .cache/bench-events-create/previous.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import sqlite3
+import ssl
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8787/api/events/create"
+DEFAULT_PDF = Path("worker/dummy.pdf")
+DEFAULT_OUTPUT_DIR = Path(".cache/bench-events-create")
+DEFAULT_SIZES = "dummy,64KB,1MB"
+SIZE_UNITS = {"KB": 1024, "MB": 1024 * 1024, "B": 1}
+
+# --- ANSI Colors ---
+GREEN = '\u001b[32m'
+RED = '\u001b[31m'
+YELLOW = '\u001b[33m'
+CYAN = '\u001b[36m'
+RESET = '\u001b[0m'
+
+def colour(text: str, col: str) -> str:
+    """Applies ANSI color codes to text."""
+    return f"{col}{text}{RESET}"
+
+# --- Request plan ---
+
+@dataclass
+class Upload:
+    index: int
+    size_label: str
+    sha256: str
+    body: bytes = field(repr=False)
+    duplicate: bool = False  # a re-upload of a PDF planned earlier in this run
+
+def parse_size(label: str, base: int) -> int:
+    if label == "dummy":
+        return base
+    for unit, factor in SIZE_UNITS.items():
+        if label.upper().endswith(unit):
+            return int(float(label[:-len(unit)]) * factor)
+    return int(label)
+
+def make_pdf(base: bytes, run_id: str, n: int, size: int) -> bytes:
+    """*base* stamped with a per-run nonce, padded with PDF comment lines to *size* bytes."""
+    pdf = base.rstrip(b"\n") + f"\n% loadtest {run_id} {n}\n".encode()
+    pad_line = b"%" + b"0" * 77 + b"\n"
+    if len(pdf) < size:
+        pdf += pad_line * ((size - len(pdf)) // len(pad_line))
+    return pdf
+
+def multipart(fields: dict[str, str], pdf: bytes, boundary: str) -> bytes:
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+             for k, v in fields.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="loadtest.pdf"\r\n'
+                 f'Content-Type: application/pdf\r\n\r\n'.encode() + pdf + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts)
+
+def plan_uploads(args, run_id: str, boundary: str) -> list[Upload]:
+    """Unique PDFs across --sizes plus duplicate re-uploads, shuffled so copies race."""
+    rng = random.Random(args.seed)
+    base = args.pdf.read_bytes()
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    n_unique = max(1, round(args.requests * (1 - args.duplicate_ratio)))
+    fields = {"userId": args.user_id, "name": "Load Test Event",
+              "date": "2025-05-12T15:00:00.000Z", "location": "Casper, WY"}
+
+    uploads = []
+    for n in range(n_unique):
+        label = sizes[n % len(sizes)]
+        pdf = make_pdf(base, run_id, n, parse_size(label, len(base)))
+        uploads.append(Upload(n, label, hashlib.sha256(pdf).hexdigest(), multipart(fields, pdf, boundary)))
+    originals = list(uploads)
+    for n in range(n_unique, args.requests):
+        source = rng.choice(originals)
+        uploads.append(Upload(n, source.size_label, source.sha256, source.body, duplicate=True))
+    rng.shuffle(uploads)
+    return uploads
+
+# --- Minimal asyncio HTTP/1.1 client ---
+
+class Connection:
+    """One keep-alive connection; reconnects when the server closes it between requests."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = urlsplit(url)
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def open(self):
+        secure = self.url.scheme == "https"
+        port = self.url.port or (443 if secure else 80)
+        self.reader, self.writer = await asyncio.open_connection(
+            self.url.hostname, port, ssl=ssl.create_default_context() if secure else None)
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def post(self, body: bytes, content_type: str) -> tuple[int, bytes]:
+        # Failures propagate to drive(), which records a transport error and closes the connection
+        return await asyncio.wait_for(self._roundtrip(body, content_type), self.timeout)
+
+    async def _send(self, request: bytes):
+        """
+        Writes *request*, reopening first if the server has closed the idle
+        socket. A write that fails on a reused socket is sent once more on a
+        fresh one: the server had already dropped that connection, so it never
+        saw the request. Nothing is re-sent after the write completes, since
+        the server may have created the event by then.
+        """
+        if self.writer is not None and self.reader.at_eof():
+            await self.close()
+        reused = self.writer is not None
+        if not reused:
+            await self.open()
+        try:
+            self.writer.write(request)
+            await self.writer.drain()
+        except ConnectionError:
+            await self.close()
+            if not reused:
+                raise
+            await self.open()
+            self.writer.write(request)
+            await self.writer.drain()
+
+    async def _roundtrip(self, body: bytes, content_type: str) -> tuple[int, bytes]:
+        path = self.url.path or "/"
+        head = (f"POST {path} HTTP/1.1\r\nHost: {self.url.netloc}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n").encode()
+        await self._send(head + body)
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            data = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            data = b""
+            while (size := int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)):
+                data += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+            await self.reader.readuntil(b"\r\n")
+        else:
+            data = await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, data
+
+# --- Load driver ---
+
+@dataclass
+class Result:
+    index: int
+    sha256: str
+    size_label: str
+    bytes: int
+    status: int          # 0 = transport error
+    latency_ms: float
+    duplicate_flag: bool
+    error: str = ""
+
+async def drive(url: str, uploads: list[Upload], concurrency: int, boundary: str, timeout: float) -> tuple[list[Result], float]:
+    queue: asyncio.Queue[Upload] = asyncio.Queue()
+    for upload in uploads:
+        queue.put_nowait(upload)
+    results: list[Result] = []
+    content_type = f"multipart/form-data; boundary={boundary}"
+    start_gate = asyncio.Event()
+
+    async def worker():
+        conn = Connection(url, timeout)
+        await start_gate.wait()
+        try:
+            while True:
+                try:
+                    upload = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                t0 = time.perf_counter()
+                status, flag, error = 0, False, ""
+                try:
+                    status, data = await conn.post(upload.body, content_type)
+                    try:
+                        flag = bool(json.loads(data or b"{}").get("duplicate"))
+                    except (ValueError, AttributeError):
+                        pass
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                    error = f"{type(e).__name__}: {e}"
+                    await conn.close()
+                results.append(Result(upload.index, upload.sha256, upload.size_label, len(upload.body), status,
+                                      (time.perf_counter() - t0) * 1000, flag, error))
+        finally:
+            await conn.close()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    started = time.perf_counter()
+    start_gate.set()
+    await asyncio.gather(*tasks)
+    return sorted(results, key=lambda r: r.index), time.perf_counter() - started
+
+# --- Analysis ---
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"count": len(values), "p50": round(pick(0.50), 2), "p95": round(pick(0.95), 2),
+            "p99": round(pick(0.99), 2), "mean": round(statistics.fmean(values), 2), "max": round(ordered[-1], 2)}
+
+def dedupe_report(results: list[Result]) -> dict:
+    """Per distinct PDF: exactly one 201 and 409+duplicate for every other copy."""
+    by_hash: dict[str, list[Result]] = defaultdict(list)
+    for r in results:
+        by_hash[r.sha256].append(r)
+    report = {"distinct_pdfs": len(by_hash), "contended_pdfs": 0, "correct": 0,
+              "double_created": [], "false_duplicates": [], "unflagged_409": 0, "other_status": 0}
+    for sha, group in by_hash.items():
+        statuses = [r.status for r in group]
+        if len(group) > 1:
+            report["contended_pdfs"] += 1
+        created = statuses.count(201)
+        report["unflagged_409"] += sum(1 for r in group if r.status == 409 and not r.duplicate_flag)
+        report["other_status"] += sum(1 for s in statuses if s not in (201, 409))
+        if created > 1:
+            report["double_created"].append({"sha256": sha, "created": created, "copies": len(group)})
+        elif created == 0 and 409 in statuses:
+            report["false_duplicates"].append({"sha256": sha, "copies": len(group)})
+        elif created == 1 and all(s == 409 for s in statuses if s != 201):
+            report["correct"] += 1
+    return report
+
+def summarize(results: list[Result], wall: float, args, run_id: str) -> dict:
+    ok = [r for r in results if r.status]
+    by_size: dict[str, list[float]] = defaultdict(list)
+    by_status: dict[str, list[float]] = defaultdict(list)
+    for r in ok:
+        by_size[r.size_label].append(r.latency_ms)
+        by_status[str(r.status)].append(r.latency_ms)
+    errors = defaultdict(int)
+    for r in results:
+        if r.error:
+            errors[r.error.split(":")[0]] += 1
+    return {
+        "run_id": run_id,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "target": args.url,
+        "config": {"requests": args.requests, "concurrency": args.concurrency,
+                   "duplicate_ratio": args.duplicate_ratio, "sizes": args.sizes, "seed": args.seed,
+                   "standin": args.standin},
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(results) / wall, 1) if wall else None,
+        "megabytes_per_second": round(sum(r.bytes for r in ok) / 1e6 / wall, 2) if wall else None,
+        "latency_ms": percentiles([r.latency_ms for r in ok]),
+        "latency_by_size": {k: percentiles(v) for k, v in sorted(by_size.items())},
+        "latency_by_status": {k: percentiles(v) for k, v in sorted(by_status.items())},
+        "status_counts": {str(k): v for k, v in sorted(
+            {s: sum(1 for r in results if r.status == s) for s in {r.status for r in results}}.items())},
+        "transport_errors": dict(errors),
+        "dedupe": dedupe_report(results),
+    }
+
+def print_summary(summary: dict, previous: dict | None = None):
+    lat, dedupe = summary["latency_ms"], summary["dedupe"]
+
+    def delta(current, path):
+        if not previous:
+            return ""
+        before = previous
+        for part in path:
+            before = (before or {}).get(part)
+        if not isinstance(before, (int, float)) or not before:
+            return ""
+        change = 100 * (current - before) / before
+        return colour(f" ({change:+.1f}%)", YELLOW if abs(change) >= 10 else CYAN)
+
+    print(colour(f"\n📈 {lat.get('count', 0)} response(s) in {summary['wall_seconds']}s → "
+                 f"{summary['requests_per_second']} req/s, {summary['megabytes_per_second']} MB/s", CYAN)
+          + delta(summary["requests_per_second"], ["requests_per_second"]))
+    for q in ("p50", "p95", "p99"):
+        if q in lat:
+            print(f"   {q}: {lat[q]:>8.1f} ms" + delta(lat[q], ["latency_ms", q]))
+    for label, stats in summary["latency_by_size"].items():
+        print(f"   size {label:<7} p50 {stats['p50']:>7.1f} ms  p95 {stats['p95']:>7.1f} ms  p99 {stats['p99']:>7.1f} ms")
+    print(f"   status: {summary['status_counts']}" +
+          (colour(f"  transport errors: {summary['transport_errors']}", RED) if summary["transport_errors"] else ""))
+
+    broken = len(dedupe["double_created"]) + len(dedupe["false_duplicates"])
+    status = GREEN if not broken and not dedupe["unflagged_409"] else RED
+    print(colour(f"\n🔁 Dedupe: {dedupe['correct']}/{dedupe['distinct_pdfs']} PDF(s) correct "
+                 f"({dedupe['contended_pdfs']} uploaded concurrently more than once); "
+                 f"{len(dedupe['double_created'])} double-created, {len(dedupe['false_duplicates'])} false duplicate(s), "
+                 f"{dedupe['unflagged_409']} 409(s) without duplicate:true", status))
+
+# --- Local stand-in ---
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Mimics handleCreateEvent's contract: 401 without userId, 201 new PDF, 409 duplicate PDF."""
+    protocol_version = "HTTP/1.1"
+    store: "Standin"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        raw = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + body
+        form, pdf = {}, None
+        for part in email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(raw).iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                pdf = part.get_payload(decode=True)
+            else:
+                form[name] = part.get_content().strip()
+        if not form.get("userId"):
+            return self.reply(401, {"success": False, "code": "AUTH_REQUIRED"})
+        if pdf is None:
+            return self.reply(400, {"success": False, "error": "file required"})
+        event_id = self.store.create(form, hashlib.sha256(pdf).hexdigest())
+        if event_id is None:
+            return self.reply(409, {"success": False, "duplicate": True})
+        return self.reply(201, {"success": True, "id": event_id})
+
+    def reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class Standin:
+    """In-memory events table; `atomic` relies on UNIQUE(pdf_hash), `racy` checks then inserts."""
+
+    def __init__(self, mode: str, delay_ms: float):
+        self.mode, self.delay = mode, delay_ms / 1000
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        unique = "UNIQUE" if mode == "atomic" else ""
+        self.conn.execute(f"CREATE TABLE events (id INTEGER PRIMARY KEY, user_id TEXT, name TEXT, pdf_hash TEXT {unique})")
+
+    def create(self, form: dict, pdf_hash: str) -> int | None:
+        row = (form.get("userId"), form.get("name"), pdf_hash)
+        if self.mode == "atomic":
+            with self.lock:
+                cur = self.conn.execute("INSERT OR IGNORE INTO events (user_id, name, pdf_hash) VALUES (?, ?, ?)", row)
+                return cur.lastrowid if cur.rowcount else None
+        with self.lock:
+            exists = self.conn.execute("SELECT 1 FROM events WHERE pdf_hash = ?", (pdf_hash,)).fetchone()
+        if exists:
+            return None
+        time.sleep(self.delay)  # the gap a D1 round-trip leaves between check and insert
+        with self.lock:
+            return self.conn.execute("INSERT INTO events (user_id, name, pdf_hash) VALUES (?, ?, ?)", row).lastrowid
+
+def start_standin(mode: str, delay_ms: float) -> tuple[ThreadingHTTPServer, str]:
+    handler = type("Handler", (StandinHandler,), {"store": Standin(mode, delay_ms)})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/events/create"
+
+# --- CLI ---
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent upload benchmark for POST /api/events/create.")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Endpoint (default: {DEFAULT_URL})")
+    parser.add_argument("--requests", "-n", type=int, default=200, help="Total uploads (default 200)")
+    parser.add_argument("--concurrency", "-c", type=int, default=20, help="Uploads in flight (default 20)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.5,
+                        help="Share of uploads that re-send an earlier PDF (default 0.5)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated PDF sizes; 'dummy' = worker/dummy.pdf as-is (default: {DEFAULT_SIZES})")
+    parser.add_argument("--pdf", type=Path, default=DEFAULT_PDF, help=f"Base PDF (default: {DEFAULT_PDF})")
+    parser.add_argument("--user-id", default="loadtest", help="userId form field (the worker requires one)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the request mix (default 1)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds (default 30)")
+    parser.add_argument("--standin", choices=("atomic", "racy"), help="Serve a local stand-in instead of --url")
+    parser.add_argument("--standin-delay", type=float, default=2.0,
+                        help="Milliseconds between check and insert in the racy stand-in (default 2)")
+    parser.add_argument("--output", type=Path, help=f"Results JSON (default: {DEFAULT_OUTPUT_DIR}/<run>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    if not 0 <= args.duplicate_ratio < 1:
+        parser.error("--duplicate-ratio must be in [0, 1)")
+    server = None
+    if args.standin:
+        server, args.url = start_standin(args.standin, args.standin_delay)
+        print(colour(f"🧪 Stand-in ({args.standin}) listening at {args.url}", CYAN))
+
+    run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    boundary = f"----loadtest{uuid.uuid4().hex}"
+    uploads = plan_uploads(args, run_id, boundary)
+    print(colour(f"🚀 {len(uploads)} upload(s) of {len({u.sha256 for u in uploads})} distinct PDF(s), "
+                 f"{args.concurrency} concurrent → {args.url}", CYAN))
+
+    try:
+        results, wall = asyncio.run(drive(args.url, uploads, args.concurrency, boundary, args.timeout))
+    finally:
+        if server:
+            server.shutdown()
+
+    summary = summarize(results, wall, args, run_id)
+    previous = None
+    if args.compare:
+        try:
+            previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(colour(f"⚠️  Could not read {args.compare}: {e}", YELLOW))
+    print_summary(summary, previous)
+
+    output = args.output or DEFAULT_OUTPUT_DIR / f"{run_id}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({**summary, "results": [asdict(r) for r in results]}, indent=1) + "\n",
+                      encoding="utf-8")
+    print(colour(f"💾 Results saved to {output}", GREEN))
+
+    dedupe = summary["dedupe"]
+    return 1 if dedupe["double_created"] or dedupe["false_duplicates"] or summary["transport_errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
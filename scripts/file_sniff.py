@@ -0,0 +1,127 @@
+# scripts/file_sniff.py
+"""
+Content sniffing shared by the logic summarizers (summarize-logic.v3.6py and
+summarizev7).
+
+`sniff()` classifies a file from its extension and its first few KB (magic
+bytes, NUL bytes) as:
+
+  • text    – source/templates worth regex-scanning
+  • data    – CSV/TSV/JSONL dumps and the like: summarised by metadata only
+  • binary  – PDFs, images, fonts, archives, SQLite files …: metadata only
+
+Text files are read through `read_window()` / `read_text_window()`, which
+memory-map the file and return at most MAX_TEXT_BYTES (cut back to a line
+boundary), so a 6k-line migration costs a bounded read instead of a full scan.
+"""
+from __future__ import annotations
+
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+
+SNIFF_BYTES = 8 * 1024
+MAX_TEXT_BYTES = 256 * 1024
+
+# (prefix, label); checked in order against the first bytes of the file
+MAGIC = (
+    (b"%PDF-", "PDF document"),
+    (b"\x89PNG\r\n\x1a\n", "PNG image"),
+    (b"GIF87a", "GIF image"),
+    (b"GIF89a", "GIF image"),
+    (b"\xff\xd8\xff", "JPEG image"),
+    (b"II*\x00", "TIFF image"),
+    (b"MM\x00*", "TIFF image"),
+    (b"\x00\x00\x01\x00", "ICO image"),
+    (b"wOFF", "WOFF font"),
+    (b"wOF2", "WOFF2 font"),
+    (b"OTTO", "OpenType font"),
+    (b"\x00\x01\x00\x00\x00", "TrueType font"),
+    (b"PK\x03\x04", "ZIP archive"),
+    (b"\x1f\x8b", "gzip archive"),
+    (b"SQLite format 3\x00", "SQLite database"),
+    (b"\x7fELF", "ELF binary"),
+    (b"ID3", "MP3 audio"),
+    (b"OggS", "Ogg media"),
+    (b"fLaC", "FLAC audio"),
+)
+BINARY_EXTS = {
+    ".pdf", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".ico", ".bmp", ".tif", ".tiff",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot", ".zip", ".gz", ".tgz", ".br", ".zst", ".7z",
+    ".sqlite", ".sqlite3", ".db", ".wasm", ".pyc", ".so", ".dylib", ".exe",
+    ".mp3", ".mp4", ".m4a", ".wav", ".ogg", ".flac", ".mov", ".webm",
+}
+DATA_EXTS = {
+    ".csv": "CSV data",
+    ".tsv": "TSV data",
+    ".jsonl": "JSON Lines data",
+    ".ndjson": "JSON Lines data",
+    ".vtt": "WebVTT transcript",
+    ".srt": "SubRip transcript",
+}
+
+
+@dataclass(frozen=True)
+class Sniff:
+    kind: str   # "text" | "data" | "binary"
+    label: str  # human-readable type, e.g. "PDF document"
+    size: int
+
+    @property
+    def is_text(self) -> bool:
+        return self.kind == "text"
+
+    def describe(self) -> str:
+        """Metadata-only summary used in place of a content summary."""
+        return f"({self.kind}: {self.label}, {human_size(self.size)})"
+
+
+def human_size(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{n} B"
+
+
+def sniff(path: Path, size: int | None = None) -> Sniff:
+    """Classifies *path* from its extension and first SNIFF_BYTES bytes."""
+    if size is None:
+        size = path.stat().st_size
+    ext = path.suffix.lower()
+    if ext in DATA_EXTS:
+        return Sniff("data", DATA_EXTS[ext], size)
+    with path.open("rb") as f:
+        head = f.read(SNIFF_BYTES)
+    for magic, label in MAGIC:
+        if head.startswith(magic):
+            return Sniff("binary", label, size)
+    if ext in BINARY_EXTS:
+        return Sniff("binary", f"{ext[1:].upper()} file", size)
+    if b"\x00" in head:
+        return Sniff("binary", "binary data", size)
+    return Sniff("text", "text", size)
+
+
+def read_window(path: Path, limit: int = MAX_TEXT_BYTES) -> tuple[bytes, bool]:
+    """
+    Returns at most *limit* bytes of *path* through a memory map, trimmed to
+    the last complete line, and whether the file was longer than that.
+    """
+    with path.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return b"", False
+        with mm:
+            if len(mm) <= limit:
+                return mm[:], False
+            end = mm.rfind(b"\n", 0, limit)
+            return mm[:end + 1 if end >= 0 else limit], True
+
+
+def read_text_window(path: Path, limit: int = MAX_TEXT_BYTES) -> tuple[str, bool]:
+    """read_window() decoded as UTF-8 (errors ignored). Returns (text, truncated)."""
+    raw, truncated = read_window(path, limit)
+    return raw.decode("utf-8", errors="ignore"), truncated
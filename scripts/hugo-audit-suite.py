@@ -0,0 +1,67 @@
+# scripts/hugo-audit-suite.py
+"""
+Runs the Hugo audits against one shared scan of `content/` and `layouts/`.
+
+Every audit reads the same in-memory Site from hugo_scan, so the whole suite
+costs a single filesystem pass instead of one walk per script. Unchanged files
+and dependency results come from .cache/hugo-audit.sqlite unless --no-cache.
+
+Usage:
+    python scripts/hugo-audit-suite.py
+    python scripts/hugo-audit-suite.py --compare events townhall
+    python scripts/hugo-audit-suite.py --only layout dependency
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+
+from hugo_scan import scan
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# scan_hugo_md.py writes a subset of the same hugos-path.md report, so the
+# suite only runs scan_hugo_paths.py.
+AUDITS = {
+    "paths": "scan_hugo_paths.py",
+    "layout": "hugo-layout-audit.py",
+    "dependency": "hugo-dependency-audit.py",
+}
+
+GREEN = '\u001b[32m'
+RESET = '\u001b[0m'
+
+def colour(text: str, col: str) -> str:
+    """Applies ANSI color codes to text."""
+    return f"{col}{text}{RESET}"
+
+def load_audit(filename: str):
+    """Imports a (possibly hyphenated) audit script as a module."""
+    path = SCRIPTS_DIR / filename
+    spec = importlib.util.spec_from_file_location(path.stem.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Hugo audits over a single shared scan.")
+    parser.add_argument("--root", default=".", help="Hugo project root (default: current directory)")
+    parser.add_argument("--only", nargs="+", choices=sorted(AUDITS), help="Run only these audits")
+    parser.add_argument("--compare", nargs=2, metavar=("SECTION1", "SECTION2"),
+                        help="Also run hugo-section-comparison.py for two sections")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update .cache/hugo-audit.sqlite")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    site = scan(args.root, use_cache=not args.no_cache)
+    print(colour(f"🔎 Scanned {len(site.pages)} content file(s) and {len(site.layouts)} layout file(s) "
+                 f"in {time.perf_counter() - started:.2f}s", GREEN))
+
+    for name in args.only or AUDITS:
+        load_audit(AUDITS[name]).main(site=site)
+    if args.compare:
+        load_audit("hugo-section-comparison.py").main(args.compare, site=site)
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,11 @@ It traces the relationship between content files, layouts, and partials
 to diagnose inconsistencies in styling and script loading.
 """
 from __future__ import annotations
-import os
-import re
+import argparse
+import json
 from pathlib import Path
 
-# --- Configuration ---
-BASE_DIR = Path('.')
-IGNORED_DIRS = {".git", "node_modules", ".venv", "public", "resources"}
-RE_FRONTMATTER_KEY = re.compile(r'^\s*(\w+)\s*[:=]\s*["\']?(.*?)["\']?\s*$')
-RE_PARTIAL_CALL = re.compile(r'{{\-?\s*(?:partial|template)\s*["\'](.*?)["\']')
+from hugo_scan import Layout, Page, Site, scan
 
 # --- ANSI Colors ---
 GREEN = '\u001b[32m'
@@ -26,132 +22,209 @@ def colour(text: str, col: str) -> str:
     """Applies ANSI color codes to text."""
     return f"{col}{text}{RESET}"
 
-def get_front_matter(content: str) -> dict[str, str]:
-    """Parses front matter from a content file."""
-    fm = {}
-    in_front_matter = False
-    for line in content.splitlines():
-        if line.strip() == '---':
-            if not fm and in_front_matter: # End of front matter
-                break
-            in_front_matter = True
-            continue
-        if in_front_matter:
-            match = RE_FRONTMATTER_KEY.match(line)
-            if match:
-                fm[match.group(1).strip()] = match.group(2).strip()
-    return fm
-
-def find_layout_file(fm: dict, section: str, kind: str) -> Path | None:
+AUDIT_NAME = "dependency:v3"  # bump when the analysis changes to drop cached results
+
+def probe(site: Site, rel: str, probed: set | None) -> Layout | None:
+    """Looks up layouts/<rel>, remembering the path so a later add/remove invalidates the result."""
+    if probed is not None:
+        probed.add(site.key(site.layouts_dir / rel))
+    return site.layout(rel)
+
+def find_layout_file(page: Page, site: Site, probed: set | None = None) -> Layout | None:
     """Finds the layout file for a content page based on Hugo's lookup order."""
-    lookup_paths = []
-    # Rule 1: `layout` key
-    if 'layout' in fm:
-        lookup_paths.append(Path(f"layouts/{fm['layout']}.html"))
-    
-    # Rule 2: `type` key
-    if 'type' in fm:
-        lookup_paths.append(Path(f"layouts/{fm['type']}/{kind}.html"))
-
-    # Rule 3: Section layout
-    if section:
-        lookup_paths.append(Path(f"layouts/{section}/{kind}.html"))
-
-    # Rule 4: Default layout
-    lookup_paths.append(Path(f"layouts/_default/{kind}.html"))
-    
-    for path in lookup_paths:
-        if path.exists():
-            return path
-    
+    # Rule 1: `layout` key, Rule 2: `type` key, Rule 3: section, Rule 4: _default
+    for rel in site.layout_candidates(page):
+        layout = probe(site, rel, probed)
+        if layout:
+            return layout
     return None
 
-def trace_partials(layout_path: Path, partials_found: set, checked_paths: set):
-    """Recursively finds all partials included by a layout file, now aware of baseof.html."""
-    if layout_path in checked_paths or not layout_path.exists():
+class PartialGraph:
+    """
+    Template include graph over layouts/: every template's edges are derived
+    once (baseof.html for block templates, partials/<name> for each partial
+    call) and transitive closures are memoised per strongly connected
+    component, so a page lookup is a dictionary access and include cycles
+    cannot recurse forever.
+    """
+
+    def __init__(self, site: Site):
+        self.site = site
+        self.edges: dict[str, tuple[str, ...]] = {}    # template -> templates it includes
+        self.missing: dict[str, tuple[str, ...]] = {}  # template -> includes that do not exist
+        for rel, layout in site.layouts.items():
+            targets = []
+            # A page template that defines a block renders through baseof.html;
+            # a partial's {{ define }} is scoped to whatever includes it.
+            if layout.defines_block and not layout.standalone and not rel.startswith('partials/'):
+                targets.append('_default/baseof.html')
+            targets.extend(f"partials/{name}" for name in layout.partials)
+            targets = list(dict.fromkeys(targets))
+            self.edges[rel] = tuple(t for t in targets if t in site.layouts)
+            self.missing[rel] = tuple(t for t in targets if t not in site.layouts)
+
+        self.closure: dict[str, frozenset[str]] = {}   # template -> every template it pulls in (incl. itself)
+        self.probes: dict[str, frozenset[str]] = {}    # template -> missing includes anywhere below it
+        self.cycles: list[list[str]] = []
+        for component in self.strongly_connected_components():
+            members = set(component)
+            reach, probes = set(members), set()
+            for node in component:
+                probes.update(self.missing[node])
+                for target in self.edges[node]:
+                    if target not in members:
+                        reach |= self.closure[target]
+                        probes |= self.probes[target]
+            if len(component) > 1 or component[0] in self.edges[component[0]]:
+                self.cycles.append(sorted(component))
+            reach, probes = frozenset(reach), frozenset(probes)
+            for node in component:
+                self.closure[node] = reach
+                self.probes[node] = probes
+
+    def strongly_connected_components(self) -> list[list[str]]:
+        """Iterative Tarjan; components come out dependencies-first."""
+        index, lowlink, on_stack = {}, {}, set()
+        stack, components = [], []
+        for root in sorted(self.edges):
+            if root in index:
+                continue
+            work = [(root, iter(self.edges[root]))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.edges[child])))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def to_json(self) -> dict:
+        return {
+            "nodes": sorted(self.edges),
+            "edges": [[src, dst] for src in sorted(self.edges) for dst in self.edges[src]],
+            "missing": {src: list(dst) for src, dst in sorted(self.missing.items()) if dst},
+            "cycles": self.cycles,
+        }
+
+    def to_dot(self) -> str:
+        lines = ["digraph hugo_templates {", "  rankdir=LR;", "  node [shape=box, fontsize=10];"]
+        in_cycle = {node for cycle in self.cycles for node in cycle}
+        for node in sorted(self.edges):
+            style = ', color=red' if node in in_cycle else ''
+            lines.append(f'  "{node}" [label="{node}"{style}];')
+        for src in sorted(self.edges):
+            for dst in self.edges[src]:
+                lines.append(f'  "{src}" -> "{dst}";')
+            for dst in self.missing[src]:
+                lines.append(f'  "{dst}" [style=dashed, color=gray];')
+                lines.append(f'  "{src}" -> "{dst}" [style=dashed, color=gray];')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        if path.suffix in ('.dot', '.gv'):
+            path.write_text(self.to_dot(), encoding='utf-8')
+        else:
+            path.write_text(json.dumps(self.to_json(), indent=2) + "\n", encoding='utf-8')
+
+def analyze_page(page: Page, site: Site, graph: PartialGraph) -> tuple[dict, set]:
+    """Resolves a page's layout chain; returns (result, every path the result depends on)."""
+    probed = set()
+    layout = find_layout_file(page, site, probed)
+    if not layout:
+        return {"layout": None}, probed
+
+    # The layout's include closure tells us whether extend_head.html is loaded
+    included = graph.closure[layout.rel]
+    probed.update(site.key(site.layouts_dir / rel) for rel in included | graph.probes[layout.rel])
+    return {
+        "layout": str(layout.path),
+        "standalone": layout.standalone,
+        "loads_extend_head": 'partials/extend_head.html' in included,
+        "partials": sorted(site.key(site.layouts_dir / rel) for rel in included),
+    }, probed
+
+def print_result(result: dict):
+    if not result["layout"]:
+        print(f"   {colour('❌ ERROR:', RED)} Could not find a matching layout file.")
         return
-    
-    checked_paths.add(layout_path)
-    partials_found.add(layout_path)
-    
-    try:
-        content = layout_path.read_text(encoding='utf-8', errors='ignore')
-        
-        # If it's a template that defines a block, it likely uses baseof.html
-        if '{{ define' in content and '<html>' not in content:
-            baseof_path = Path('layouts/_default/baseof.html')
-            if baseof_path.exists():
-                trace_partials(baseof_path, partials_found, checked_paths)
-
-        # Find all partial calls in the current file
-        for partial_match in RE_PARTIAL_CALL.finditer(content):
-            partial_name = partial_match.group(1).split(' ')[0] # Get name before context `.`
-            next_layout_path = Path(f"layouts/partials/{partial_name}")
-            trace_partials(next_layout_path, partials_found, checked_paths)
-            
-    except Exception:
-        pass
-
-
-def main():
-    """Main function to run the analysis and print the report."""
-    print(colour("🚀 Running Hugo Dependency Audit (v2)...", GREEN))
-    print("-" * 50)
 
-    content_dir = Path('./content')
-    
-    for root, _, files in os.walk(content_dir):
-        # Skip ignored directories
-        if any(ignored in Path(root).parts for ignored in IGNORED_DIRS):
-            continue
+    print(f"   {colour('→', YELLOW)} Uses Layout: `{result['layout']}`")
+    if result["standalone"]:
+         print(f"   {colour('→', YELLOW)} Analysis: This is a standalone layout.")
 
-        for filename in files:
-            if not filename.endswith('.md'):
-                continue
-            
-            fpath = Path(root) / filename
-            rel_path = fpath.relative_to(BASE_DIR)
-            print(f"📄 {colour(str(rel_path), CYAN)}")
-
-            try:
-                content = fpath.read_text(encoding='utf-8', errors='ignore')
-                fm = get_front_matter(content)
-                
-                # Determine section and kind for layout lookup
-                try:
-                    section = fpath.relative_to(content_dir).parts[0]
-                except IndexError:
-                    section = ""
-                kind = "single" if filename != '_index.md' else "list"
-
-                layout_file = find_layout_file(fm, section, kind)
-
-                if not layout_file:
-                    print(f"   {colour('❌ ERROR:', RED)} Could not find a matching layout file.")
-                    continue
-                
-                print(f"   {colour('→', YELLOW)} Uses Layout: `{layout_file}`")
-
-                # Trace partials to see if extend_head.html is loaded
-                included_partials = set()
-                trace_partials(layout_file, included_partials, set())
-                
-                is_standalone = '<html>' in layout_file.read_text(encoding='utf-8', errors='ignore')
-                if is_standalone:
-                     print(f"   {colour('→', YELLOW)} Analysis: This is a standalone layout.")
-
-                extend_head_path = Path('layouts/partials/extend_head.html')
-                if extend_head_path in included_partials:
-                    print(f"   {colour('✅ SUCCESS:', GREEN)} Loads global styles from `extend_head.html`.")
-                else:
-                    print(f"   {colour('❌ NOTE:', RED)} Does NOT load global styles from `extend_head.html`.")
-
-            except Exception as e:
-                print(f"   {colour('❌ ERROR:', RED)} Could not process file: {e}")
-            
-            print() # Newline for readability
+    if result["loads_extend_head"]:
+        print(f"   {colour('✅ SUCCESS:', GREEN)} Loads global styles from `extend_head.html`.")
+    else:
+        print(f"   {colour('❌ NOTE:', RED)} Does NOT load global styles from `extend_head.html`.")
+    print() # Newline for readability
+
+
+def main(site: Site | None = None, use_cache: bool = True, graph_path: Path | None = None):
+    """Main function to run the analysis and print the report."""
+    print(colour("🚀 Running Hugo Dependency Audit...", GREEN))
+    print("-" * 50)
 
+    site = site or scan(use_cache=use_cache)
+    cached = site.cache.results(AUDIT_NAME) if site.cache else {}
+    reused = 0
+    graph = PartialGraph(site)
+    if graph_path:
+        graph.write(graph_path)
+        print(f"🧩 Template graph ({len(graph.edges)} templates) written to {graph_path}")
+    for cycle in graph.cycles:
+        print(f"{colour('⚠️ Include cycle:', YELLOW)} {' → '.join(cycle + cycle[:1])}")
+
+    for page in site.pages:
+        print(f"📄 {colour(str(page.path), CYAN)}")
+        key = site.key(page.path)
+
+        try:
+            result = cached.get(key)
+            if result is None:
+                result, deps = analyze_page(page, site, graph)
+                if site.cache:
+                    site.cache.store_result(AUDIT_NAME, key, deps, result)
+            else:
+                reused += 1
+            print_result(result)
+
+        except Exception as e:
+            print(f"   {colour('❌ ERROR:', RED)} Could not process file: {e}")
+            print()
+
+    if site.cache:
+        site.cache.commit()
+        print(f"♻️  {reused}/{len(site.pages)} page(s) served from {site.cache.path}, "
+              f"{len(site.cache.changed)} file(s) changed since the last run")
     print(colour("✅ Audit Complete.", GREEN))
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Trace content → layout → partial dependencies.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update .cache/hugo-audit.sqlite")
+    parser.add_argument("--graph", type=Path, metavar="FILE",
+                        help="Write the template dependency graph (.dot/.gv for Graphviz, otherwise JSON)")
+    args = parser.parse_args()
+    main(use_cache=not args.no_cache, graph_path=args.graph)
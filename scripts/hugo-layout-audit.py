@@ -6,9 +6,7 @@ This helps diagnose and fix 404 and incorrect template errors.
 """
 from __future__ import annotations
 
-import os
-from pathlib import Path
-import re
+from hugo_scan import Page, Site, scan
 
 # --- ANSI Colors for Readability ---
 GREEN = '\u001b[32m'
@@ -20,64 +18,50 @@ def colour(text: str, col: str) -> str:
     """Applies ANSI color codes to text."""
     return f"{col}{text}{RESET}"
 
-def get_front_matter_value(content: str, key: str) -> str | None:
-    """Extracts a value from TOML-like front matter."""
-    match = re.search(fr'^\s*{key}\s*=\s*["\'](.*?)["\']', content, re.MULTILINE)
-    if match:
-        return match.group(1)
-    # Also check YAML format
-    match = re.search(fr'^\s*{key}\s*:\s*(.*)', content, re.MULTILINE)
-    if match:
-        return match.group(1).strip().strip("'\"")
-    return None
-
-def find_layout(content_file: Path) -> str:
+def find_layout(page: Page, site: Site) -> str:
     """
     Checks for a corresponding layout file based on Hugo's lookup order.
     Returns the status as a formatted string.
     """
     try:
-        content = content_file.read_text(encoding='utf-8')
-        if not content.strip().startswith('---'):
+        if not page.has_front_matter:
             return colour("⚠️ No Front Matter", YELLOW)
 
-        layout_type = get_front_matter_value(content, 'type')
-        layout_specific = get_front_matter_value(content, 'layout')
-        section = content_file.parent.name if content_file.parent.name != 'content' else ''
+        layout_type = page.get('type')
+        layout_specific = page.get('layout')
+        section = page.rel.parent.name
 
         # --- Hugo's Layout Lookup Order ---
         # 1. Specific `layout` in front matter
         if layout_specific:
             # layouts/section/layout.html or layouts/layout.html
             potential_paths = [
-                Path(f"layouts/{layout_specific}.html"),
+                f"{layout_specific}.html",
             ]
             for p in potential_paths:
-                if p.exists():
-                    return f"{colour('✅ Found Layout:', GREEN)} `{p}` (from `layout` key)"
+                if site.has_layout(p):
+                    return f"{colour('✅ Found Layout:', GREEN)} `layouts/{p}` (from `layout` key)"
             return f"{colour('❌ Not Found:', RED)} No layout found for `layout: \"{layout_specific}\"`"
 
         # 2. Specific `type` in front matter
         if layout_type:
             # layouts/TYPE/single.html
-            p = Path(f"layouts/{layout_type}/single.html")
-            if p.exists():
-                return f"{colour('✅ Found Layout:', GREEN)} `{p}` (from `type` key)"
+            p = f"{layout_type}/single.html"
+            if site.has_layout(p):
+                return f"{colour('✅ Found Layout:', GREEN)} `layouts/{p}` (from `type` key)"
             return f"{colour('❌ Not Found:', RED)} No layout at `layouts/{layout_type}/single.html`"
 
         # 3. Section-based layout
         if section:
             # layouts/section/single.html or layouts/section/list.html
-            kind = "single" if content_file.name != '_index.md' else "list"
-            p = Path(f"layouts/{section}/{kind}.html")
-            if p.exists():
-                return f"{colour('✅ Found Layout:', GREEN)} `{p}` (from section)"
+            p = f"{section}/{page.kind}.html"
+            if site.has_layout(p):
+                return f"{colour('✅ Found Layout:', GREEN)} `layouts/{p}` (from section)"
             
         # 4. Default layout
-        kind = "single" if content_file.name != '_index.md' else "list"
-        p = Path(f"layouts/_default/{kind}.html")
-        if p.exists():
-            return f"{colour('✅ Found Layout:', GREEN)} `{p}` (default)"
+        p = f"_default/{page.kind}.html"
+        if site.has_layout(p):
+            return f"{colour('✅ Found Layout:', GREEN)} `layouts/{p}` (default)"
 
         return colour("❌ No Matching Layout Found", RED)
 
@@ -85,24 +69,19 @@ def find_layout(content_file: Path) -> str:
         return colour(f"Error analyzing file: {e}", RED)
 
 
-def main():
+def main(site: Site | None = None):
     """Main function to run the analysis and print the report."""
     print(colour("🚀 Running Hugo Layout Alignment Audit...", GREEN))
     print("-" * 40)
 
-    content_dir = Path('./content')
-    if not content_dir.exists():
-        print(f"Error: Directory not found at {content_dir}")
+    site = site or scan()
+    if not site.content_dir.exists():
+        print(f"Error: Directory not found at {site.content_dir}")
         return
 
-    # Walk through the content directory
-    for root, _, files in os.walk(content_dir):
-        for filename in files:
-            if filename.endswith('.md'):
-                fpath = Path(root) / filename
-                rel_path = fpath.relative_to(content_dir)
-                status = find_layout(fpath)
-                print(f"📄 File: `{rel_path}`\n   ↳ Status: {status}\n")
+    for page in site.pages:
+        status = find_layout(page, site)
+        print(f"📄 File: `{page.rel}`\n   ↳ Status: {status}\n")
 
     print(colour("✅ Audit Complete.", GREEN))
 
@@ -9,9 +9,8 @@ Usage:
 """
 from __future__ import annotations
 import argparse
-import os
-import re
-from pathlib import Path
+
+from hugo_scan import Site, scan
 
 # --- ANSI Colors for Readability ---
 GREEN = '\u001b[32m'
@@ -24,23 +23,7 @@ def colour(text: str, col: str) -> str:
     """Applies ANSI color codes to text."""
     return f"{col}{text}{RESET}"
 
-def get_front_matter_keys(content: str) -> dict[str, str]:
-    """Parses front matter to get key-value pairs."""
-    fm = {}
-    in_front_matter = False
-    for line in content.splitlines():
-        if line.strip() == '---':
-            if fm and in_front_matter:
-                break
-            in_front_matter = True
-            continue
-        if in_front_matter:
-            match = re.match(r'^\s*(\w+)\s*[:=]\s*(.*)', line)
-            if match:
-                fm[match.group(1).strip()] = match.group(2).strip().strip("'\"")
-    return fm
-
-def analyze_section(section_name: str) -> dict:
+def analyze_section(section_name: str, site: Site) -> dict:
     """Gathers structural information about a given section."""
     analysis = {
         "name": section_name,
@@ -52,36 +35,31 @@ def analyze_section(section_name: str) -> dict:
     }
 
     # 1. Analyze Content Structure
-    content_path = Path(f"content/{section_name}")
-    if not content_path.exists():
+    if not (site.content_dir / section_name).is_dir():
         analysis["errors"].append(f"Content directory `content/{section_name}` not found.")
         return analysis
 
-    if (content_path / "_index.md").exists():
+    index_page = site.page(f"{section_name}/_index.md")
+    leaf_page = site.page(f"{section_name}/index.md")
+    if index_page:
         analysis["content_index"] = "_index.md (Section List Page)"
-        try:
-            content = (content_path / "_index.md").read_text()
-            analysis["front_matter"] = get_front_matter_keys(content)
-        except Exception as e:
-            analysis["errors"].append(f"Could not read _index.md: {e}")
-
-    elif (content_path / "index.md").exists():
+    elif leaf_page:
         analysis["content_index"] = "index.md (Leaf Bundle / Single Page)"
-        try:
-            content = (content_path / "index.md").read_text()
-            analysis["front_matter"] = get_front_matter_keys(content)
-        except Exception as e:
-            analysis["errors"].append(f"Could not read index.md: {e}")
     else:
         analysis["errors"].append("No `_index.md` or `index.md` found.")
 
+    page = index_page or leaf_page
+    if page:
+        analysis["front_matter"] = {k: str(v) for k, v in page.front_matter.items()}
+        if page.error:
+            analysis["errors"].append(f"Could not parse {page.rel.name}: {page.error}")
+
     # 2. Analyze Layout Structure
-    layout_path = Path(f"layouts/{section_name}")
-    if (layout_path / "list.html").exists():
+    if site.has_layout(f"{section_name}/list.html"):
         analysis["layout_list"] = f"layouts/{section_name}/list.html"
-    if (layout_path / "single.html").exists():
+    if site.has_layout(f"{section_name}/single.html"):
         analysis["layout_single"] = f"layouts/{section_name}/single.html"
-        
+
     return analysis
 
 def print_comparison(analysis1: dict, analysis2: dict):
@@ -130,17 +108,18 @@ def print_comparison(analysis1: dict, analysis2: dict):
     print("-" * 70)
 
 
-def main():
+def main(argv: list[str] | None = None, site: Site | None = None):
     """Main function to run the comparison."""
     parser = argparse.ArgumentParser(description="Compare the structure of two Hugo sections.")
     parser.add_argument("section1", help="Name of the first section (e.g., events)")
     parser.add_argument("section2", help="Name of the second section (e.g., townhall)")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    site = site or scan()
 
     print(colour(f"Comparing sections '{args.section1}' and '{args.section2}'...", GREEN))
     
-    analysis1 = analyze_section(args.section1)
-    analysis2 = analyze_section(args.section2)
+    analysis1 = analyze_section(args.section1, site)
+    analysis2 = analyze_section(args.section2, site)
     
     print_comparison(analysis1, analysis2)
 
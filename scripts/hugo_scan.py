@@ -0,0 +1,405 @@
+# scripts/hugo_scan.py
+"""
+Shared single-pass scanner for the Hugo audit scripts.
+
+Walks `content/` and `layouts/` once, reads every file once and parses front
+matter once, then exposes an in-memory model (pages, sections, layouts) that
+scan_hugo_md.py, scan_hugo_paths.py, hugo-layout-audit.py,
+hugo-dependency-audit.py and hugo-section-comparison.py all query.
+
+`scan()` is memoised per project root, so several audits run in one process
+(see hugo-audit-suite.py) share a single filesystem pass. `scan(use_cache=True)`
+also keeps an on-disk AuditCache, so warm runs only re-read changed files.
+
+Usage (as a quick summary):
+    python scripts/hugo_scan.py [project_root]
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+try:
+    import yaml  # installed alongside python-frontmatter
+except ImportError:
+    yaml = None
+
+IGNORED_DIRS = {".git", "node_modules", ".venv", "public", "resources"}
+FRONT_MATTER_DELIMS = {"---": "yaml", "+++": "toml"}
+RE_FRONTMATTER_KEY = re.compile(r'^\s*(\w+)\s*[:=]\s*(.*)$')
+RE_PARTIAL_CALL = re.compile(r'{{\-?\s*(?:partial|template)\s*["\'](.*?)["\']')
+RE_DEFINE = re.compile(r'{{\-?\s*define\s')
+RE_TEMPLATE_COMMENT = re.compile(r'{{\-?\s*/\*.*?\*/\s*\-?}}', re.S)
+CACHE_PATH = Path('.cache/hugo-audit.sqlite')
+# Bump when parse_page/parse_layout change what they return, so cached parses are redone.
+PARSE_VERSION = 3
+
+
+def split_front_matter(text: str) -> tuple[str | None, str, str]:
+    """
+    Splits a content file into (format, front_matter_block, body).
+    format is "yaml", "toml" or None when the file has no front matter.
+    """
+    text = text.lstrip('\ufeff')
+    first, _, rest = text.partition('\n')
+    fmt = FRONT_MATTER_DELIMS.get(first.strip())
+    if fmt is None:
+        return None, '', text
+    delim = first.strip()
+    lines = rest.split('\n')
+    for i, line in enumerate(lines):
+        if line.strip() == delim:
+            return fmt, '\n'.join(lines[:i]), '\n'.join(lines[i + 1:])
+    return fmt, rest, ''  # unterminated: treat the whole file as front matter
+
+
+def parse_front_matter_lines(block: str) -> dict[str, str]:
+    """Loose `key: value` / `key = value` parser used when no YAML/TOML library is available."""
+    fm = {}
+    for line in block.splitlines():
+        match = RE_FRONTMATTER_KEY.match(line)
+        if match:
+            fm[match.group(1)] = match.group(2).strip().strip("'\"")
+    return fm
+
+
+def plain(value):
+    """
+    *value* as JSON types: dates and times become ISO strings, keys strings, so
+    front matter reads back from the cache exactly as a fresh parse returns it.
+    """
+    if isinstance(value, dict):
+        return {str(k): plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [plain(v) for v in value]
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def parse_front_matter(text: str) -> tuple[dict, bool, str | None]:
+    """Returns (front_matter, has_front_matter, error) for the text of a content file."""
+    fmt, block, _ = split_front_matter(text)
+    if fmt is None:
+        return {}, False, None
+    try:
+        if fmt == "yaml" and yaml is not None:
+            data = yaml.safe_load(block) or {}
+        elif fmt == "toml" and tomllib is not None:
+            data = tomllib.loads(block)
+        else:
+            data = parse_front_matter_lines(block)
+        if not isinstance(data, dict):
+            raise ValueError(f"front matter is a {type(data).__name__}, expected a mapping")
+        return plain(data), True, None
+    except Exception as e:
+        return parse_front_matter_lines(block), True, str(e)
+
+
+@dataclass
+class Page:
+    """A content file and its parsed front matter."""
+    path: Path                      # e.g. content/events/_index.md
+    rel: Path                       # relative to content/, e.g. events/_index.md
+    front_matter: dict = field(default_factory=dict)
+    has_front_matter: bool = False
+    error: str | None = None        # front matter parse error, if any
+
+    def get(self, key: str, default=None):
+        return self.front_matter.get(key, default)
+
+    @property
+    def section(self) -> str:
+        """Top-level section under content/ ('' for files at the content root)."""
+        return self.rel.parts[0] if len(self.rel.parts) > 1 else ''
+
+    @property
+    def folder(self) -> str:
+        return self.rel.parent.as_posix() if self.rel.parent != Path('.') else ''
+
+    @property
+    def kind(self) -> str:
+        return "list" if self.rel.name == '_index.md' else "single"
+
+    @property
+    def default_url(self) -> str:
+        return f'/{self.rel.with_suffix("").as_posix()}/'
+
+
+@dataclass
+class Layout:
+    """A template under layouts/ with the facts the audits need."""
+    path: Path                      # e.g. layouts/partials/extend_head.html
+    rel: str                        # relative to layouts/, e.g. partials/extend_head.html
+    partials: tuple[str, ...] = ()  # names passed to {{ partial "…" }} / {{ template "…" }}
+    defines_block: bool = False     # contains {{ define … }}
+    standalone: bool = False        # contains its own <html>
+
+
+@dataclass
+class Site:
+    """In-memory model of a Hugo project's content and layouts."""
+    root: Path
+    pages: list[Page]
+    layouts: dict[str, Layout]
+    sections: dict[str, list[Page]]
+    cache: AuditCache | None = None
+
+    def key(self, path: Path) -> str:
+        """Cache key for a file of this site: its posix path relative to the root."""
+        return path.relative_to(self.root).as_posix()
+
+    @property
+    def content_dir(self) -> Path:
+        return self.root / 'content'
+
+    @property
+    def layouts_dir(self) -> Path:
+        return self.root / 'layouts'
+
+    def page(self, rel: str | Path) -> Page | None:
+        rel = Path(rel)
+        return next((p for p in self.pages if p.rel == rel), None)
+
+    def section_pages(self, name: str) -> list[Page]:
+        return self.sections.get(name, [])
+
+    def has_section(self, name: str) -> bool:
+        return name in self.sections
+
+    def layout(self, rel: str) -> Layout | None:
+        return self.layouts.get(rel)
+
+    def has_layout(self, rel: str) -> bool:
+        return rel in self.layouts
+
+    def lookup_layout(self, page: Page) -> Layout | None:
+        """First existing layout for *page* by layout key, type key, section, then _default."""
+        for rel in self.layout_candidates(page):
+            if rel in self.layouts:
+                return self.layouts[rel]
+        return None
+
+    def layout_candidates(self, page: Page) -> list[str]:
+        candidates = []
+        if page.get('layout'):
+            candidates.append(f"{page.get('layout')}.html")
+        if page.get('type'):
+            candidates.append(f"{page.get('type')}/{page.kind}.html")
+        if page.section:
+            candidates.append(f"{page.section}/{page.kind}.html")
+        candidates.append(f"_default/{page.kind}.html")
+        return candidates
+
+
+def walk_files(top: Path):
+    """Yields every file under *top* (sorted, skipping IGNORED_DIRS) in one os.walk pass."""
+    for root, dirs, files in os.walk(top):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+        for name in sorted(files):
+            yield Path(root) / name
+
+
+def read_text(path: Path) -> str:
+    return path.read_text(encoding='utf-8', errors='ignore')
+
+
+def parse_page(text: str) -> dict:
+    fm, has_fm, error = parse_front_matter(text)
+    return {'front_matter': fm, 'has_front_matter': has_fm, 'error': error}
+
+
+def parse_layout(text: str) -> dict:
+    # A {{ define }} or {{ partial }} quoted inside {{/* … */}} is documentation, not code.
+    text = RE_TEMPLATE_COMMENT.sub('', text)
+    return {
+        'partials': [m.group(1).split(' ')[0] for m in RE_PARTIAL_CALL.finditer(text)],
+        'defines_block': bool(RE_DEFINE.search(text)),
+        'standalone': '<html>' in text,
+    }
+
+
+class AuditCache:
+    """
+    On-disk cache of parsed files and per-page audit results (SQLite under .cache/).
+
+    Files are keyed by path and revalidated by mtime + size, then by sha256, so a
+    touched-but-identical file is not re-parsed. Audit results record every
+    path they depended on (including layouts they probed and did not find);
+    when a file changes, only the results that list it are dropped.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha256 TEXT, data TEXT
+    );
+    CREATE TABLE IF NOT EXISTS results (
+        audit TEXT, page TEXT, data TEXT, PRIMARY KEY (audit, page)
+    );
+    CREATE TABLE IF NOT EXISTS deps (
+        audit TEXT, page TEXT, dep TEXT, PRIMARY KEY (audit, page, dep)
+    );
+    CREATE INDEX IF NOT EXISTS deps_by_dep ON deps (dep);
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != PARSE_VERSION:
+            self.conn.executescript(f"DELETE FROM files; DELETE FROM results; DELETE FROM deps;"
+                                    f" PRAGMA user_version = {PARSE_VERSION};")
+        self.files = {row[0]: row[1:] for row in
+                      self.conn.execute("SELECT path, mtime_ns, size, sha256, data FROM files")}
+        self.seen: set[str] = set()
+        self.changed: set[str] = set()   # added, edited or removed since the last run
+
+    def load(self, key: str, path: Path, parse) -> dict:
+        """Parsed data for *path*, re-reading it only when its stat or hash changed."""
+        self.seen.add(key)
+        st = path.stat()
+        row = self.files.get(key)
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return json.loads(row[3])
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if row and row[2] == digest:
+            data = row[3]
+        else:
+            data = json.dumps(parse(raw.decode('utf-8', errors='ignore')))
+            self.changed.add(key)
+        self.files[key] = (st.st_mtime_ns, st.st_size, digest, data)
+        self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (key, *self.files[key]))
+        return json.loads(data)
+
+    def finish_scan(self):
+        """Forget files that disappeared and drop every result that depended on a changed path."""
+        removed = [key for key in self.files if key not in self.seen]
+        for key in removed:
+            del self.files[key]
+        self.conn.executemany("DELETE FROM files WHERE path = ?", [(k,) for k in removed])
+        self.changed.update(removed)
+        self.invalidate(self.changed)
+        self.commit()
+
+    def invalidate(self, paths):
+        paths = sorted(paths)
+        for start in range(0, len(paths), 500):
+            batch = paths[start:start + 500]
+            marks = ', '.join('?' * len(batch))
+            stale = f"SELECT audit, page FROM deps WHERE dep IN ({marks})"
+            self.conn.execute(f"DELETE FROM results WHERE (audit, page) IN ({stale})", batch)
+            self.conn.execute(f"DELETE FROM deps WHERE (audit, page) IN ({stale})", batch)
+
+    def results(self, audit: str) -> dict[str, dict]:
+        return {page: json.loads(data) for page, data in
+                self.conn.execute("SELECT page, data FROM results WHERE audit = ?", (audit,))}
+
+    def store_result(self, audit: str, page: str, deps, data: dict):
+        self.conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                          (audit, page, json.dumps(data, default=str)))
+        self.conn.execute("DELETE FROM deps WHERE audit = ? AND page = ?", (audit, page))
+        self.conn.executemany("INSERT OR IGNORE INTO deps VALUES (?, ?, ?)",
+                              [(audit, page, dep) for dep in {page, *deps}])
+
+    def commit(self):
+        self.conn.commit()
+
+    def clear(self):
+        self.conn.executescript("DELETE FROM files; DELETE FROM results; DELETE FROM deps;")
+        self.files.clear()
+
+
+def load_file(path: Path, root: Path, cache: AuditCache | None, parse) -> dict:
+    if cache is None:
+        return parse(read_text(path))
+    return cache.load(path.relative_to(root).as_posix(), path, parse)
+
+
+def scan_content(root: Path, cache: AuditCache | None = None) -> list[Page]:
+    content_dir = root / 'content'
+    pages = []
+    if not content_dir.is_dir():
+        return pages
+    for path in walk_files(content_dir):
+        if path.suffix != '.md':
+            continue
+        try:
+            data = load_file(path, root, cache, parse_page)
+        except OSError as e:
+            data = {'front_matter': {}, 'has_front_matter': False, 'error': str(e)}
+        pages.append(Page(path, path.relative_to(content_dir), data['front_matter'],
+                          data['has_front_matter'], data['error']))
+    return pages
+
+
+def scan_layouts(root: Path, cache: AuditCache | None = None) -> dict[str, Layout]:
+    layouts_dir = root / 'layouts'
+    layouts = {}
+    if not layouts_dir.is_dir():
+        return layouts
+    for path in walk_files(layouts_dir):
+        try:
+            data = load_file(path, root, cache, parse_layout)
+        except OSError:
+            continue
+        rel = path.relative_to(layouts_dir).as_posix()
+        layouts[rel] = Layout(path, rel, tuple(data['partials']), data['defines_block'], data['standalone'])
+    return layouts
+
+
+@lru_cache(maxsize=None)
+def _scan(root: str, use_cache: bool) -> Site:
+    root_path = Path(root)
+    cache = AuditCache(root_path / CACHE_PATH) if use_cache else None
+    pages = scan_content(root_path, cache)
+    sections = defaultdict(list)
+    for page in pages:
+        if page.section:
+            sections[page.section].append(page)
+    layouts = scan_layouts(root_path, cache)
+    if cache is not None:
+        cache.finish_scan()
+    return Site(root_path, pages, layouts, dict(sections), cache)
+
+
+def scan(root: str | Path = '.', use_cache: bool = False) -> Site:
+    """
+    Scans *root* once per process; later calls return the same Site.
+    With use_cache, unchanged files are served from .cache/hugo-audit.sqlite
+    instead of being re-read, and site.cache holds per-page audit results.
+    """
+    return _scan(os.path.relpath(root), use_cache)
+
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else '.'
+    site = scan(root)
+    errors = [p for p in site.pages if p.error]
+    print(f"📄 {len(site.pages)} content file(s) in {len(site.sections)} section(s), "
+          f"🧩 {len(site.layouts)} layout file(s)")
+    for name, pages in sorted(site.sections.items()):
+        print(f"   {name}: {len(pages)}")
+    for page in errors:
+        print(f"❌ {page.path}: {page.error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+# ── scripts/page-weight-audit.py ─────────────────────────────────────────────
+"""
+Page-weight audit of the generated /public folder. For every *.html page:
+
+  • Weight    – HTML + linked CSS + <script src> JS + <img> images, in bytes
+                on disk (and gzip-estimated with --gzip), each asset counted
+                once per page
+  • Duplicates – the same script included more than once on a page
+  • Blocking  – <script src> in <head> without async/defer/type="module"
+  • Missing   – local assets referenced by the page that do not exist
+
+plus the largest assets site-wide and how many pages pull each one in.
+
+Pages are parsed with the stdlib HTMLParser across --jobs processes; every
+asset is stat'ed (and gzipped) once, however many pages share it. Results go
+to a sortable JSON/Markdown report. With a baseline (--update-baseline to
+record one), any page whose weight grew by more than --threshold percent and
+--slack bytes is a regression and the exit status is 1, so it can gate a
+deploy. The baseline lives in data/page-weight-baseline.json and is meant to
+be committed; --require-baseline makes a missing one fail the gate too.
+
+Usage:
+    python scripts/page-weight-audit.py public --update-baseline
+    python scripts/page-weight-audit.py public --json page-weight.json --markdown page-weight.md
+    python scripts/page-weight-audit.py public --sort js --top 20 --gzip
+    python scripts/page-weight-audit.py public --require-baseline      # CI / deploy gate
+"""
+
+from __future__ import annotations
+import argparse, gzip, json, os, re, sys, time
+from collections import Counter
+from html.parser import HTMLParser
+from multiprocessing import Pool
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+GREEN, YELLOW, RED, CYAN, RESET = "\x1b[32m","\x1b[33m","\x1b[31m","\x1b[36m","\x1b[0m"
+
+def colour(t,c): return f"{c}{t}{RESET}"
+
+KINDS = ("html", "css", "js", "img")
+SORT_KEYS = ("total",) + KINDS + ("requests", "page")
+# Committed (not under the gitignored .cache/) so a CI or deploy run compares against it.
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / "data" / "page-weight-baseline.json"
+DEFAULT_THRESHOLD = 10.0     # percent
+DEFAULT_SLACK = 5 * 1024     # bytes a page may grow before the percentage counts
+PAGES_PER_TASK = 64
+RE_BASE_URL = re.compile(r'^\s*baseURL\s*=\s*["\']([^"\']+)["\']', re.MULTILINE)
+
+class PageAssetParser(HTMLParser):
+    """Collects stylesheet, script and image references from one page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_head = False
+        self.stylesheets: list[str] = []
+        self.scripts: list[tuple[str, bool]] = []   # (src, render-blocking)
+        self.images: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "head":
+            self.in_head = True
+        elif tag == "body":
+            self.in_head = False
+        elif tag == "link":
+            attrs = dict(attrs)
+            if "stylesheet" in (attrs.get("rel") or "").lower().split() and attrs.get("href"):
+                self.stylesheets.append(attrs["href"])
+        elif tag == "script":
+            attrs = dict(attrs)
+            if attrs.get("src"):
+                deferred = "async" in attrs or "defer" in attrs or (attrs.get("type") or "") == "module"
+                self.scripts.append((attrs["src"], self.in_head and not deferred))
+        elif tag == "img":
+            src = dict(attrs).get("src")
+            if src and not src.startswith("data:"):
+                self.images.append(src)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.in_head = False
+
+def parse_page(html_path: Path) -> tuple[Path, int, list[str], list[tuple[str, bool]], list[str]]:
+    """Returns (path, html bytes, stylesheets, scripts, images) for one page."""
+    parser = PageAssetParser()
+    raw = html_path.read_bytes()
+    parser.feed(raw.decode("utf-8", errors="ignore"))
+    return html_path, len(raw), parser.stylesheets, parser.scripts, parser.images
+
+def iter_html(root: Path):
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".html"):
+                yield Path(dirpath) / name
+
+def pool_map(func, items: list, jobs: int):
+    """map() in path order, across *jobs* processes once there is enough work."""
+    if jobs <= 1 or len(items) < 2 * PAGES_PER_TASK:
+        yield from map(func, items)
+        return
+    with Pool(jobs) as pool:
+        yield from pool.imap(func, items, chunksize=PAGES_PER_TASK)
+
+def site_base_url(config: Path = Path("config.toml")) -> str:
+    try:
+        m = RE_BASE_URL.search(config.read_text(encoding="utf-8"))
+    except OSError:
+        return ""
+    return m.group(1) if m else ""
+
+class AssetIndex:
+    """Resolves asset URLs to files under *root*; stats (and gzips) each file once."""
+
+    def __init__(self, root: Path, base_url: str = "", gzip_sizes: bool = False):
+        self.root = root
+        self.site = urlsplit(base_url)
+        self.gzip_sizes = gzip_sizes
+        self.sizes: dict[str, int | None] = {}
+        self.pages: Counter[str] = Counter()
+
+    def resolve(self, url: str, page: Path) -> str | None:
+        """Root-relative posix path of a local asset, or None for external/inline URLs."""
+        parts = urlsplit(url)
+        if parts.scheme in ("data", "javascript", "mailto"):
+            return None
+        if parts.scheme or parts.netloc:
+            if parts.netloc != self.site.netloc:
+                return None  # third-party CDN: not part of our build
+            path = parts.path
+        elif parts.path.startswith("/"):
+            path = parts.path
+        else:
+            path = "/" + (page.parent.relative_to(self.root) / parts.path).as_posix()
+        path = os.path.normpath(unquote(path)).replace(os.sep, "/")
+        return path if path.startswith("/") else "/" + path
+
+    def size(self, asset: str) -> int | None:
+        """Bytes for *asset* (gzip-estimated with gzip_sizes), None if it does not exist."""
+        if asset not in self.sizes:
+            path = self.root / asset.lstrip("/")
+            if not path.is_file():
+                self.sizes[asset] = None
+            elif self.gzip_sizes:
+                self.sizes[asset] = len(gzip.compress(path.read_bytes(), compresslevel=6))
+            else:
+                self.sizes[asset] = path.stat().st_size
+        return self.sizes[asset]
+
+def weigh_page(assets: AssetIndex, html_path: Path, html_bytes: int, stylesheets, scripts, images) -> dict:
+    """One report row: per-kind bytes, request count and the page's findings."""
+    rel = html_path.relative_to(assets.root).as_posix()
+    if assets.gzip_sizes:
+        html_bytes = len(gzip.compress(html_path.read_bytes(), compresslevel=6))
+    row = {"page": rel, "html": html_bytes, "css": 0, "js": 0, "img": 0, "requests": 1,
+           "external": 0, "duplicates": [], "blocking": [], "missing": []}
+
+    script_counts = Counter(assets.resolve(src, html_path) or src for src, _ in scripts)
+    row["duplicates"] = sorted(src for src, n in script_counts.items() if n > 1)
+    row["blocking"] = [src for src, blocking in scripts if blocking]
+
+    seen = set()
+    for kind, urls in (("css", stylesheets), ("js", [s for s, _ in scripts]), ("img", images)):
+        for url in urls:
+            asset = assets.resolve(url, html_path)
+            if asset is None:
+                row["external"] += 1
+                continue
+            if asset in seen:
+                continue
+            seen.add(asset)
+            size = assets.size(asset)
+            if size is None:
+                row["missing"].append(asset)
+                continue
+            row[kind] += size
+            row["requests"] += 1
+            assets.pages[asset] += 1
+    row["total"] = sum(row[k] for k in KINDS)
+    return row
+
+def run_audit(root: Path, jobs: int = 1, base_url: str = "", gzip_sizes: bool = False) -> tuple[list[dict], AssetIndex]:
+    assets = AssetIndex(root, base_url, gzip_sizes)
+    rows = [weigh_page(assets, *parsed) for parsed in pool_map(parse_page, list(iter_html(root)), jobs)]
+    return rows, assets
+
+def asset_kind(asset: str) -> str:
+    suffix = Path(asset).suffix.lower()
+    return {".css": "css", ".js": "js", ".mjs": "js"}.get(suffix, "img")
+
+def largest_assets(assets: AssetIndex, top: int) -> list[dict]:
+    found = [(size, asset) for asset, size in assets.sizes.items() if size is not None]
+    return [{"asset": asset, "kind": asset_kind(asset), "bytes": size, "pages": assets.pages[asset]}
+            for size, asset in sorted(found, reverse=True)[:top]]
+
+def load_baseline(path: Path, gzip_sizes: bool) -> dict[str, int]:
+    """Page totals from *path*; empty when missing or recorded in the other size mode."""
+    try:
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if bool(baseline.get("gzip")) != gzip_sizes:
+        print(colour(f"⚠️  {path} was recorded {'with' if baseline.get('gzip') else 'without'} --gzip; ignoring it.", YELLOW))
+        return {}
+    return baseline.get("pages", {})
+
+def find_regressions(rows: list[dict], baseline: dict[str, int], threshold: float, slack: int) -> list[dict]:
+    """Pages whose total grew by more than *threshold* percent and *slack* bytes."""
+    regressions = []
+    for row in rows:
+        before = baseline.get(row["page"])
+        if before is None:
+            continue
+        growth = row["total"] - before
+        if growth > slack and growth > before * threshold / 100:
+            regressions.append({"page": row["page"], "baseline": before, "total": row["total"],
+                                "growth": growth, "percent": round(100 * growth / before, 1) if before else None})
+    return sorted(regressions, key=lambda r: r["growth"], reverse=True)
+
+def kb(n: int) -> str:
+    return f"{n / 1024:.1f} KB"
+
+def render_markdown(report: dict, top: int) -> str:
+    lines = ["# Page Weight Report", "",
+             f"{report['summary']['pages']} page(s), sorted by `{report['sort']}`"
+             f"{' (gzip-estimated)' if report['gzip'] else ''}. "
+             f"Median page {kb(report['summary']['median_total'])}, heaviest {kb(report['summary']['max_total'])}.", ""]
+    if report["regressions"]:
+        lines += ["## ❌ Regressions against baseline", "", "| Page | Baseline | Now | Growth |", "|---|---:|---:|---:|"]
+        lines += [f"| `{r['page']}` | {kb(r['baseline'])} | {kb(r['total'])} | +{kb(r['growth'])} ({r['percent']}%) |"
+                  for r in report["regressions"]]
+        lines.append("")
+    lines += ["## Pages", "", "| Page | Total | HTML | CSS | JS | Images | Requests |", "|---|---:|---:|---:|---:|---:|---:|"]
+    lines += [f"| `{r['page']}` | {kb(r['total'])} | {kb(r['html'])} | {kb(r['css'])} | {kb(r['js'])} | "
+              f"{kb(r['img'])} | {r['requests']} |" for r in report["pages"][:top]]
+    if len(report["pages"]) > top:
+        lines.append(f"\n… {len(report['pages']) - top} more page(s) in the JSON report.")
+    lines += ["", "## Largest assets", "", "| Asset | Kind | Size | Pages |", "|---|---|---:|---:|"]
+    lines += [f"| `{a['asset']}` | {a['kind']} | {kb(a['bytes'])} | {a['pages']} |" for a in report["assets"]]
+    for title, key in (("Render-blocking scripts in <head>", "blocking"),
+                       ("Duplicate script includes", "duplicates"),
+                       ("Missing assets", "missing")):
+        flagged = Counter(src for r in report["pages"] for src in r[key])
+        if flagged:
+            lines += ["", f"## {title}", ""]
+            lines += [f"- `{src}` on {n} page(s)" for src, n in flagged.most_common()]
+    return "\n".join(lines) + "\n"
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Report per-page transferred weight for the built site.")
+    ap.add_argument("root", nargs="?", default="public", help="Hugo output directory (default: public)")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes (0 = one per CPU; default 1)")
+    ap.add_argument("--sort", choices=SORT_KEYS, default="total", help="Sort pages by this column (default: total)")
+    ap.add_argument("--top", type=int, default=25, help="Rows in the Markdown/console tables (default 25)")
+    ap.add_argument("--gzip", action="store_true", help="Estimate transferred bytes with gzip instead of raw size")
+    ap.add_argument("--base-url", default=None, help="Site URL whose absolute links count as local (default: config.toml baseURL)")
+    ap.add_argument("--json", type=Path, help="Write the full report as JSON")
+    ap.add_argument("--markdown", type=Path, help="Write the report as Markdown")
+    ap.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help=f"Baseline page weights (default: {DEFAULT_BASELINE})")
+    ap.add_argument("--update-baseline", action="store_true", help="Record this run as the new baseline")
+    ap.add_argument("--require-baseline", action="store_true", help="Exit 1 when there is no usable baseline (for CI gates)")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help=f"Allowed growth per page in percent (default {DEFAULT_THRESHOLD:g})")
+    ap.add_argument("--slack", type=int, default=DEFAULT_SLACK,
+                    help=f"Growth in bytes always allowed per page (default {DEFAULT_SLACK})")
+    args = ap.parse_args()
+
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        print(colour(f"❌ {root} not found – run `hugo` first.", RED))
+        return 2
+    jobs = args.jobs or os.cpu_count() or 1
+    base_url = args.base_url if args.base_url is not None else site_base_url()
+
+    started = time.perf_counter()
+    rows, assets = run_audit(root, jobs, base_url, args.gzip)
+    elapsed = time.perf_counter() - started
+    reverse = args.sort != "page"
+    rows.sort(key=lambda r: (r[args.sort], r["page"]) if reverse else r["page"], reverse=reverse)
+
+    baseline = load_baseline(args.baseline, args.gzip)
+    regressions = find_regressions(rows, baseline, args.threshold, args.slack) if not args.update_baseline else []
+    totals = sorted(r["total"] for r in rows)
+    report = {
+        "root": str(root), "sort": args.sort, "gzip": args.gzip,
+        "summary": {"pages": len(rows), "median_total": totals[len(totals) // 2] if totals else 0,
+                    "max_total": totals[-1] if totals else 0, "assets": len(assets.sizes),
+                    "seconds": round(elapsed, 3)},
+        "baseline": {"path": str(args.baseline), "pages": len(baseline),
+                     "threshold_percent": args.threshold, "slack_bytes": args.slack},
+        "regressions": regressions,
+        "pages": rows,
+        "assets": largest_assets(assets, args.top),
+    }
+
+    for row in rows[:args.top]:
+        flags = "".join(f" {colour(f'{len(row[k])} {k}', YELLOW if k != 'missing' else RED)}"
+                        for k in ("blocking", "duplicates", "missing") if row[k])
+        print(f"{kb(row['total']):>10}  {row['page']}{flags}")
+    if len(rows) > args.top:
+        print(colour(f"… {len(rows) - args.top} more page(s)", CYAN))
+    print(colour(f"\n📦 {len(rows)} page(s), {len(assets.sizes)} asset(s) in {elapsed:.2f}s; "
+                 f"heaviest {kb(report['summary']['max_total'])}", CYAN))
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=1) + "\n", encoding="utf-8")
+    if args.markdown:
+        args.markdown.parent.mkdir(parents=True, exist_ok=True)
+        args.markdown.write_text(render_markdown(report, args.top), encoding="utf-8")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({"gzip": args.gzip, "pages": {r["page"]: r["total"] for r in
+                                             sorted(rows, key=lambda r: r["page"])}}, indent=1) + "\n",
+                                 encoding="utf-8")
+        print(colour(f"✅ Baseline of {len(rows)} page(s) written to {args.baseline}", GREEN))
+        return 0
+    if not baseline:
+        print(colour(f"ℹ️  No baseline at {args.baseline} – run with --update-baseline and commit it.",
+                     RED if args.require_baseline else YELLOW))
+        return 1 if args.require_baseline else 0
+    for r in regressions:
+        print(f"{colour('✘',RED)} {r['page']} grew {kb(r['growth'])} ({r['percent']}%) "
+              f"to {kb(r['total'])}")
+    print(colour(f"Audit complete – {len(regressions)} page(s) over the weight threshold.",
+                 GREEN if not regressions else YELLOW))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+# ────────────────────────────────────────────────────────────────────────────
@@ -8,13 +8,25 @@ Walk the generated /public folder, parse each *.html, and check that:
         › /css/main.<fingerprint>.css   (production build)
   • That linked file actually exists and is non-empty.
 
-Usage:  python public-css-audit.py public
+Only the document head is parsed: each page is streamed in small chunks and
+parsing stops at </head> (or <body>), so no DOM is built. Stylesheet sizes are
+stat'ed once up front, and --jobs spreads pages across worker processes.
+Exits non-zero when any page fails, so it can gate a deploy.
+
+--incremental keeps a manifest (page → mtime, size, sha256, stylesheet hrefs,
+verdict). Pages whose mtime or size moved are hashed, and only those whose
+sha256 changed are re-parsed; when main.<hash>.css changes, every page's
+verdict is re-derived from its stored hrefs without touching the HTML. The
+report covers the whole tree.
+
+Usage:  python public-css-audit.py public [--jobs N] [--incremental]
 """
 
 from __future__ import annotations
-import sys, re, hashlib
+import argparse, codecs, hashlib, json, os, re, sys
+from html.parser import HTMLParser
+from multiprocessing import Pool
 from pathlib import Path
-from bs4 import BeautifulSoup   # pip install beautifulsoup4
 
 GREEN, YELLOW, RED, CYAN, RESET = "\x1b[32m","\x1b[33m","\x1b[31m","\x1b[36m","\x1b[0m"
 
@@ -22,33 +34,208 @@ def colour(t,c): return f"{c}{t}{RESET}"
 
 CSS_RE   = re.compile(r"^/css/(main\.(?:dev|[0-9a-f]{8,})\.css)$")
 EXT_HEAD_FLAG = "<!-- extend_head.html -->"  # add this once inside the partial
+MIN_CSS_BYTES = 1000
+READ_CHUNK = 16 * 1024
+PAGES_PER_TASK = 64
+DEFAULT_MANIFEST = Path(".cache/public-css-audit.json")
+MANIFEST_VERSION = 1
+
+class _HeadDone(Exception):
+    pass
+
+class HeadLinkParser(HTMLParser):
+    """Collects <link rel="stylesheet"> hrefs and stops at the end of <head>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stylesheets: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            raise _HeadDone
+        if tag == "link":
+            attrs = dict(attrs)
+            if "stylesheet" in (attrs.get("rel") or "").lower().split():
+                self.stylesheets.append(attrs.get("href") or "")
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            raise _HeadDone
+
+def head_stylesheets(html_path: Path) -> list[str]:
+    """Streams *html_path* until </head> and returns its stylesheet hrefs."""
+    parser = HeadLinkParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    with open(html_path, "rb") as f:
+        while chunk := f.read(READ_CHUNK):
+            try:
+                parser.feed(decoder.decode(chunk))
+            except _HeadDone:
+                break
+    return parser.stylesheets
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stylesheet_sizes(css_dir: Path) -> dict[str, int]:
+    """One stat per candidate stylesheet, shared by every page check."""
+    if not css_dir.is_dir():
+        return {}
+    return {p.name: p.stat().st_size for p in css_dir.iterdir()
+            if p.is_file() and CSS_RE.match(f"/css/{p.name}")}
+
+def iter_html(root: Path):
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".html"):
+                yield Path(dirpath) / name
+
+_css_sizes: dict[str, int] = {}
+
+def _init_worker(css_sizes: dict[str, int]):
+    global _css_sizes
+    _css_sizes = css_sizes
+
+def linked_css(hrefs: list[str]) -> list[str]:
+    """Names of the main.*.css files among *hrefs*."""
+    return [m.group(1) for m in map(CSS_RE.match, hrefs) if m]
+
+def verdict(hrefs: list[str], css_sizes: dict[str, int]) -> bool:
+    return any(css_sizes.get(name, 0) > MIN_CSS_BYTES for name in linked_css(hrefs))
+
+def audit_page(html_path: Path) -> tuple[Path, bool, list[str]]:
+    """Returns (path, ok, hrefs) for one page against the stylesheet sizes in _css_sizes."""
+    hrefs = head_stylesheets(html_path)
+    return html_path, verdict(hrefs, _css_sizes), hrefs
+
+def fingerprint_page(item: tuple[Path, str | None]) -> tuple[Path, list[str] | None, str]:
+    """
+    Full-content sha256 for the incremental manifest; the head is parsed only
+    when that differs from the stored digest (hrefs None = unchanged).
+    """
+    html_path, previous_sha = item
+    sha = file_sha256(html_path)
+    return html_path, None if sha == previous_sha else head_stylesheets(html_path), sha
+
+def pool_map(func, items: list, jobs: int, css_sizes: dict[str, int]):
+    """map() in path order, across *jobs* processes once there is enough work."""
+    if jobs <= 1 or len(items) < 2 * PAGES_PER_TASK:
+        _init_worker(css_sizes)
+        yield from map(func, items)
+        return
+    with Pool(jobs, initializer=_init_worker, initargs=(css_sizes,)) as pool:
+        yield from pool.imap(func, items, chunksize=PAGES_PER_TASK)
+
+def run_audit(root: Path, jobs: int = 1):
+    """Yields audit_page() results in path order, across *jobs* processes."""
+    css_sizes = stylesheet_sizes(root / "css")
+    yield from pool_map(audit_page, list(iter_html(root)), jobs, css_sizes)
+
+def load_manifest(path: Path) -> dict:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "css": {}, "pages": {}}
+
+def run_incremental(root: Path, manifest_path: Path, jobs: int = 1) -> tuple[dict, dict]:
+    """
+    Hash only pages whose mtime/size moved, re-parse only those whose sha256
+    changed, then re-derive every verdict from the stored hrefs
+    against the current stylesheets. Returns (manifest, stats).
+    """
+    manifest = load_manifest(manifest_path)
+    old_pages, old_css = manifest["pages"], manifest["css"]
+    css_sizes = stylesheet_sizes(root / "css")
+    css_changed = {name for name in old_css.keys() | css_sizes.keys()
+                   if old_css.get(name) != css_sizes.get(name)}
+
+    pages, stale = {}, []
+    for html_path in iter_html(root):
+        rel = html_path.relative_to(root).as_posix()
+        st = html_path.stat()
+        entry = old_pages.get(rel)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            pages[rel] = entry
+        else:
+            stale.append((html_path, entry["sha256"] if entry else None))
+
+    stats = {"pages": 0, "rewritten": 0, "touched": 0, "css_reverified": 0,
+             "removed": len(old_pages.keys() - {p.relative_to(root).as_posix() for p, _ in stale} - pages.keys())}
+    rescanned = set()
+    for html_path, hrefs, sha in pool_map(fingerprint_page, stale, jobs, css_sizes):
+        rel = html_path.relative_to(root).as_posix()
+        st = html_path.stat()
+        if hrefs is None:
+            stats["touched"] += 1      # Hugo rewrote identical bytes
+            hrefs = old_pages[rel]["hrefs"]
+        else:
+            stats["rewritten"] += 1
+            rescanned.add(rel)
+        pages[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha, "hrefs": hrefs}
+
+    for rel, entry in pages.items():
+        ok = verdict(entry["hrefs"], css_sizes)
+        if rel not in rescanned and css_changed & set(linked_css(entry["hrefs"])):
+            stats["css_reverified"] += 1
+        entry["ok"] = ok
+    stats["pages"] = len(pages)
+
+    manifest = {"version": MANIFEST_VERSION, "css": css_sizes, "pages": dict(sorted(pages.items()))}
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, indent=1) + "\n", encoding="utf-8")
+    return manifest, {**stats, "rescanned": rescanned}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Verify every built page links a real main.*.css stylesheet.")
+    ap.add_argument("root", nargs="?", default="public", help="Hugo output directory (default: public)")
+    ap.add_argument("--jobs", "-j", type=int, default=1,
+                    help="Worker processes (0 = one per CPU; default 1)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Only re-scan pages Hugo rewrote since the last run; report from the manifest")
+    ap.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST,
+                    help=f"Manifest for --incremental (default: {DEFAULT_MANIFEST})")
+    args = ap.parse_args()
+
+    root = Path(args.root).resolve()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    if args.incremental:
+        manifest, stats = run_incremental(root, args.manifest, jobs)
+        errors = 0
+        for rel, entry in manifest["pages"].items():
+            if not entry["ok"]:
+                errors += 1
+                print(f"{colour('✘',RED)} {rel} → stylesheet missing or wrong ({entry['hrefs']})")
+            elif rel in stats["rescanned"]:
+                print(f"{colour('✔',GREEN)} {rel}")
+        print(colour(f"\n{stats['pages']} page(s): {stats['rewritten']} re-parsed, "
+                     f"{stats['touched']} rewritten unchanged, {stats['css_reverified']} re-verified "
+                     f"for a stylesheet change, {stats['removed']} removed", CYAN))
+        print(colour(f"Audit complete – {errors} page(s) need fixing." ,
+                     GREEN if errors==0 else YELLOW))
+        return 1 if errors else 0
+
+    errors = 0
+    for html_path, ok, hrefs in run_audit(root, jobs):
+        rel = html_path.relative_to(root)
+        if ok:
+            print(f"{colour('✔',GREEN)} {rel}")
+        else:
+            errors += 1
+            print(f"{colour('✘',RED)} {rel} → stylesheet missing or wrong ({hrefs})")
+
+    print(colour(f"\nAudit complete – {errors} page(s) need fixing." ,
+                 GREEN if errors==0 else YELLOW))
+    return 1 if errors else 0
 
-root = Path(sys.argv[1] if len(sys.argv) > 1 else "public").resolve()
-css_dir = root / "css"
-
-errors = 0
-for html_path in root.rglob("*.html"):
-    rel = html_path.relative_to(root)
-    soup = BeautifulSoup(html_path.read_text("utf-8", errors="ignore"),
-                         features="html.parser")
-
-    links = [l for l in soup.find_all("link", rel="stylesheet")]
-    ok    = False
-    for l in links:
-        href = l.get("href","")
-        m = CSS_RE.match(href)
-        if not m: continue
-        css_file = css_dir / m.group(1)
-        if css_file.exists() and css_file.stat().st_size > 1000:
-            ok = True
-            break
-
-    if ok:
-        print(f"{colour('✔',GREEN)} {rel}")
-    else:
-        errors += 1
-        print(f"{colour('✘',RED)} {rel} → stylesheet missing or wrong ({[l.get('href') for l in links]})")
-
-print(colour(f"\nAudit complete – {errors} page(s) need fixing." ,
-             GREEN if errors==0 else YELLOW))
+if __name__ == "__main__":
+    sys.exit(main())
 # ────────────────────────────────────────────────────────────────────────────
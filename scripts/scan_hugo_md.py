@@ -1,28 +1,34 @@
 # scan_hugo_md.py
 # 📄 Scans all .md files under `content/` and logs front matter details
 
-import os
-import frontmatter
 from pathlib import Path
 
-content_dir = Path("content")
+from hugo_scan import scan
+
 output_path = Path("hugos-path.md")
-results = []
 
-for md_file in content_dir.rglob("*.md"):
-    try:
-        post = frontmatter.load(md_file)
-        title = post.get('title', 'Untitled')
-        type_ = post.get('type', 'None')
-        layout = post.get('layout', 'None')
-        url = post.get('url', f'/{md_file.relative_to(content_dir).with_suffix("")}/')
 
-        results.append(f"- **File**: `{md_file}`\n  - Title: {title}\n  - Type: `{type_}`\n  - Layout: `{layout}`\n  - URL: `{url}`\n")
-    except Exception as e:
-        results.append(f"- **File**: `{md_file}`\n  - ❌ Error parsing front matter: {e}")
+def main(site=None):
+    site = site or scan()
+    results = []
+
+    for page in site.pages:
+        if page.error:
+            results.append(f"- **File**: `{page.path}`\n  - ❌ Error parsing front matter: {page.error}")
+            continue
+        title = page.get('title', 'Untitled')
+        type_ = page.get('type', 'None')
+        layout = page.get('layout', 'None')
+        url = page.get('url', page.default_url)
+
+        results.append(f"- **File**: `{page.path}`\n  - Title: {title}\n  - Type: `{type_}`\n  - Layout: `{layout}`\n  - URL: `{url}`\n")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("# Hugo Content File Summary\n\n")
+        f.write("\n".join(results))
+
+    print(f"✅ Report written to: {output_path}")
 
-with open(output_path, "w", encoding="utf-8") as f:
-    f.write("# Hugo Content File Summary\n\n")
-    f.write("\n".join(results))
 
-print(f"✅ Report written to: {output_path}")
+if __name__ == "__main__":
+    main()
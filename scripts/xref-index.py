@@ -0,0 +1,460 @@
+# scripts/xref-index.py
+"""
+Persistent cross-reference index of worker API routes, their frontend
+callers and Firestore collection access, stored in SQLite.
+
+  • routes       – `router.get("/api/…")` / chained `.post("/api/…")` in worker/src/**
+  • callers      – `fetch(…)`, `apiFetch(…)`, `safeFetch(…)` in static/js/**, with the URL
+                   resolved through same-file string constants (`${API_ROOT}/events/create`)
+  • links        – route ↔ caller, matched segment-by-segment (`:id`, `${…}` and `*` are wildcards)
+  • collections  – Firestore `collection(…)` / `doc(…)` / `.collection(…)` references in
+                   static/js/**, classified as read / write / ref
+
+Every command first refreshes the index incrementally: files are revalidated
+by mtime/size then sha256, only changed files are re-extracted, and only
+their routes/callers are re-linked. Lookups are indexed (O(log n)), so
+"who calls this endpoint" never re-scans the repo.
+
+Usage:
+    python scripts/xref-index.py update
+    python scripts/xref-index.py callers /api/events/create
+    python scripts/xref-index.py callers /api/townhall/posts/123 --method GET
+    python scripts/xref-index.py routes [--unused]
+    python scripts/xref-index.py orphans          # fetches that hit no worker route
+    python scripts/xref-index.py collection users
+    python scripts/xref-index.py collections
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+DEFAULT_DB = Path('.cache') / 'xref.sqlite'
+ROUTE_DIRS = ('worker/src',)
+CALLER_DIRS = ('static/js',)
+SOURCE_EXTS = {'.js', '.mjs', '.ts'}
+IGNORED_DIRS = {'node_modules', '.git', '.wrangler', 'dist', 'build'}
+
+# --- Extraction patterns ---
+RE_ROUTE = re.compile(
+    r'\.(get|post|put|delete|patch|options|all)\s*\(\s*["\'`](/[^"\'`]*|\*)["\'`]\s*(?:,\s*([\w$.]+))?'
+)
+RE_CALL = re.compile(r'\b(fetch|apiFetch|safeFetch)\s*\(\s*(?:(["\'`])((?:(?!\2).)*)\2|([\w$.]+))', re.DOTALL)
+RE_METHOD = re.compile(r'\bmethod\s*:\s*["\'`](\w+)["\'`]', re.IGNORECASE)
+RE_CONST = re.compile(r'\b(?:const|let|var)\s+([\w$]+)\s*=\s*([^;\n]+)')
+RE_STRING = re.compile(r'(["\'`])((?:(?!\1).)*)\1')
+RE_PLACEHOLDER = re.compile(r'\$\{\s*([^}]*)\}')
+RE_API_ROOT_NAME = re.compile(r'api|base|root', re.IGNORECASE)
+
+RE_FS_MODULAR = re.compile(r'\b(collection|collectionGroup|doc)\s*\(\s*[\w$.]+\s*,\s*([^)]*)\)')
+RE_FS_COMPAT = re.compile(r'\.collection\s*\(\s*(["\'`])((?:(?!\1).)*)\1\s*\)')
+RE_FS_WRITE = re.compile(r'\b(?:addDoc|setDoc|updateDoc|deleteDoc)\b|\.(?:add|set|update|delete)\s*\(')
+RE_FS_READ = re.compile(r'\b(?:getDoc|getDocs|onSnapshot|query)\b|\.(?:get|onSnapshot|where|orderBy|limit)\s*\(')
+RE_ASSIGNED = re.compile(r'\b(?:const|let|var)\s+([\w$]+)\s*=\s*(?:await\s+)?$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha256 TEXT
+);
+CREATE TABLE IF NOT EXISTS routes (
+    id INTEGER PRIMARY KEY, file TEXT, line INTEGER, method TEXT, path TEXT, handler TEXT
+);
+CREATE INDEX IF NOT EXISTS routes_by_path ON routes (path);
+CREATE INDEX IF NOT EXISTS routes_by_file ON routes (file);
+CREATE TABLE IF NOT EXISTS callers (
+    id INTEGER PRIMARY KEY, file TEXT, line INTEGER, func TEXT, method TEXT, raw TEXT, path TEXT
+);
+CREATE INDEX IF NOT EXISTS callers_by_path ON callers (path);
+CREATE INDEX IF NOT EXISTS callers_by_file ON callers (file);
+CREATE TABLE IF NOT EXISTS links (
+    route_id INTEGER, caller_id INTEGER, PRIMARY KEY (route_id, caller_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS links_by_caller ON links (caller_id);
+CREATE TABLE IF NOT EXISTS collections (
+    id INTEGER PRIMARY KEY, file TEXT, line INTEGER, collection TEXT, access TEXT
+);
+CREATE INDEX IF NOT EXISTS collections_by_name ON collections (collection, access);
+CREATE INDEX IF NOT EXISTS collections_by_file ON collections (file);
+"""
+
+# --- ANSI Colors ---
+GREEN = '\u001b[32m'
+RED = '\u001b[31m'
+YELLOW = '\u001b[33m'
+CYAN = '\u001b[36m'
+RESET = '\u001b[0m'
+
+def colour(text: str, col: str) -> str:
+    """Applies ANSI color codes to text."""
+    return f"{col}{text}{RESET}"
+
+def line_of(code: str, offset: int) -> int:
+    return code.count('\n', 0, offset) + 1
+
+# --- Route extraction ---
+
+def extract_routes(code: str) -> list[tuple[int, str, str, str | None]]:
+    """(line, METHOD, path, handler) for every router registration in *code*."""
+    return [(line_of(code, m.start()), m.group(1).upper(), m.group(2), m.group(3))
+            for m in RE_ROUTE.finditer(code)]
+
+# --- Caller extraction ---
+
+def file_constants(code: str) -> dict[str, str]:
+    """
+    Same-file string constants: `const X = "…"` / `` `…` `` verbatim, and for
+    computed values such as `(window.EVENTS_API_URL || '/api').replace(…)` the
+    first path-like string literal in the initializer (plus any literals
+    concatenated onto it with `+`).
+    """
+    constants = {}
+    for m in RE_CONST.finditer(code):
+        name, init = m.group(1), m.group(2).strip()
+        literal = RE_STRING.fullmatch(init.rstrip(','))
+        if literal:
+            constants[name] = literal.group(2)
+            continue
+        literals = [s.group(2) for s in RE_STRING.finditer(init)]
+        first = next((i for i, lit in enumerate(literals) if lit.startswith('/')), None)
+        if first is not None:
+            # `(window.X || "/api") + "/events"` – concatenations keep the trailing literals
+            joined = re.search(r'\+\s*["\'`]', init)
+            constants[name] = ''.join(literals[first:]) if joined else literals[first]
+        else:
+            if RE_API_ROOT_NAME.search(name):
+                constants.setdefault(name, '')
+    return constants
+
+def resolve_url(raw: str, constants: dict[str, str], depth: int = 0) -> str:
+    """Substitutes ${CONST} from *constants*; anything unresolvable becomes a `:param` segment."""
+    def sub(m):
+        expr = m.group(1).strip()
+        name = expr.split('(')[0].strip()
+        if name in constants and depth < 3:
+            value = resolve_url(constants[name], constants, depth + 1)
+            if value == '' and RE_API_ROOT_NAME.search(name) and m.start() == 0:
+                return '/api'  # e.g. (window.EVENTS_API_URL || '') – the API root at runtime
+            return value
+        if m.start() == 0 and RE_API_ROOT_NAME.search(name):
+            return '/api'      # apiBase / apiRoot() / getApiBase()
+        return ':param'
+    return RE_PLACEHOLDER.sub(sub, raw)
+
+def normalize_path(url: str, func: str) -> str | None:
+    """Path part of a resolved URL, or None for external/unknown URLs."""
+    if re.match(r'^[a-z]+://', url, re.IGNORECASE) or url.startswith('//'):
+        return None
+    path = re.split(r'[?#]', url, maxsplit=1)[0]
+    if func == 'apiFetch' and not path.startswith('/api'):
+        path = '/api/' + path.lstrip('/')
+    if not path.startswith('/'):
+        return None
+    path = re.sub(r'/{2,}', '/', path)
+    return path.rstrip('/') or '/'
+
+def extract_callers(code: str) -> list[tuple[int, str, str | None, str, str | None]]:
+    """(line, func, METHOD or None, raw argument, normalized path or None) per fetch call."""
+    constants = file_constants(code)
+    callers = []
+    for m in RE_CALL.finditer(code):
+        func, literal, ident = m.group(1), m.group(3), m.group(4)
+        if literal is not None:
+            raw = literal if m.group(2) == '`' else literal.replace('${', '$\\{')
+        elif ident in constants:
+            raw = constants[ident]
+        else:
+            raw = ident
+        path = None
+        # `${root}${path}` has no literal part – a generic wrapper such as apiFetch itself
+        if (literal is not None or ident in constants) and RE_PLACEHOLDER.sub('', raw).strip('/'):
+            path = normalize_path(resolve_url(raw, constants), func)
+
+        tail = code[m.end():m.end() + 300]
+        method = RE_METHOD.search(tail.split(')', 1)[0] if '{' not in tail[:3] else tail)
+        if method:
+            method = method.group(1).upper()
+        elif not tail.lstrip().startswith(','):
+            method = 'GET'
+        else:
+            method = None  # options object we cannot see into
+        callers.append((line_of(code, m.start()), func, method, raw, path))
+    return callers
+
+# --- Firestore extraction ---
+
+def collection_path(args: str, is_doc: bool) -> str | None:
+    """'db, "a", id, "b"' → 'a/{}/b' (for doc() the trailing id segment is dropped)."""
+    parts = []
+    for arg in (a.strip() for a in args.split(',')):
+        s = RE_STRING.fullmatch(arg)
+        if s:
+            parts.extend(p or '{}' for p in RE_PLACEHOLDER.sub('{}', s.group(2)).split('/'))
+        elif arg:
+            parts.append('{}')
+    if is_doc and len(parts) % 2 == 0:
+        parts = parts[:-1]
+    if not parts or parts[0] == '{}':
+        return None
+    return '/'.join(parts)
+
+def classify_access(code: str, start: int, end: int) -> set[str]:
+    """read / write / ref for a collection reference spanning code[start:end]."""
+    stmt_start = max(code.rfind(ch, 0, start) for ch in ';{}')
+    stmt_end = code.find(';', end)
+    stmt_end = len(code) if stmt_end == -1 else min(stmt_end, end + 400)
+    before, after = code[stmt_start + 1:start], code[end:stmt_end]
+    access = set()
+    if RE_FS_WRITE.search(before) or RE_FS_WRITE.search(after):
+        access.add('write')
+    if RE_FS_READ.search(before) or RE_FS_READ.search(after):
+        access.add('read')
+
+    assigned = RE_ASSIGNED.search(before)
+    if assigned:
+        name = re.escape(assigned.group(1))
+        uses = re.compile(rf'\b(addDoc|setDoc|updateDoc|deleteDoc|getDoc|getDocs|onSnapshot|query)\s*\(\s*{name}\b'
+                          rf'|\b{name}\s*\.\s*(add|set|update|delete|get|onSnapshot|where|orderBy|limit)\s*\(')
+        for use in uses.finditer(code, stmt_end):
+            verb = use.group(1) or use.group(2)
+            access.add('write' if re.fullmatch(r'addDoc|setDoc|updateDoc|deleteDoc|add|set|update|delete', verb)
+                       else 'read')
+    return access or {'ref'}
+
+def extract_collections(code: str) -> list[tuple[int, str, str]]:
+    """(line, collection path, access) for every Firestore reference in *code*."""
+    found = []
+    for m in RE_FS_MODULAR.finditer(code):
+        path = collection_path(m.group(2), is_doc=m.group(1) == 'doc')
+        if path:
+            for access in sorted(classify_access(code, m.start(), m.end())):
+                found.append((line_of(code, m.start()), path, access))
+    for m in RE_FS_COMPAT.finditer(code):
+        path = collection_path(f'{m.group(1)}{m.group(2)}{m.group(1)}', is_doc=False)
+        if path:
+            for access in sorted(classify_access(code, m.start(), m.end())):
+                found.append((line_of(code, m.start()), path, access))
+    return found
+
+# --- Matching ---
+
+def paths_match(route: str, caller: str) -> bool:
+    """Segment-wise match; route `:x`, caller `:param` and a trailing route `*` are wildcards."""
+    r_parts, c_parts = route.strip('/').split('/'), caller.strip('/').split('/')
+    for i, r in enumerate(r_parts):
+        if r == '*':
+            return True
+        if i >= len(c_parts):
+            return False
+        c = c_parts[i]
+        if r.startswith(':') or c.startswith(':') or r == c:
+            continue
+        return False
+    return len(r_parts) == len(c_parts)
+
+def linkable(route_method: str, route_path: str) -> bool:
+    """Pre-flight handlers and the bare `*` 404 fallback are not what a fetch "calls"."""
+    return route_method != 'OPTIONS' and route_path != '*'
+
+def methods_match(route_method: str, caller_method: str | None) -> bool:
+    return route_method == 'ALL' or caller_method is None or route_method == caller_method
+
+# --- Index ---
+
+class XrefIndex:
+    """SQLite-backed index with incremental, per-file refresh."""
+
+    def __init__(self, root: Path, db_path: Path):
+        self.root = root
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def iter_sources(self):
+        for top in ROUTE_DIRS + CALLER_DIRS:
+            for dirpath, dirs, names in os.walk(self.root / top):
+                dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+                for name in sorted(names):
+                    path = Path(dirpath) / name
+                    if path.suffix in SOURCE_EXTS:
+                        yield top, path
+
+    def update(self) -> dict[str, int]:
+        """Re-extract files whose mtime/size and sha256 changed; re-link only what they touched."""
+        known = {row[0]: row[1:] for row in self.conn.execute("SELECT path, mtime_ns, size, sha256 FROM files")}
+        seen, changed = set(), 0
+        new_routes, new_callers = [], []
+        with self.conn:
+            for top, path in self.iter_sources():
+                rel = path.relative_to(self.root).as_posix()
+                seen.add(rel)
+                st = path.stat()
+                row = known.get(rel)
+                if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                    continue
+                raw = path.read_bytes()
+                digest = hashlib.sha256(raw).hexdigest()
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                  (rel, st.st_mtime_ns, st.st_size, digest))
+                if row and row[2] == digest:
+                    continue
+                changed += 1
+                self.forget(rel)
+                code = raw.decode('utf-8', errors='ignore')
+                if top in ROUTE_DIRS:
+                    for line, method, route, handler in extract_routes(code):
+                        cur = self.conn.execute(
+                            "INSERT INTO routes (file, line, method, path, handler) VALUES (?, ?, ?, ?, ?)",
+                            (rel, line, method, route, handler))
+                        new_routes.append((cur.lastrowid, method, route))
+                else:
+                    for line, func, method, raw_arg, call_path in extract_callers(code):
+                        cur = self.conn.execute(
+                            "INSERT INTO callers (file, line, func, method, raw, path) VALUES (?, ?, ?, ?, ?, ?)",
+                            (rel, line, func, method, raw_arg, call_path))
+                        new_callers.append((cur.lastrowid, method, call_path))
+                    self.conn.executemany(
+                        "INSERT INTO collections (file, line, collection, access) VALUES (?, ?, ?, ?)",
+                        [(rel, *c) for c in extract_collections(code)])
+
+            removed = [rel for rel in known if rel not in seen]
+            for rel in removed:
+                self.forget(rel)
+                self.conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+            self.link(new_routes, new_callers)
+        return {'changed': changed, 'removed': len(removed), 'files': len(seen)}
+
+    def forget(self, rel: str):
+        self.conn.execute("DELETE FROM links WHERE route_id IN (SELECT id FROM routes WHERE file = ?)", (rel,))
+        self.conn.execute("DELETE FROM links WHERE caller_id IN (SELECT id FROM callers WHERE file = ?)", (rel,))
+        for table in ('routes', 'callers', 'collections'):
+            self.conn.execute(f"DELETE FROM {table} WHERE file = ?", (rel,))
+
+    def link(self, new_routes, new_callers):
+        """New routes against every caller, new callers against every route."""
+        if not new_routes and not new_callers:
+            return
+        routes = self.conn.execute("SELECT id, method, path FROM routes").fetchall()
+        callers = self.conn.execute("SELECT id, method, path FROM callers WHERE path IS NOT NULL").fetchall()
+        pairs = set()
+        for r_id, r_method, r_path in new_routes:
+            if not linkable(r_method, r_path):
+                continue
+            pairs.update((r_id, c_id) for c_id, c_method, c_path in callers
+                         if methods_match(r_method, c_method) and paths_match(r_path, c_path))
+        for c_id, c_method, c_path in new_callers:
+            if c_path is None:
+                continue
+            pairs.update((r_id, c_id) for r_id, r_method, r_path in routes
+                         if linkable(r_method, r_path) and methods_match(r_method, c_method) and paths_match(r_path, c_path))
+        self.conn.executemany("INSERT OR IGNORE INTO links VALUES (?, ?)", sorted(pairs))
+
+    # --- Queries ---
+
+    def find_routes(self, path: str, method: str | None = None) -> list[tuple]:
+        """Routes registered for *path*: exact (indexed) first, else pattern routes that match it."""
+        path = path.rstrip('/') or '/'
+        rows = self.conn.execute("SELECT id, method, path, file, line, handler FROM routes WHERE path = ?",
+                                 (path,)).fetchall()
+        if not rows:
+            rows = [r for r in self.conn.execute("SELECT id, method, path, file, line, handler FROM routes "
+                                                 "WHERE path LIKE '%:%' OR path LIKE '%*'")
+                    if linkable(r[1], r[2]) and paths_match(r[2], path)]
+        return [r for r in rows if method is None or r[1] in (method, 'ALL')]
+
+    def callers_of(self, route_id: int) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT c.file, c.line, c.func, c.method, c.raw FROM links l JOIN callers c ON c.id = l.caller_id "
+            "WHERE l.route_id = ? ORDER BY c.file, c.line", (route_id,)).fetchall()
+
+    def routes_with_counts(self) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT r.method, r.path, r.file, r.line, COUNT(l.caller_id) FROM routes r "
+            "LEFT JOIN links l ON l.route_id = r.id WHERE r.method != 'OPTIONS' AND r.path != '*' "
+            "GROUP BY r.id ORDER BY r.path, r.method").fetchall()
+
+    def orphans(self) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT c.file, c.line, c.method, c.path, c.raw FROM callers c "
+            "LEFT JOIN links l ON l.caller_id = c.id "
+            "WHERE l.caller_id IS NULL AND c.path LIKE '/api%' ORDER BY c.path, c.file").fetchall()
+
+    def collection_access(self, name: str) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT access, file, line FROM collections WHERE collection = ? ORDER BY access, file, line",
+            (name,)).fetchall()
+
+    def collections_summary(self) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT collection, "
+            "COUNT(DISTINCT CASE WHEN access = 'read' THEN file END), "
+            "COUNT(DISTINCT CASE WHEN access = 'write' THEN file END), "
+            "COUNT(DISTINCT file) FROM collections GROUP BY collection ORDER BY collection").fetchall()
+
+# --- CLI ---
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cross-reference worker routes, frontend callers and Firestore collections.")
+    parser.add_argument('--root', default='.', help='Repository root (default: current directory)')
+    parser.add_argument('--db', default=None, help=f'Index database (default: <root>/{DEFAULT_DB.as_posix()})')
+    parser.add_argument('--no-update', action='store_true', help='Query the index as-is, without refreshing it')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('update', help='Refresh the index (only changed files are re-read)')
+    p = sub.add_parser('callers', help='Who calls this endpoint?')
+    p.add_argument('path', help='Route or concrete URL path, e.g. /api/events/create')
+    p.add_argument('--method', type=str.upper, help='Restrict to one HTTP method')
+    p = sub.add_parser('routes', help='Every worker route with its caller count')
+    p.add_argument('--unused', action='store_true', help='Only routes with no frontend caller')
+    sub.add_parser('orphans', help='Frontend /api calls that match no worker route')
+    p = sub.add_parser('collection', help='Readers and writers of one Firestore collection')
+    p.add_argument('name', help='Collection path, e.g. users or townhall_threads/{}/replies')
+    sub.add_parser('collections', help='Every Firestore collection with reader/writer counts')
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    index = XrefIndex(root, Path(args.db) if args.db else root / DEFAULT_DB)
+    if not args.no_update or args.command == 'update':
+        stats = index.update()
+        if args.command == 'update' or stats['changed'] or stats['removed']:
+            print(colour(f"🔄 Index refreshed: {stats['changed']} file(s) re-extracted, "
+                         f"{stats['removed']} removed, {stats['files']} tracked", CYAN))
+
+    if args.command == 'callers':
+        routes = index.find_routes(args.path, args.method)
+        if not routes:
+            print(colour(f"❌ No worker route matches {args.path}", RED))
+            return 1
+        for route_id, method, path, file, line, handler in routes:
+            callers = index.callers_of(route_id)
+            print(f"{colour(f'{method} {path}', GREEN)}  ({file}:{line}{f' → {handler}' if handler else ''})")
+            for c_file, c_line, func, c_method, raw in callers:
+                print(f"   ← {c_file}:{c_line}  {func}({raw!r}){f' [{c_method}]' if c_method else ''}")
+            if not callers:
+                print(colour("   (no frontend callers)", YELLOW))
+    elif args.command == 'routes':
+        for method, path, file, line, count in index.routes_with_counts():
+            if args.unused and count:
+                continue
+            status = colour(f"{count} caller(s)", GREEN if count else YELLOW)
+            print(f"{method:<7} {path:<45} {status}  {file}:{line}")
+    elif args.command == 'orphans':
+        for file, line, method, path, raw in index.orphans():
+            print(f"{colour('✘', RED)} {method or '?':<6} {path:<40} {file}:{line}  ({raw})")
+    elif args.command == 'collection':
+        rows = index.collection_access(args.name)
+        if not rows:
+            print(colour(f"❌ No references to collection `{args.name}`", RED))
+            return 1
+        for access, file, line in rows:
+            print(f"{access:<6} {file}:{line}")
+    elif args.command == 'collections':
+        for name, readers, writers, files in index.collections_summary():
+            print(f"{name:<35} {readers} reader(s), {writers} writer(s), {files} file(s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,163 @@
 # tests/conftest.py
-import subprocess
+"""
+Database fixtures for the Python tests, with no wrangler or network involved.
+
+The schema is built once per migrations change from worker/migrations*/ into
+a template SQLite file (shared by every pytest-xdist worker: whoever gets
+there first builds it, the rest reuse it). Tests then get isolation in one
+of two ways:
+
+  • d1_backend / d1_path – a private copy of the template per test, wrapped
+    in d1_client.SqliteBackend; anything goes, including commits.
+  • d1_conn – one connection per worker on its own copy, with each test run
+    inside a SAVEPOINT that is rolled back afterwards (sub-millisecond reset).
+    Tests must not commit() on it.
+
+Both default to EVENTS_DB; parametrize `d1_database` indirectly (or override
+the fixture) for WY_DB.
+
+clear_preview_db is kept for the tests that drive a running worker
+(tests/test_events_api.py). It now deletes rows from the Miniflare SQLite file
+that `wrangler dev` serves, through the sqlite backend. Set
+D1_BACKEND=remote|local to go through wrangler as before.
+"""
+import hashlib
 import os
+import shutil
+import sqlite3
+import sys
+from glob import glob
+
 import pytest
 
-@pytest.fixture(scope="session", autouse=True)
+root = os.path.abspath(os.path.dirname(__file__) + "/..")
+worker_dir = os.path.join(root, "worker")
+sys.path.insert(0, worker_dir)
+
+from d1_client import (  # noqa: E402
+    MIGRATIONS_DIRS,
+    SqliteBackend,
+    build_sqlite_from_migrations,
+    find_local_sqlite,
+    get_backend,
+)
+
+DEFAULT_TEST_DATABASE = "EVENTS_DB"
+
+
+def migrations_digest(database):
+    """Hash of the binding's migration files (names and contents), keying the template."""
+    digest = hashlib.sha256()
+    for migration in sorted(glob(os.path.join(MIGRATIONS_DIRS[database], "*.sql"))):
+        digest.update(os.path.basename(migration).encode())
+        with open(migration, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+@pytest.fixture(scope="session")
+def d1_template_dir(request, tmp_path_factory):
+    """Directory shared by all xdist workers of this run (the per-run basetemp's parent)."""
+    base = tmp_path_factory.getbasetemp()
+    return base.parent if hasattr(request.config, "workerinput") else base
+
+
+@pytest.fixture(scope="session")
+def d1_templates(d1_template_dir):
+    """
+    Returns a function database -> template path, building each template once.
+    The build goes to a worker-private name and is os.replace()d into place,
+    so concurrent workers never see a half-built file.
+    """
+    built = {}
+
+    def template(database):
+        if database not in built:
+            path = d1_template_dir / f"{database.lower()}-{migrations_digest(database)}.sqlite"
+            if not path.exists():
+                scratch = f"{path}.{os.getpid()}.tmp"
+                build_sqlite_from_migrations(database, scratch)
+                os.replace(scratch, path)
+            built[database] = path
+        return built[database]
+
+    return template
+
+
+@pytest.fixture
+def d1_database(request):
+    """Binding the database fixtures clone (indirect-parametrize to change it)."""
+    return getattr(request, "param", DEFAULT_TEST_DATABASE)
+
+
+@pytest.fixture
+def d1_path(d1_templates, d1_database, tmp_path):
+    """Path to a private copy of the migrated schema for this test."""
+    path = tmp_path / f"{d1_database.lower()}.sqlite"
+    shutil.copyfile(d1_templates(d1_database), path)
+    return str(path)
+
+
+@pytest.fixture
+def d1_backend(d1_path):
+    """d1_client.SqliteBackend over this test's private copy of the schema."""
+    backend = SqliteBackend(d1_path)
+    try:
+        yield backend
+    finally:
+        backend.close()
+
+
+@pytest.fixture(scope="session")
+def _d1_session_conns(d1_templates, tmp_path_factory):
+    """One autocommit connection per database per worker, on the worker's own copy."""
+    conns = {}
+
+    def conn(database):
+        if database not in conns:
+            path = tmp_path_factory.mktemp("d1") / f"{database.lower()}.sqlite"
+            shutil.copyfile(d1_templates(database), path)
+            c = sqlite3.connect(path, isolation_level=None)
+            c.row_factory = sqlite3.Row
+            c.execute("PRAGMA journal_mode=MEMORY")
+            c.execute("PRAGMA synchronous=OFF")
+            conns[database] = c
+        return conns[database]
+
+    yield conn
+    for c in conns.values():
+        c.close()
+
+
+@pytest.fixture
+def d1_conn(_d1_session_conns, d1_database):
+    """sqlite3 connection whose changes are rolled back when the test ends."""
+    conn = _d1_session_conns(d1_database)
+    conn.execute("SAVEPOINT d1_test")
+    try:
+        yield conn
+    finally:
+        conn.execute("ROLLBACK TO d1_test")
+        conn.execute("RELEASE d1_test")
+
+
+@pytest.fixture(scope="session")
 def clear_preview_db():
     """
-    Runs once, before any tests, to DELETE all rows from the preview D1 database.
+    Runs once, before the tests that use it, to DELETE all rows from the EVENTS_DB
+    database behind the running worker.
+
+    Defaults to the Miniflare SQLite file that `wrangler dev` serves (via
+    D1_BACKEND=sqlite; D1_SQLITE_PATH overrides which file), and is skipped when
+    there is none yet. D1_BACKEND=remote or local goes through wrangler instead.
     """
-    # Determine paths
-    root = os.path.abspath(os.path.dirname(__file__) + "/..")
-    worker_dir = os.path.join(root, "worker")
-
-    # Execute Wrangler CLI to clear preview DB
-    subprocess.run([
-        "wrangler", "d1", "execute", "EVENTS_DB",
-        "--remote",
-        "--cwd", worker_dir,
-        "--command", "DELETE FROM events;"
-    ], check=True)
-    yield
\ No newline at end of file
+    kind = os.environ.get("D1_BACKEND", "sqlite")
+    if kind == "sqlite" and not (os.environ.get("D1_SQLITE_PATH") or find_local_sqlite("EVENTS_DB")):
+        yield
+        return
+    backend = get_backend(kind, "EVENTS_DB")
+    try:
+        backend.execute_script("DELETE FROM events;")
+    finally:
+        backend.close()
+    yield
@@ -0,0 +1,51 @@
+# tests/test_d1_fixtures.py
+import sqlite3
+
+import pytest
+
+# One row each binding's schema accepts (NOT NULL columns filled in).
+ROWS = {
+    "EVENTS_DB": (
+        "INSERT INTO events (user_id, name, date, location, pdf_url)"
+        " VALUES ('u1', 'Fixture Event', '2025-05-12', 'Casper, WY', 'https://example.com/e.pdf')",
+        "SELECT COUNT(*) AS n FROM events",
+    ),
+    "WY_DB": (
+        "INSERT INTO voters_addr_norm (voter_id, city) VALUES ('200000001', 'CASPER')",
+        "SELECT COUNT(*) AS n FROM voters_addr_norm",
+    ),
+}
+
+databases = pytest.mark.parametrize("d1_database", sorted(ROWS), indirect=True)
+
+# The two tests of each pair are identical on purpose: whichever runs second
+# (in either order, on the same worker) sees what the first one left behind.
+
+
+@databases
+@pytest.mark.parametrize("attempt", [1, 2])
+def test_d1_conn_rolls_back_between_tests(d1_conn, d1_database, attempt):
+    insert, count = ROWS[d1_database]
+    assert d1_conn.execute(count).fetchone()[0] == 0
+    d1_conn.execute(insert)
+    assert d1_conn.execute(count).fetchone()[0] == 1
+
+
+@databases
+@pytest.mark.parametrize("attempt", [1, 2])
+def test_d1_backend_gets_a_private_file(d1_backend, d1_path, d1_templates, d1_database, attempt):
+    insert, count = ROWS[d1_database]
+    assert next(d1_backend.query(count))["n"] == 0
+    d1_backend.execute_script(insert + ";")  # committed, unlike d1_conn
+
+    reopened = sqlite3.connect(d1_path)
+    try:
+        assert reopened.execute(count).fetchone()[0] == 1
+    finally:
+        reopened.close()
+
+    template = sqlite3.connect(d1_templates(d1_database))
+    try:
+        assert template.execute(count).fetchone()[0] == 0
+    finally:
+        template.close()
@@ -1,6 +1,10 @@
 # tests/test_events_api.py
+import pytest
 import requests
 
+# Runs against `wrangler dev`; start from an empty events table.
+pytestmark = pytest.mark.usefixtures("clear_preview_db")
+
 BASE_URL = "http://127.0.0.1:8787/api/events/create"
 
 def test_create_event():
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Assign state house / senate districts to geocoded voters by point-in-polygon
+
+Loads the district boundaries from local GeoJSON files (Census TIGER SLDL /
+SLDU for Wyoming, converted with e.g. `ogr2ogr -f GeoJSON -t_srs EPSG:4326`),
+locates every voters_addr_norm lat/lng inside them, and writes the result to
+voters_addr_norm.house_geo / senate_geo (migration 0042) as one batched
+UPDATE ... FROM (VALUES ...) script. The delegation route prefers those
+columns over the voter-file house / senate text, so the lookup is a column
+read at request time.
+
+The index splits the districts' bounding box into a grid. Each grid row keeps
+the boundary edges crossing it, grouped by district. Points are bucketed by
+cell and tested a whole cell at a time: an even-odd ray cast against only the
+districts with edges in that row and near that column, vectorized with NumPy
+over points x edges. A cell that no boundary crosses resolves from its centre
+alone.
+
+Requires NumPy (pip install numpy).
+
+Usage:
+    python assign_districts.py                                   # local D1, data/wy_*_districts.geojson
+    python assign_districts.py --backend remote --sql-out /tmp/districts.sql
+    python assign_districts.py ../data/voters_addr_norm_geocoded_final.csv --dry-run
+    python assign_districts.py --house sldl.geojson --senate sldu.geojson --district-property SLDLST
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # checked in main() so --help still works without it
+    np = None
+
+from d1_client import D1Error, WORKER_DIR, add_backend_arguments, get_backend, sql_literal
+from import_geocodes import merge_geocodes
+
+DATA_DIR = os.path.join(os.path.dirname(WORKER_DIR), 'data')
+CHAMBERS = {
+    'house': os.path.join(DATA_DIR, 'wy_house_districts.geojson'),
+    'senate': os.path.join(DATA_DIR, 'wy_senate_districts.geojson'),
+}
+
+# Tried in order when --district-property is not given (TIGER, then common hand-made names)
+DISTRICT_PROPERTIES = ('SLDLST', 'SLDUST', 'DISTRICT', 'District', 'district', 'DISTRICTNO', 'NAME')
+# TIGER's "district not defined" placeholder (water, unassigned land)
+UNDEFINED_DISTRICTS = {'ZZZ'}
+
+DEFAULT_CHUNK_ROWS = 500
+# Upper bound on the points x edges matrix built per step (booleans and float64 temporaries)
+MAX_CELLS_PER_STEP = 1 << 22
+
+
+def district_label(properties, prop=None):
+    """Normalize the district property: "001" → "1", anything else stripped as-is."""
+    keys = (prop,) if prop else DISTRICT_PROPERTIES
+    for key in keys:
+        value = properties.get(key)
+        if value not in (None, ''):
+            value = str(value).strip()
+            return str(int(value)) if value.isdigit() else value
+    return None
+
+
+def load_districts(path, prop=None):
+    """Return [(label, [ring, ...])] for every Polygon / MultiPolygon feature in *path*."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    features = data['features'] if data.get('type') == 'FeatureCollection' else [data]
+    districts = []
+    for feature in features:
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        label = district_label(feature.get('properties') or {}, prop)
+        if label is None or label in UNDEFINED_DISTRICTS:
+            continue
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon]
+        districts.append((label, [ring for ring in rings if len(ring) >= 3]))
+    return districts
+
+
+class DistrictIndex:
+    """
+    Grid over the districts' boundary edges (x = lng, y = lat).
+
+    A district contains a point iff a ray cast from it in +x crosses the
+    district's rings an odd number of times. Every such crossing lies in the
+    point's grid row, so a row only stores the edges overlapping it, sorted by
+    district: band_edges[band_start[r]:band_start[r + 1]], with
+    band_features[r] = [(district, start, stop), ...] slices into it.
+    Holes and multi-part districts fall out of the even-odd rule.
+    """
+
+    def __init__(self, districts, grid=None):
+        self.labels = [label for label, _ in districts]
+        x0, y0, x1, y1, owner = [], [], [], [], []
+        for i, (_, rings) in enumerate(districts):
+            for ring in rings:
+                nxt = np.roll(ring, -1, axis=0)
+                x0.append(ring[:, 0])
+                y0.append(ring[:, 1])
+                x1.append(nxt[:, 0])
+                y1.append(nxt[:, 1])
+                owner.append(np.full(len(ring), i, dtype=np.int32))
+        if not owner:
+            raise ValueError("no district polygons")
+        x0, y0, x1, y1 = (np.concatenate(a) for a in (x0, y0, x1, y1))
+        owner = np.concatenate(owner)
+        keep = (x0 != x1) | (y0 != y1)  # drops the closing edge of rings that repeat their first point
+        self.x0, self.y0, self.x1, self.y1, self.owner = x0[keep], y0[keep], x1[keep], y1[keep], owner[keep]
+        # Horizontal edges never cross the ray (slope unused), but they still
+        # mark a cell as holding a boundary
+        dy = self.y1 - self.y0
+        self.slope = np.divide(self.x1 - self.x0, dy, out=np.zeros_like(dy), where=dy != 0)
+        self.exmin, self.exmax = np.minimum(self.x0, self.x1), np.maximum(self.x0, self.x1)
+        self.xmin = np.full(len(districts), np.inf)
+        self.xmax = np.full(len(districts), -np.inf)
+        np.minimum.at(self.xmin, self.owner, self.exmin)
+        np.maximum.at(self.xmax, self.owner, self.exmax)
+
+        n_edges = len(self.owner)
+        # ~16 edges per cell on average; a real boundary is far from uniform, which is fine
+        self.n = grid or int(min(512, max(8, np.sqrt(n_edges / 16))))
+        self.gx0, self.gx1 = float(self.exmin.min()), float(self.exmax.max())
+        self.gy0, self.gy1 = float(min(self.y0.min(), self.y1.min())), float(max(self.y0.max(), self.y1.max()))
+        self.cw = (self.gx1 - self.gx0) / self.n or 1.0
+        self.ch = (self.gy1 - self.gy0) / self.n or 1.0
+
+        # Edge → every row it overlaps, then sort by (row, district)
+        lo = self._rows(np.minimum(self.y0, self.y1))
+        hi = self._rows(np.maximum(self.y0, self.y1))
+        span = hi - lo + 1
+        edge_ids = np.repeat(np.arange(n_edges), span)
+        rows = np.repeat(lo, span) + (np.arange(len(edge_ids)) - np.repeat(np.cumsum(span) - span, span))
+        order = np.lexsort((self.owner[edge_ids], rows))
+        self.band_edges = edge_ids[order]
+        rows = rows[order]
+        self.band_start = np.searchsorted(rows, np.arange(self.n + 1))
+        self.band_features = []
+        for r in range(self.n):
+            s, e = self.band_start[r], self.band_start[r + 1]
+            owners = self.owner[self.band_edges[s:e]]
+            cuts = np.flatnonzero(np.diff(owners)) + 1
+            starts = np.concatenate(([0], cuts)) + s
+            stops = np.concatenate((cuts, [e - s])) + s
+            self.band_features.append([(int(owners[a - s]), a, b) for a, b in zip(starts, stops) if b > a])
+
+    def _rows(self, y):
+        return np.clip(((y - self.gy0) / self.ch).astype(np.int64), 0, self.n - 1)
+
+    def _cols(self, x):
+        return np.clip(((x - self.gx0) / self.cw).astype(np.int64), 0, self.n - 1)
+
+    def locate(self, x, y):
+        """District index for every point (-1 outside all districts)."""
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        result = np.full(len(x), -1, dtype=np.int32)
+        in_grid = np.flatnonzero((x >= self.gx0) & (x <= self.gx1) & (y >= self.gy0) & (y <= self.gy1))
+        if not len(in_grid):
+            return result
+        cells = self._rows(y[in_grid]) * self.n + self._cols(x[in_grid])
+        order = np.argsort(cells, kind='stable')
+        points, cells = in_grid[order], cells[order]
+        occupied, starts = np.unique(cells, return_index=True)
+        bounds = np.append(starts, len(points))
+        for k, cell in enumerate(occupied):
+            pts = points[bounds[k]:bounds[k + 1]]
+            result[pts] = self._locate_cell(int(cell), x[pts], y[pts])
+        return result
+
+    def _locate_cell(self, cell, px, py):
+        row, col = divmod(cell, self.n)
+        cx0 = self.gx0 + col * self.cw
+        cx1 = cx0 + self.cw
+        # Only districts with an edge in this row can contain the point (the ray
+        # out of it must cross one), and only if their extent reaches this column.
+        candidates = [(d, s, e) for d, s, e in self.band_features[row]
+                      if self.xmax[d] >= cx0 and self.xmin[d] <= cx1]
+        if not candidates:
+            return -1
+        edges = np.concatenate([self.band_edges[s:e] for _, s, e in candidates])
+        bounded = (self.exmax[edges] >= cx0) & (self.exmin[edges] <= cx1)
+        if not bounded.any():
+            # No boundary passes through the cell: all its points share one answer
+            cy = self.gy0 + (row + 0.5) * self.ch
+            inside = self._inside(candidates, edges, np.array([(cx0 + cx1) / 2]), np.array([cy]))
+            return inside[0]
+        return self._inside(candidates, edges, px, py)
+
+    def _inside(self, candidates, edges, px, py):
+        result = np.full(len(px), -1, dtype=np.int32)
+        step = max(1, MAX_CELLS_PER_STEP // len(edges))
+        x0, y0, y1, slope = self.x0[edges, None], self.y0[edges, None], self.y1[edges, None], self.slope[edges, None]
+        for start in range(0, len(px), step):
+            qx, qy = px[start:start + step], py[start:start + step]
+            crosses = ((y0 > qy) != (y1 > qy)) & (qx < x0 + (qy - y0) * slope)
+            found = result[start:start + step]
+            offset = 0
+            for district, s, e in candidates:
+                inside = np.count_nonzero(crosses[offset:offset + e - s], axis=0) & 1 == 1
+                found[inside & (found < 0)] = district
+                offset += e - s
+        return result
+
+
+def load_points(args):
+    """Return (voter_ids, lat, lng, current {'house': [...], 'senate': [...]} or None)."""
+    if args.csv:
+        best, _ = merge_geocodes(args.csv)
+        ids = sorted(best)
+        lat = np.fromiter((best[v][1] for v in ids), dtype=np.float64, count=len(ids))
+        lng = np.fromiter((best[v][2] for v in ids), dtype=np.float64, count=len(ids))
+        return ids, lat, lng, None
+    backend = get_backend(args.backend, sqlite_path=args.sqlite_path)
+    try:
+        rows = list(backend.query(
+            "SELECT voter_id, lat, lng, house, senate FROM voters_addr_norm "
+            "WHERE lat IS NOT NULL AND lng IS NOT NULL ORDER BY voter_id;"))
+    finally:
+        backend.close()
+    ids = [row['voter_id'] for row in rows]
+    lat = np.array([row['lat'] for row in rows], dtype=np.float64)
+    lng = np.array([row['lng'] for row in rows], dtype=np.float64)
+    current = {chamber: [district_label(row, chamber) for row in rows] for chamber in CHAMBERS}
+    return ids, lat, lng, current
+
+
+def build_update_sql(ids, assigned, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """One UPDATE ... FROM (VALUES ...) per chunk; voters outside every district get NULL."""
+    statements = []
+    for start in range(0, len(ids), chunk_rows):
+        values = ',\n'.join(
+            f"({sql_literal(ids[i])}, {sql_literal(assigned['house'][i])}, {sql_literal(assigned['senate'][i])})"
+            for i in range(start, min(start + chunk_rows, len(ids)))
+        )
+        statements.append(
+            "UPDATE voters_addr_norm SET house_geo = v.column2, senate_geo = v.column3\n"
+            f"FROM (VALUES\n{values}\n) AS v\n"
+            "WHERE voters_addr_norm.voter_id = v.column1;\n"
+        )
+    return ''.join(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign house/senate districts to geocoded voters from GeoJSON boundaries.")
+    parser.add_argument('csv', nargs='*', help='Geocode CSVs to read points from instead of voters_addr_norm')
+    add_backend_arguments(parser)
+    parser.add_argument('--house', default=CHAMBERS['house'], help='House district GeoJSON')
+    parser.add_argument('--senate', default=CHAMBERS['senate'], help='Senate district GeoJSON')
+    parser.add_argument('--district-property', help=f"Feature property holding the district (default: first of {', '.join(DISTRICT_PROPERTIES)})")
+    parser.add_argument('--grid', type=int, help='Grid rows/columns (default: from the edge count)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows per UPDATE statement')
+    parser.add_argument('--sql-out', help='Also write the UPDATE script to this file')
+    parser.add_argument('--dry-run', action='store_true', help='Assign and report only; do not touch the database')
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ pip install numpy to assign districts")
+        return 1
+
+    started = time.perf_counter()
+    indexes = {}
+    for chamber in CHAMBERS:
+        path = getattr(args, chamber)
+        if not os.path.exists(path):
+            print(f"❌ {chamber} boundaries not found: {path}")
+            return 1
+        districts = load_districts(path, args.district_property)
+        if not districts:
+            print(f"❌ No district polygons in {path}")
+            return 1
+        indexes[chamber] = DistrictIndex(districts, args.grid)
+        print(f"🗺️  {chamber}: {len(districts)} district(s), {len(indexes[chamber].owner)} edge(s), "
+              f"{indexes[chamber].n}x{indexes[chamber].n} grid")
+
+    try:
+        ids, lat, lng, current = load_points(args)
+    except D1Error as e:
+        print(f"❌ Could not read voter coordinates: {e}")
+        return 1
+    print(f"📍 {len(ids)} geocoded voter(s) from {'CSV' if args.csv else args.backend} "
+          f"({time.perf_counter() - started:.1f}s)")
+    if not ids:
+        return 0
+
+    located = time.perf_counter()
+    assigned = {}
+    for chamber, index in indexes.items():
+        found = index.locate(lng, lat)
+        labels = index.labels
+        assigned[chamber] = [labels[d] if d >= 0 else None for d in found.tolist()]
+        hits = int(np.count_nonzero(found >= 0))
+        line = f"   {chamber}: {hits} assigned, {len(ids) - hits} outside every district"
+        if current:
+            known = [(a, b) for a, b in zip(assigned[chamber], current[chamber]) if a and b]
+            if known:
+                agree = sum(a == b for a, b in known)
+                line += f", {agree}/{len(known)} agree with the voter file"
+        print(line)
+    elapsed = time.perf_counter() - located
+    print(f"⚡ Located {len(ids)} voter(s) in {elapsed:.2f}s ({len(ids) / elapsed if elapsed else 0:.0f} points/s)")
+
+    sql = build_update_sql(ids, assigned, args.chunk_rows)
+    if args.sql_out:
+        with open(args.sql_out, 'w', encoding='utf-8') as f:
+            f.write(sql)
+        print(f"📝 Wrote {args.sql_out}")
+    if args.dry_run:
+        return 0
+
+    backend = get_backend(args.backend, sqlite_path=args.sqlite_path)
+    try:
+        backend.execute_script(sql)
+    except D1Error as e:
+        print(f"❌ Update failed: {e}")
+        return 1
+    finally:
+        backend.close()
+    print(f"✅ Wrote districts for {len(ids)} voter(s) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
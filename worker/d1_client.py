@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Shared D1 helpers for the worker's Python scripts
+
+Wraps the wrangler CLI so load_legislators.py and sync_legislators.py
+build SQL and read query results the same way:
+
+  • query() runs `d1 execute --json` and stream-parses the result array,
+    yielding one row at a time instead of buffering the whole stdout.
+  • Rows come back as plain dicts or as __slots__ dataclasses (Legislator,
+    or any table via row_type()).
+  • sql_literal()/build_insert_statements()/execute_sql() render and send
+    batched SQL files in a single wrangler call.
+  • get_backend() picks where reads and writes go: "remote" and "local"
+    shell out to wrangler, "sqlite" opens the Miniflare SQLite file (or a
+    scratch DB built from the migrations) directly with sqlite3, so local
+    loads and test resets skip the Node start-up entirely.
+
+Usage (export a large table as JSON lines with flat memory):
+    python d1_client.py export voters_addr_norm --remote > voters.jsonl
+    python d1_client.py --backend sqlite query "SELECT COUNT(*) AS n FROM wy_legislators"
+"""
+
+import argparse
+import codecs
+import dataclasses
+import json
+import math
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from glob import glob
+from functools import lru_cache
+from typing import Optional
+
+WORKER_DIR = os.path.dirname(os.path.abspath(__file__))
+WRANGLER = os.environ.get('WRANGLER', './scripts/wr').split()
+DEFAULT_DATABASE = 'WY_DB'
+
+BACKENDS = ('remote', 'local', 'sqlite')
+
+# Where `wrangler dev --local` / `d1 execute --local` keep Miniflare state.
+LOCAL_STATE_DIRS = [
+    os.path.join(WORKER_DIR, '.wrangler', 'state', 'v3', 'd1'),
+    os.path.join(os.path.dirname(WORKER_DIR), 'd1-local', 'v3', 'd1'),
+]
+MIGRATIONS_DIRS = {
+    'WY_DB': os.path.join(WORKER_DIR, 'migrations_wy'),
+    'EVENTS_DB': os.path.join(WORKER_DIR, 'migrations'),
+}
+# A table only that binding has, used to tell the Miniflare files apart
+# (their names are hashes of the database id).
+PROBE_TABLES = {
+    'WY_DB': 'wy_legislators',
+    'EVENTS_DB': 'events',
+}
+
+# D1 rejects any single SQL statement over 100 KB; stay well under it so a
+# long text column never tips a chunk over the edge.
+D1_MAX_STATEMENT_BYTES = 90_000
+
+CHUNK_SIZE = 64 * 1024
+
+_RESULTS_OPEN = re.compile(r'"results"\s*:\s*\[')
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+class D1Error(RuntimeError):
+    """Raised when wrangler fails or returns output that is not a D1 result."""
+
+
+@dataclasses.dataclass(slots=True)
+class Legislator:
+    voter_id: int
+    name: str
+    chamber: str
+    district: Optional[int] = None
+    city: Optional[str] = None
+    county: Optional[str] = None
+    party: Optional[str] = None
+    affiliations: Optional[str] = None
+    campaign_website: Optional[str] = None
+    official_profile_url: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    updated: Optional[str] = None
+
+
+LEGISLATOR_COLUMNS = tuple(f.name for f in dataclasses.fields(Legislator))
+
+
+@lru_cache(maxsize=None)
+def row_type(table, columns):
+    """Build (once) a __slots__ dataclass for *table* with the given column names."""
+    name = ''.join(part.capitalize() for part in table.split('_')) + 'Row'
+    return dataclasses.make_dataclass(
+        name, [(c, object, dataclasses.field(default=None)) for c in columns], slots=True,
+    )
+
+
+def _make_row(cls, row):
+    # Ignore columns the dataclass does not declare so a schema addition on
+    # the remote side does not break older scripts.
+    return cls(**{k: row[k] for k in cls.__slots__ if k in row})
+
+
+def sql_literal(value):
+    """Render a Python value as a SQLite literal (NULL, integer or 'text')."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'NULL'  # SQLite has no literal for NaN or infinity
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def build_insert_statements(records, table, columns, verb='INSERT OR REPLACE',
+                            suffix='', max_bytes=D1_MAX_STATEMENT_BYTES):
+    """Pack record tuples into as few multi-row INSERT statements as fit under *max_bytes*."""
+    head = f"{verb} INTO {table} ({', '.join(columns)}) VALUES\n"
+    tail = f"{suffix};\n"
+    statements = []
+    chunk = []
+    size = len(head) + len(tail)
+    for rec in records:
+        values = '(' + ', '.join(sql_literal(v) for v in rec) + ')'
+        row_bytes = len(values.encode('utf-8')) + 2  # ",\n"
+        if chunk and size + row_bytes > max_bytes:
+            statements.append(head + ',\n'.join(chunk) + tail)
+            chunk, size = [], len(head) + len(tail)
+        chunk.append(values)
+        size += row_bytes
+    if chunk:
+        statements.append(head + ',\n'.join(chunk) + tail)
+    return statements
+
+
+def wrangler_command(database, remote, *args):
+    return WRANGLER + ['d1', 'execute', database, '--remote' if remote else '--local', *args]
+
+
+def iter_result_rows(stream, chunk_size=CHUNK_SIZE):
+    """
+    Incrementally parse `wrangler d1 execute --json` output from a binary stream.
+
+    Yields each object inside every `"results": [...]` array as soon as it is
+    complete; the buffer never holds more than one chunk plus a partial row.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf, pos, eof, in_results = '', 0, False, False
+
+    while True:
+        if in_results:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf):
+                if buf[pos] == ']':
+                    pos += 1
+                    in_results = False
+                    continue
+                try:
+                    row, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise D1Error(f"Truncated D1 result near: {buf[pos:pos + 80]!r}")
+                else:
+                    yield row
+                    continue
+            elif eof:
+                raise D1Error("D1 result array was not terminated")
+        else:
+            m = _RESULTS_OPEN.search(buf, pos)
+            if m:
+                pos = m.end()
+                in_results = True
+                continue
+            if eof:
+                return
+            # Keep a short tail in case the key straddles two chunks.
+            pos = max(pos, len(buf) - 32)
+
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+
+def query(sql, database=DEFAULT_DATABASE, remote=False, row_cls=None):
+    """
+    Run a read query through wrangler and yield rows as they are parsed.
+
+    Rows are dicts, or instances of *row_cls* (a __slots__ dataclass) if given.
+    Raises D1Error if wrangler exits non-zero.
+    """
+    cmd = wrangler_command(database, remote, '--json', '--command', sql)
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, cwd=WORKER_DIR)
+        finished = False
+        try:
+            for row in iter_result_rows(proc.stdout):
+                yield row if row_cls is None else _make_row(row_cls, row)
+            finished = True
+        finally:
+            if not finished and proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            err.seek(0)
+            raise D1Error(f"wrangler exited {returncode}: {err.read().decode('utf-8', 'ignore').strip()}")
+
+
+def export_table(table, columns, database=DEFAULT_DATABASE, remote=False, order_by=None, backend=None):
+    """Yield every row of *table* as a typed __slots__ row object."""
+    backend = backend or WranglerBackend(database, remote=remote)
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return backend.query(sql + ';', row_cls=row_type(table, tuple(columns)))
+
+
+def export_legislators(remote=False, backend=None):
+    """Yield every wy_legislators row as a Legislator."""
+    backend = backend or WranglerBackend(remote=remote)
+    return backend.query(f"SELECT {', '.join(LEGISLATOR_COLUMNS)} FROM wy_legislators;", row_cls=Legislator)
+
+
+def execute_file(sql_path, database=DEFAULT_DATABASE, remote=False):
+    """Execute a SQL file with a single wrangler invocation; raises D1Error on failure."""
+    cmd = wrangler_command(database, remote, '--yes', '--file', sql_path)
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=WORKER_DIR)
+    if result.returncode != 0:
+        raise D1Error(result.stderr.strip() or result.stdout.strip())
+    return result
+
+
+def execute_sql(sql, database=DEFAULT_DATABASE, remote=False):
+    """Write *sql* to a temp file and execute it in one wrangler call."""
+    fd, sql_path = tempfile.mkstemp(prefix='d1_', suffix='.sql')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(sql)
+    try:
+        return execute_file(sql_path, database=database, remote=remote)
+    finally:
+        os.unlink(sql_path)
+
+
+class WranglerBackend:
+    """Reads and writes through the wrangler CLI (one Node process per call)."""
+
+    def __init__(self, database=DEFAULT_DATABASE, remote=False):
+        self.database = database
+        self.remote = remote
+        self.name = 'remote' if remote else 'local'
+
+    def query(self, sql, row_cls=None):
+        return query(sql, database=self.database, remote=self.remote, row_cls=row_cls)
+
+    def execute_script(self, sql):
+        execute_sql(sql, database=self.database, remote=self.remote)
+
+    def insert_many(self, table, columns, records, verb='INSERT OR REPLACE', suffix='', trailing_sql=None):
+        """Render records into multi-row statements and send them (plus *trailing_sql*) as one file."""
+        sql = ''.join(build_insert_statements(records, table, columns, verb=verb, suffix=suffix))
+        if trailing_sql:
+            sql += trailing_sql
+        if sql:
+            self.execute_script(sql)
+
+    def close(self):
+        pass
+
+
+class SqliteBackend:
+    """Talks to a D1 SQLite file directly through sqlite3, bypassing wrangler."""
+
+    def __init__(self, path, wal=False):
+        # wal=True switches the file's journal mode persistently, so it is
+        # opt-in: a Miniflare state file keeps whatever mode wrangler gave it.
+        self.path = path
+        self.name = 'sqlite'
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        if wal:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+
+    def query(self, sql, row_cls=None, params=()):
+        try:
+            for row in self.conn.execute(sql, params):
+                row = dict(row)
+                yield row if row_cls is None else _make_row(row_cls, row)
+        except sqlite3.Error as e:
+            raise D1Error(f"{self.path}: {e}") from e
+
+    def execute_script(self, sql):
+        """Run *sql* as one transaction, like D1 runs a --file, so a failing statement undoes the rest."""
+        try:
+            # executescript() commits any pending transaction and then
+            # autocommits statement by statement unless the script opens its own.
+            self.conn.executescript(f"BEGIN;\n{sql}\n;COMMIT;")
+        except sqlite3.Error as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            raise D1Error(f"{self.path}: {e}") from e
+
+    def insert_many(self, table, columns, records, verb='INSERT OR REPLACE', suffix='', trailing_sql=None):
+        """executemany() the records, then the single *trailing_sql* statement, in one transaction."""
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders}){suffix}"
+        try:
+            with self.conn:
+                self.conn.executemany(sql, records)
+                if trailing_sql:
+                    self.conn.execute(trailing_sql)
+        except sqlite3.Error as e:
+            raise D1Error(f"{self.path}: {e}") from e
+
+    def close(self):
+        self.conn.close()
+
+
+def find_local_sqlite(database=DEFAULT_DATABASE):
+    """Return the Miniflare SQLite file backing *database*, or None if there is none yet."""
+    probe = PROBE_TABLES.get(database)
+    for state_dir in LOCAL_STATE_DIRS:
+        for path in sorted(glob(os.path.join(state_dir, 'miniflare-D1DatabaseObject', '*.sqlite'))):
+            if probe is None:
+                return path
+            # immutable=1: a read-only probe must not leave -wal/-shm files behind.
+            conn = sqlite3.connect(f"file:{path}?immutable=1", uri=True)
+            try:
+                found = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (probe,)
+                ).fetchone()
+            except sqlite3.Error:
+                found = None
+            finally:
+                conn.close()
+            if found:
+                return path
+    return None
+
+
+def build_sqlite_from_migrations(database=DEFAULT_DATABASE, path=None):
+    """Create a SQLite file (a temp file unless *path* is given) by applying the binding's migrations."""
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=f'{database.lower()}_', suffix='.sqlite')
+        os.close(fd)
+    conn = sqlite3.connect(path)
+    try:
+        for migration in sorted(glob(os.path.join(MIGRATIONS_DIRS[database], '*.sql'))):
+            with open(migration, 'r', encoding='utf-8') as f:
+                conn.executescript(f.read())
+        conn.commit()
+    except sqlite3.Error as e:
+        raise D1Error(f"{migration}: {e}") from e
+    finally:
+        conn.close()
+    return path
+
+
+def get_backend(kind='local', database=DEFAULT_DATABASE, sqlite_path=None):
+    """
+    Return a backend for *database*: "remote", "local" (both via wrangler) or "sqlite".
+
+    The sqlite backend uses, in order: *sqlite_path*, $D1_SQLITE_PATH, the
+    Miniflare state file for the binding, or a fresh DB built from migrations.
+    """
+    if kind in ('remote', 'local'):
+        return WranglerBackend(database, remote=(kind == 'remote'))
+    if kind != 'sqlite':
+        raise ValueError(f"Unknown D1 backend {kind!r} (expected one of {', '.join(BACKENDS)})")
+    path = sqlite_path or os.environ.get('D1_SQLITE_PATH') or find_local_sqlite(database)
+    if path is None:
+        path = build_sqlite_from_migrations(database)
+    return SqliteBackend(path)
+
+
+def add_backend_arguments(parser, default='local'):
+    parser.add_argument('--backend', choices=BACKENDS, default=os.environ.get('D1_BACKEND', default),
+                        help=f'Where to run SQL (default: $D1_BACKEND or {default})')
+    parser.add_argument('--sqlite', dest='sqlite_path',
+                        help='SQLite file for --backend sqlite (default: Miniflare state or a DB built from migrations)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stream D1 query results as JSON lines.")
+    parser.add_argument('--database', default=DEFAULT_DATABASE)
+    add_backend_arguments(parser)
+    sub = parser.add_subparsers(dest='command', required=True)
+    q = sub.add_parser('query', help='Run a SQL query')
+    q.add_argument('sql')
+    e = sub.add_parser('export', help='Export a whole table')
+    e.add_argument('table')
+    args = parser.parse_args()
+
+    backend = get_backend(args.backend, args.database, args.sqlite_path)
+    try:
+        if args.command == 'query':
+            rows = backend.query(args.sql)
+        else:
+            columns = tuple(row['name'] for row in backend.query(f"PRAGMA table_info({args.table});"))
+            cls = row_type(args.table, columns)
+            rows = (dataclasses.asdict(r) for r in backend.query(f"SELECT {', '.join(columns)} FROM {args.table};", row_cls=cls))
+        for row in rows:
+            sys.stdout.write(json.dumps(row) + '\n')
+    except D1Error as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        backend.close()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Bulk-import past event flyers (PDFs) through POST /api/events/create
+
+Takes a directory of PDFs or a CSV manifest and skips any PDF that was
+already uploaded, before sending it:
+
+  • every PDF is SHA-256'd locally in 1 MB chunks; an unchanged file (same
+    size and mtime) reuses its hash from the previous run
+  • hashes already uploaded (or answered 409) are skipped using a local
+    append-only index; --sync-index also primes it from events.pdf_hash in D1
+  • copies of one PDF within the batch are sent once
+  • the rest goes through one requests.Session with a bounded connection
+    pool (--jobs). Only connection errors are retried (with backoff): the
+    request never reached the worker. POST /api/events/create does not
+    dedupe by content, so a POST that timed out or got a 5xx is not
+    replayed. It may have created the event, and a replay would create a
+    second one.
+
+The local index is the record that matters: handleCreateEvent does not store
+pdf_hash yet, so --sync-index only finds hashes once the worker does.
+
+Manifest columns: file (path, relative to the manifest), name, date,
+location, and optionally lat, lng, sponsor, contactEmail, contactPhone and
+description. For a directory, name comes from the file name, date from a
+YYYY-MM-DD in it (else the file's mtime) and location from --location.
+
+Usage:
+    python import_events.py flyers/ --location "Casper, WY" --user-id 1
+    python import_events.py backfill.csv --url https://this-is-us.org/api/events/create --jobs 8
+    python import_events.py backfill.csv --dry-run
+    python import_events.py backfill.csv --sync-index --backend remote
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date
+
+from d1_client import D1Error, WORKER_DIR, add_backend_arguments, get_backend
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:  # only needed once something is actually uploaded
+    requests = None
+
+DATA_DIR = os.path.join(os.path.dirname(WORKER_DIR), 'data')
+DEFAULT_URL = os.environ.get('EVENTS_CREATE_URL', 'http://127.0.0.1:8787/api/events/create')
+DEFAULT_INDEX = os.path.join(DATA_DIR, '.event_upload_index.jsonl')
+HASH_CHUNK = 1024 * 1024
+RE_DATE = re.compile(r'(\d{4})[-_](\d{2})[-_](\d{2})')
+OPTIONAL_FIELDS = ('lat', 'lng', 'sponsor', 'contactEmail', 'contactPhone', 'description')
+
+
+@dataclass
+class Flyer:
+    path: str
+    fields: dict
+    size: int = 0
+    sha256: str = ''
+    duplicates: list = field(default_factory=list)  # other paths with the same bytes
+
+
+def sha256_file(path, chunk_size=HASH_CHUNK):
+    """Stream *path* through SHA-256 with one reusable buffer."""
+    digest = hashlib.sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while n := f.readinto(buf):
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class UploadIndex:
+    """
+    Append-only JSONL of what previous runs learned:
+      {"kind": "hash", "path", "size", "mtime_ns", "sha256"}   – skip re-hashing unchanged files
+      {"kind": "upload", "sha256", "status", "id", "path", "at"} – skip re-sending known PDFs
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hashes = {}
+        self.uploaded = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    record = json.loads(line)
+                    if record.get('kind') == 'hash':
+                        self.hashes[record['path']] = (record['size'], record['mtime_ns'], record['sha256'])
+                    elif record.get('kind') == 'upload':
+                        self.uploaded[record['sha256']] = record
+
+    def _append(self, records):
+        if not self.path or not records:
+            return
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(r) + '\n' for r in records)
+
+    def cached_hash(self, path, st):
+        cached = self.hashes.get(os.path.abspath(path))
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        return None
+
+    def remember_hashes(self, entries):
+        """entries: [(path, stat_result, sha256)] hashed in this run."""
+        records = [{'kind': 'hash', 'path': os.path.abspath(p), 'size': st.st_size,
+                    'mtime_ns': st.st_mtime_ns, 'sha256': sha} for p, st, sha in entries]
+        for r in records:
+            self.hashes[r['path']] = (r['size'], r['mtime_ns'], r['sha256'])
+        self._append(records)
+
+    def mark_uploaded(self, sha256, status, event_id=None, path=None):
+        record = {'kind': 'upload', 'sha256': sha256, 'status': status, 'id': event_id,
+                  'path': path, 'at': time.time()}
+        self.uploaded[sha256] = record
+        self._append([record])
+
+
+def read_manifest(path):
+    """Flyers from a CSV manifest; file paths are relative to the manifest."""
+    base = os.path.dirname(os.path.abspath(path))
+    flyers = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for line_no, row in enumerate(csv.DictReader(f), 2):
+            pdf = (row.get('file') or row.get('pdf') or '').strip()
+            if not pdf:
+                print(f"⚠️  {path}:{line_no}: no file column, skipped")
+                continue
+            fields = {k: (row.get(k) or '').strip() for k in ('name', 'date', 'location') + OPTIONAL_FIELDS}
+            flyers.append(Flyer(os.path.join(base, pdf), {k: v for k, v in fields.items() if v}))
+    return flyers
+
+
+def read_directory(path, location):
+    """Flyers for every *.pdf under *path*, with metadata from the file names."""
+    flyers = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith('.pdf'):
+                continue
+            full = os.path.join(root, name)
+            stem = os.path.splitext(name)[0]
+            m = RE_DATE.search(stem)
+            when = '-'.join(m.groups()) if m else date.fromtimestamp(os.stat(full).st_mtime).isoformat()
+            title = re.sub(r'[_-]+', ' ', RE_DATE.sub('', stem)).strip() or stem
+            flyers.append(Flyer(full, {'name': title, 'date': when, 'location': location}))
+    return flyers
+
+
+def hash_flyers(flyers, index, jobs):
+    """Fill in size/sha256 (threads overlap the I/O; hashlib releases the GIL). Returns #hashed."""
+    todo = []
+    for flyer in flyers:
+        st = os.stat(flyer.path)
+        flyer.size = st.st_size
+        flyer.sha256 = index.cached_hash(flyer.path, st) or ''
+        if not flyer.sha256:
+            todo.append((flyer, st))
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        digests = list(pool.map(lambda item: sha256_file(item[0].path), todo))
+    for (flyer, _), sha in zip(todo, digests):
+        flyer.sha256 = sha
+    index.remember_hashes([(flyer.path, st, flyer.sha256) for flyer, st in todo])
+    return len(todo)
+
+
+def plan_uploads(flyers, index):
+    """Drop PDFs the index already knows and collapse in-batch copies. Returns (pending, known, copies)."""
+    pending, by_hash, known, copies = [], {}, [], 0
+    for flyer in flyers:
+        if flyer.sha256 in index.uploaded:
+            known.append(flyer)
+        elif flyer.sha256 in by_hash:
+            by_hash[flyer.sha256].duplicates.append(flyer.path)
+            copies += 1
+        else:
+            by_hash[flyer.sha256] = flyer
+            pending.append(flyer)
+    return pending, known, copies
+
+
+def sync_index(index, backend):
+    """Prime the index with every pdf_hash already stored in events."""
+    added = 0
+    for row in backend.query("SELECT id, pdf_hash FROM events WHERE pdf_hash IS NOT NULL AND pdf_hash != ''"):
+        if row['pdf_hash'] not in index.uploaded:
+            index.mark_uploaded(row['pdf_hash'], 'in_db', row['id'])
+            added += 1
+    return added
+
+
+def make_session(jobs, retries, backoff):
+    """
+    One pooled session: at most *jobs* connections. Failed connects are
+    retried with exponential backoff; nothing else is, since the POST is not
+    idempotent (see the module docstring).
+    """
+    retry = Retry(total=retries, connect=retries, read=0, status=0, other=0,
+                  backoff_factor=backoff, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs, pool_block=True, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def upload(session, url, flyer, user_id, timeout):
+    """POST one flyer; returns (status, event_id or None, error or None)."""
+    data = {'userId': user_id, **flyer.fields}
+    try:
+        with open(flyer.path, 'rb') as f:
+            resp = session.post(url, data=data, timeout=timeout,
+                                files={'file': (os.path.basename(flyer.path), f, 'application/pdf')})
+    except requests.RequestException as e:
+        return None, None, str(e)
+    try:
+        body = resp.json()
+    except ValueError:
+        body = {}
+    if resp.status_code == 201:
+        return 201, body.get('id'), None
+    if resp.status_code == 409:
+        return 409, None, None
+    return resp.status_code, None, body.get('error') or resp.text[:200]
+
+
+def import_flyers(pending, index, url, user_id, jobs=4, retries=3, backoff=1.0, timeout=60):
+    """Upload *pending* concurrently; returns counts by outcome."""
+    counts = {'created': 0, 'duplicate': 0, 'failed': 0, 'bytes_sent': 0}
+    session = make_session(jobs, retries, backoff)
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(upload, session, url, flyer, user_id, timeout): flyer for flyer in pending}
+            for i, future in enumerate(as_completed(futures), 1):
+                flyer = futures[future]
+                status, event_id, error = future.result()
+                name = os.path.basename(flyer.path)
+                if status in (201, 409):
+                    outcome = 'created' if status == 201 else 'duplicate'
+                    counts[outcome] += 1
+                    counts['bytes_sent'] += flyer.size
+                    index.mark_uploaded(flyer.sha256, outcome, event_id, flyer.path)
+                    print(f"  ✓ {i}/{len(pending)} {name} → {outcome}{f' (id {event_id})' if event_id else ''}")
+                else:
+                    counts['failed'] += 1
+                    print(f"❌ {i}/{len(pending)} {name} → {status or 'error'}: {error}")
+                    if status == 401:
+                        print("   The worker wants a userId: pass --user-id (or set EVENTS_IMPORT_USER_ID).")
+    finally:
+        session.close()
+    return counts
+
+
+def human_mb(n):
+    return f"{n / 1e6:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import event flyers with client-side duplicate detection.")
+    parser.add_argument('source', help='Directory of PDFs or a CSV manifest')
+    parser.add_argument('--url', default=DEFAULT_URL, help=f'Create endpoint (default: $EVENTS_CREATE_URL or {DEFAULT_URL})')
+    parser.add_argument('--user-id', default=os.environ.get('EVENTS_IMPORT_USER_ID'),
+                        help='userId sent with every event (default: $EVENTS_IMPORT_USER_ID)')
+    parser.add_argument('--location', default='Wyoming', help='Location for directory imports (default: Wyoming)')
+    parser.add_argument('--jobs', type=int, default=4, help='Concurrent uploads / pooled connections')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per upload on connection errors')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds per upload attempt')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='Local hash index of prior uploads')
+    parser.add_argument('--sync-index', action='store_true', help='Prime the index from events.pdf_hash in D1 first')
+    add_backend_arguments(parser)
+    parser.add_argument('--dry-run', action='store_true', help='Hash and plan only; upload nothing')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if os.path.isdir(args.source):
+        flyers = read_directory(args.source, args.location)
+    elif os.path.isfile(args.source):
+        flyers = read_manifest(args.source)
+    else:
+        print(f"❌ {args.source} is neither a directory nor a manifest")
+        return 1
+    missing = [f.path for f in flyers if not os.path.isfile(f.path)]
+    for path in missing:
+        print(f"⚠️  Missing PDF: {path}")
+    flyers = [f for f in flyers if os.path.isfile(f.path)]
+    incomplete = [f.path for f in flyers if not all(f.fields.get(k) for k in ('name', 'date', 'location'))]
+    if incomplete:
+        print(f"❌ {len(incomplete)} flyer(s) lack name/date/location, e.g. {incomplete[0]}")
+        return 1
+
+    index = UploadIndex(args.index)
+    if args.sync_index:
+        backend = get_backend(args.backend, 'EVENTS_DB', args.sqlite_path)
+        try:
+            print(f"🔄 {sync_index(index, backend)} hash(es) added to the index from D1")
+        except D1Error as e:
+            print(f"❌ Could not read events.pdf_hash: {e}")
+            return 1
+        finally:
+            backend.close()
+
+    hashed = hash_flyers(flyers, index, args.jobs)
+    pending, known, copies = plan_uploads(flyers, index)
+    total_bytes = sum(f.size for f in flyers)
+    pending_bytes = sum(f.size for f in pending)
+    print(f"📄 {len(flyers)} PDF(s), {human_mb(total_bytes)}: {hashed} hashed, {len(flyers) - hashed} from cache")
+    print(f"   {len(known)} already uploaded, {copies} in-batch copies, {len(pending)} to send "
+          f"({human_mb(pending_bytes)}; {human_mb(total_bytes - pending_bytes)} not re-sent)")
+    if args.dry_run or not pending:
+        return 0
+
+    if requests is None:
+        print("❌ pip install requests to upload")
+        return 1
+    if not args.user_id:
+        print("❌ The worker requires a userId: pass --user-id or set EVENTS_IMPORT_USER_ID")
+        return 1
+    counts = import_flyers(pending, index, args.url, args.user_id, jobs=max(1, args.jobs),
+                           retries=args.retries, timeout=args.timeout)
+
+    elapsed = time.perf_counter() - started
+    print(f"{'❌' if counts['failed'] else '✅'} {counts['created']} created, {counts['duplicate']} duplicate(s), "
+          f"{counts['failed']} failed in {elapsed:.1f}s ({human_mb(counts['bytes_sent'])} sent)")
+    if counts['failed']:
+        print("   Re-run the same command to retry only the failed uploads; after a timeout or 5xx,")
+        print("   check the events table first, since the event may have been created.")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Import geocoded voter coordinates from data/*.csv into voters_addr_norm
+
+Streams every geocode CSV, keeps one coordinate per voter_id (a Census hit
+beats a Nominatim fallback, which beats a city centroid, which beats a state
+centroid), and writes chunked UPDATE ... FROM (VALUES ...) batches. Chunks run
+concurrently through a bounded, rate-limited worker pool with retries; each
+finished chunk is appended to a checkpoint file so an interrupted import
+resumes where it stopped. Checkpoint entries record the database they were
+written to (backend plus D1 database name or SQLite path), so a checkpoint
+left by a local run does not make a later remote run skip its chunks.
+
+Usage:
+    python import_geocodes.py                          # all data/voters_addr_*geocoded*.csv, local
+    python import_geocodes.py --backend remote --jobs 4 --max-rate 2
+    python import_geocodes.py --sql-out /tmp/geocodes.sql --dry-run
+    python import_geocodes.py data/voters_addr_norm_geocoded_final.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from glob import glob
+
+from d1_client import D1Error, WORKER_DIR, add_backend_arguments, get_backend, sql_literal
+
+DATA_DIR = os.path.join(os.path.dirname(WORKER_DIR), 'data')
+DEFAULT_GLOB = os.path.join(DATA_DIR, 'voters_addr_*geocoded*.csv')
+DEFAULT_CHECKPOINT = os.path.join(DATA_DIR, '.geocode_import_checkpoint.jsonl')
+
+# Lower wins. The geocoder writes the same provider under a few names
+# ("OK" status rows are Census matches, fallbacks carry a FALLBACK_ prefix).
+SOURCE_PRIORITY = {
+    'CENSUS': 0,
+    'NOMINATIM': 1,
+    'CITY_CENTROID': 2,
+    'STATE_CENTROID': 3,
+}
+UNKNOWN_PRIORITY = 9
+SOURCE_ALIASES = {'OK': 'CENSUS'}
+
+# ~60 bytes per row keeps a 500-row chunk far below D1's 100 KB statement cap.
+DEFAULT_CHUNK_ROWS = 500
+
+
+def normalize_source(raw):
+    source = (raw or '').strip().upper()
+    source = SOURCE_ALIASES.get(source, source)
+    if source.startswith('FALLBACK_'):
+        source = source[len('FALLBACK_'):]
+    return source
+
+
+def iter_geocodes(path):
+    """Yield (voter_id, lat, lng, source) for every row of *path* that has coordinates."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            voter_id = (row.get('voter_id') or '').strip()
+            lat, lng = (row.get('lat') or '').strip(), (row.get('lng') or '').strip()
+            if not voter_id or not lat or not lng:
+                continue  # NO_MATCH rows carry no coordinates
+            try:
+                lat, lng = float(lat), float(lng)
+            except ValueError:
+                continue
+            source = row.get('geocode_source') or row.get('source') or row.get('status')
+            yield voter_id, lat, lng, normalize_source(source)
+
+
+def merge_geocodes(paths):
+    """
+    De-duplicate by voter_id across *paths*, keeping the highest-priority source.
+    Ties keep the first file (in the order given) that supplied the voter.
+    """
+    best = {}
+    seen = 0
+    for path in paths:
+        for voter_id, lat, lng, source in iter_geocodes(path):
+            seen += 1
+            priority = SOURCE_PRIORITY.get(source, UNKNOWN_PRIORITY)
+            current = best.get(voter_id)
+            if current is None or priority < current[0]:
+                best[voter_id] = (priority, lat, lng, source)
+    return best, seen
+
+
+def build_chunks(best, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Turn the merged geocodes into [(chunk_id, row_count, sql)] in voter_id order.
+    chunk_id is a content hash, so a checkpoint stays valid across runs as
+    long as the chunk's rows are unchanged.
+    """
+    ids = sorted(best)
+    chunks = []
+    for start in range(0, len(ids), chunk_rows):
+        batch = ids[start:start + chunk_rows]
+        values = ',\n'.join(
+            f"({sql_literal(v)}, {best[v][1]!r}, {best[v][2]!r})" for v in batch
+        )
+        sql = (
+            "UPDATE voters_addr_norm SET lat = v.column2, lng = v.column3\n"
+            f"FROM (VALUES\n{values}\n) AS v\n"
+            "WHERE voters_addr_norm.voter_id = v.column1;\n"
+        )
+        chunk_id = hashlib.sha256(sql.encode('utf-8')).hexdigest()[:16]
+        chunks.append((chunk_id, len(batch), sql))
+    return chunks
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads (no-op if rate is falsy)."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def backend_target(backend):
+    """The database *backend* writes to, e.g. "remote:wy" or "sqlite:/abs/path.sqlite"."""
+    if backend.name == 'sqlite':
+        return f"sqlite:{os.path.abspath(backend.path)}"
+    return f"{backend.name}:{backend.database}"
+
+
+class Checkpoint:
+    """Append-only JSONL record of finished chunk ids, scoped to one target database."""
+
+    def __init__(self, path, target):
+        self.path = path
+        self.target = target
+        self.lock = threading.Lock()
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = json.loads(line)
+                    # Entries for another database (or from before targets were recorded) don't count
+                    if entry.get('target') == target:
+                        self.done.add(entry['chunk'])
+
+    def mark(self, chunk_id, rows):
+        with self.lock:
+            self.done.add(chunk_id)
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'chunk': chunk_id, 'target': self.target,
+                                        'rows': rows, 'at': time.time()}) + '\n')
+
+
+def run_chunk(backend, chunk, limiter, retries, backoff):
+    """Execute one chunk, retrying with exponential backoff; returns attempts used."""
+    chunk_id, _, sql = chunk
+    for attempt in range(1, retries + 2):
+        limiter.wait()
+        try:
+            backend.execute_script(sql)
+            return attempt
+        except D1Error as e:
+            if attempt > retries:
+                raise D1Error(f"chunk {chunk_id} failed after {attempt} attempt(s): {e}") from e
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def import_chunks(backend, chunks, checkpoint, jobs=4, max_rate=None, retries=3, backoff=1.0):
+    """Run every chunk not yet in *checkpoint*; returns (rows_sent, failed_chunk_ids)."""
+    pending = [c for c in chunks if c[0] not in checkpoint.done]
+    skipped = len(chunks) - len(pending)
+    if skipped:
+        print(f"↪ Resuming: {skipped} chunk(s) already in checkpoint for {checkpoint.target}")
+    jobs = max(1, jobs)
+    if backend.name == 'sqlite':
+        # One sqlite3 connection cannot be shared across threads, and SQLite
+        # serialises writers anyway.
+        jobs = 1
+
+    limiter = RateLimiter(max_rate)
+
+    def attempt(chunk):
+        try:
+            run_chunk(backend, chunk, limiter, retries, backoff)
+            return chunk, None
+        except D1Error as e:
+            return chunk, e
+
+    rows_sent, failed = 0, []
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        if jobs > 1:
+            results = (f.result() for f in as_completed([pool.submit(attempt, c) for c in pending]))
+        else:
+            results = map(attempt, pending)  # stay on this thread
+        for i, (chunk, error) in enumerate(results, 1):
+            chunk_id, rows, _ = chunk
+            if error:
+                print(f"❌ {error}")
+                failed.append(chunk_id)
+                continue
+            checkpoint.mark(chunk_id, rows)
+            rows_sent += rows
+            print(f"  ✓ chunk {i}/{len(pending)} ({rows} rows)")
+    return rows_sent, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import geocoded voter coordinates into voters_addr_norm.")
+    parser.add_argument('csv', nargs='*', help=f'Geocode CSVs (default: {DEFAULT_GLOB})')
+    add_backend_arguments(parser)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows per UPDATE batch')
+    parser.add_argument('--jobs', type=int, default=4, help='Concurrent chunks (wrangler backends only)')
+    parser.add_argument('--max-rate', type=float, help='Max chunk starts per second across all workers')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per chunk before giving up')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Checkpoint file for resuming')
+    parser.add_argument('--restart', action='store_true', help='Ignore and replace an existing checkpoint')
+    parser.add_argument('--sql-out', help='Also write every chunk to this SQL file')
+    parser.add_argument('--dry-run', action='store_true', help='Build chunks only; do not touch the database')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = args.csv or sorted(glob(DEFAULT_GLOB))
+    if not paths:
+        print(f"❌ No geocode CSVs found ({DEFAULT_GLOB})")
+        return 1
+
+    best, seen = merge_geocodes(paths)
+    by_source = {}
+    for _, _, _, source in best.values():
+        by_source[source] = by_source.get(source, 0) + 1
+    print(f"📄 {len(paths)} file(s), {seen} geocoded row(s) → {len(best)} unique voter(s)")
+    for source, n in sorted(by_source.items(), key=lambda kv: SOURCE_PRIORITY.get(kv[0], UNKNOWN_PRIORITY)):
+        print(f"   {source}: {n}")
+
+    chunks = build_chunks(best, args.chunk_rows)
+    if args.sql_out:
+        with open(args.sql_out, 'w', encoding='utf-8') as f:
+            f.write(''.join(sql for _, _, sql in chunks))
+        print(f"📝 Wrote {len(chunks)} chunk(s) to {args.sql_out}")
+    if args.dry_run:
+        return 0
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.unlink(args.checkpoint)
+    backend = get_backend(args.backend, sqlite_path=args.sqlite_path)
+    checkpoint = Checkpoint(args.checkpoint, backend_target(backend))
+    try:
+        rows, failed = import_chunks(backend, chunks, checkpoint, jobs=args.jobs,
+                                     max_rate=args.max_rate, retries=args.retries)
+    finally:
+        backend.close()
+
+    elapsed = time.perf_counter() - started
+    # The count is rows sent: an UPDATE silently skips voter_ids missing from voters_addr_norm.
+    print(f"{'❌' if failed else '✅'} Sent {rows} voter coordinate(s) in {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed else 0:.0f} rows/s), {len(failed)} chunk(s) failed")
+    if failed:
+        print("   Re-run the same command to retry only the failed chunks.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
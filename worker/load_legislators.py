@@ -1,13 +1,100 @@
 #!/usr/bin/env python3
 """
 Load Wyoming legislature CSV into local wy_legislators table
+
+Usage:
+    python load_legislators.py            # one wrangler call per row (legacy)
+    python load_legislators.py --bulk     # one multi-row SQL file, one wrangler call
+    python load_legislators.py --bulk --remote
+    python load_legislators.py --bulk --backend sqlite   # straight into the Miniflare SQLite file
+    python load_legislators.py --bulk --sql-out /tmp/legislators.sql --dry-run
 """
 
+import argparse
 import csv
+import os
 import subprocess
 import sys
+import time
+
+from d1_client import (
+    LEGISLATOR_COLUMNS, WORKER_DIR, D1Error, add_backend_arguments, build_insert_statements,
+    get_backend,
+)
+
+csv_file = os.path.join(WORKER_DIR, 'wy_legislature_12-1-25.csv.csv')
+
+COLUMNS = LEGISLATOR_COLUMNS
+
+
+def csv_row_to_record(row):
+    """Map a CSV row to a tuple ordered like COLUMNS (empty cells become NULL)."""
+    def text(*keys):
+        for key in keys:
+            value = (row.get(key) or '').strip()
+            if value:
+                return value
+        return None
+
+    voter_id = text('voter_id')
+    district = text('District')
+    return (
+        int(voter_id) if voter_id else None,
+        text('Name') or '',
+        text('Chamber') or '',
+        int(district) if district and district.isdigit() else None,
+        text('City'),
+        text('County'),
+        text('Party'),
+        text('Affiliations'),
+        # The source sheet has shipped with a stray space in this header.
+        text('Cam paign_Website', 'Campaign_Website'),
+        text('Official_Profile_URL'),
+        text('Phone'),
+        text('Email'),
+        text('updated'),
+    )
+
+
+def read_records(path=csv_file):
+    """Read the legislature CSV into COLUMNS-ordered tuples, skipping rows without an id."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [rec for rec in map(csv_row_to_record, csv.DictReader(f)) if rec[0] is not None]
+
+
+def bulk_load(path=csv_file, backend=None, sql_out=None, dry_run=False):
+    """
+    Load every CSV row in one batch through *backend* (wrangler-local by default).
+
+    Over wrangler this is a single `d1 execute --file` call; D1 runs the
+    statements of a --file import as one batch, so the load is all-or-nothing
+    and explicit BEGIN/COMMIT (which D1 rejects) is not emitted. The sqlite
+    backend executemany()s the rows inside one transaction instead.
+    """
+    started = time.perf_counter()
+    backend = backend or get_backend('local')
+    records = read_records(path)
+    statements = build_insert_statements(records, 'wy_legislators', COLUMNS)
+
+    if sql_out:
+        with open(sql_out, 'w', encoding='utf-8') as f:
+            f.write(''.join(statements))
+        print(f"📝 Wrote {len(records)} rows in {len(statements)} statement(s) to {sql_out}")
+    if dry_run:
+        return True
+
+    try:
+        backend.insert_many('wy_legislators', COLUMNS, records)
+    except D1Error as e:
+        print(f"❌ Bulk load failed: {e}")
+        return False
+
+    elapsed = time.perf_counter() - started
+    rate = len(records) / elapsed if elapsed else float('inf')
+    print(f"✅ Loaded {len(records)} legislators via {backend.name} backend in one batch, "
+          f"{elapsed:.2f}s ({rate:.1f} rows/s)")
+    return True
 
-csv_file = '/home/anchor/projects/this-is-us/worker/wy_legislature_12-1-25.csv.csv'
 
 def load_csv_and_insert():
     try:
@@ -29,30 +116,48 @@ def load_csv_and_insert():
                 phone = row.get('Phone', '').replace('"', '""')
                 email = row.get('Email', '').replace('"', '""')
                 updated = row.get('updated', '').replace('"', '""')
-                
+
                 # Build INSERT statement
-                insert_sql = f'''INSERT INTO wy_legislators (voter_id, name, chamber, district, city, county, party, affiliations, campaign_website, official_profile_url, phone, email, updated) 
+                insert_sql = f'''INSERT INTO wy_legislators (voter_id, name, chamber, district, city, county, party, affiliations, campaign_website, official_profile_url, phone, email, updated)
 VALUES ({voter_id}, "{name}", "{chamber}", {district}, "{city}", "{county}", "{party}", "{affiliations}", "{campaign_website}", "{official_profile_url}", "{phone}", "{email}", "{updated}");'''
-                
+
                 # Execute insert
                 cmd = ['./scripts/wr', 'd1', 'execute', 'WY_DB', '--local', '--command', insert_sql]
-                result = subprocess.run(cmd, capture_output=True, text=True, cwd='/home/anchor/projects/this-is-us/worker')
-                
+                result = subprocess.run(cmd, capture_output=True, text=True, cwd=WORKER_DIR)
+
                 if result.returncode != 0:
                     print(f"Error inserting row: {result.stderr}")
                     continue
-                
+
                 count += 1
                 if count % 20 == 0:
                     print(f"✓ Inserted {count} legislators...")
-        
+
         print(f"✅ Successfully loaded {count} legislators from CSV")
         return True
-        
+
     except Exception as e:
         print(f"❌ Error: {e}")
         return False
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load the legislature CSV into wy_legislators.")
+    parser.add_argument('--csv', default=csv_file, help='Legislature CSV to load')
+    parser.add_argument('--bulk', action='store_true', help='Send all rows as one SQL file in a single wrangler call')
+    parser.add_argument('--remote', action='store_true', help='Shorthand for --backend remote (bulk mode only)')
+    add_backend_arguments(parser)
+    parser.add_argument('--sql-out', help='Also write the generated SQL to this path')
+    parser.add_argument('--dry-run', action='store_true', help='Generate SQL only; do not call wrangler')
+    args = parser.parse_args()
+
     print("Loading Wyoming legislature CSV into local database...")
-    load_csv_and_insert()
+    if args.bulk:
+        backend = get_backend('remote' if args.remote else args.backend, sqlite_path=args.sqlite_path)
+        try:
+            ok = bulk_load(args.csv, backend=backend, sql_out=args.sql_out, dry_run=args.dry_run)
+        finally:
+            backend.close()
+    else:
+        csv_file = args.csv
+        ok = load_csv_and_insert()
+    sys.exit(0 if ok else 1)
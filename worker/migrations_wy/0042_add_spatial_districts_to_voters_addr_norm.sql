@@ -0,0 +1,13 @@
+-- Migration: 0042_add_spatial_districts_to_voters_addr_norm
+-- Purpose: Store house/senate districts derived from each voter's lat/lng and
+--          the district boundary polygons, next to the voter-file house/senate text
+-- Status: Add as NULL; populated offline by worker/assign_districts.py.
+--         The delegation lookup prefers these columns when they are set.
+-- Deploy:  Apply this migration BEFORE deploying the worker that reads it.
+--          src/routes/civic/delegation.mjs selects house_geo/senate_geo, and on
+--          a D1 without them that query fails with "no such column":
+--            ./scripts/wr d1 migrations apply WY_DB --remote
+--          then deploy the worker. assign_districts.py can run any time after.
+
+ALTER TABLE voters_addr_norm ADD COLUMN house_geo TEXT;
+ALTER TABLE voters_addr_norm ADD COLUMN senate_geo TEXT;
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Offline address normalizer over streets_index and wy_city_county
+
+Loads the two lookup tables once (through any d1_client backend, or from a
+pickled --index-cache) into in-memory indexes:
+
+  • cities  – city name → wy_city_county.id, with the same typo fallback
+  • streets – (city_county_id, street_core) → streets_index rows (dict), plus
+              a per-city symmetric-delete index so a street_core one or two
+              edits away ("STEEL" for "STEELE") still resolves
+
+then streams address CSVs (voter_id, addr1, city, state, zip) in batches
+across a process pool. Voter files repeat the same street thousands of times,
+so each batch is reduced to its distinct (city, street) keys, those are
+parsed and matched once, and the results are mapped back onto the rows.
+Every worker receives the indexes once, at start-up.
+
+Output keeps the input columns and adds house_number, unit, street_prefix,
+street_core, street_type, street_suffix, street_canonical, city_county_id,
+street_index_id and match (exact | typo | ambiguous | city_only | no_city), row
+order preserved. "ambiguous" means several streets_index rows fit equally
+well (e.g. N and S 9TH ST for a bare "9TH ST"); street_index_id is left blank.
+
+Usage:
+    python normalize_addresses.py ../data/test_batch_real.csv -o /tmp/normalized.csv
+    python normalize_addresses.py ../data/voters_addr_norm_to_geocode.csv --backend remote --jobs 8
+    python normalize_addresses.py voters.csv --index-cache /tmp/wy_streets.pickle --refresh-index
+"""
+
+import argparse
+import csv
+import os
+import pickle
+import re
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from d1_client import D1Error, add_backend_arguments, get_backend
+
+DEFAULT_BATCH_ROWS = 5000
+MATCH_COLUMNS = ('house_number', 'unit', 'street_prefix', 'street_core', 'street_type', 'street_suffix',
+                 'street_canonical', 'city_county_id', 'street_index_id', 'match')
+
+DIRECTIONALS = {
+    'N': 'N', 'S': 'S', 'E': 'E', 'W': 'W', 'NE': 'NE', 'NW': 'NW', 'SE': 'SE', 'SW': 'SW',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+}
+STREET_TYPES = {
+    'ST': 'ST', 'STREET': 'ST', 'STR': 'ST', 'AVE': 'AVE', 'AV': 'AVE', 'AVENUE': 'AVE',
+    'RD': 'RD', 'ROAD': 'RD', 'DR': 'DR', 'DRIVE': 'DR', 'LN': 'LN', 'LANE': 'LN',
+    'CT': 'CT', 'COURT': 'CT', 'CIR': 'CIR', 'CIRCLE': 'CIR', 'BLVD': 'BLVD', 'BOULEVARD': 'BLVD',
+    'PL': 'PL', 'PLACE': 'PL', 'HWY': 'HWY', 'HIGHWAY': 'HWY', 'TRL': 'TRL', 'TRAIL': 'TRL',
+    'PKWY': 'PKWY', 'PARKWAY': 'PKWY', 'TER': 'TER', 'TERRACE': 'TER', 'WAY': 'WAY',
+    'LOOP': 'LOOP', 'SQ': 'SQ', 'SQUARE': 'SQ', 'ALY': 'ALY', 'ALLEY': 'ALY', 'XING': 'XING',
+    'CRK': 'CRK', 'CREEK': 'CRK', 'PT': 'PT', 'POINT': 'PT', 'RUN': 'RUN', 'ROW': 'ROW',
+}
+UNIT_WORDS = {'APT', 'APARTMENT', 'UNIT', 'STE', 'SUITE', 'LOT', 'TRLR', 'SPC', 'SPACE', 'RM', 'ROOM', 'BLDG', '#'}
+ORDINALS = {
+    'FIRST': '1ST', 'SECOND': '2ND', 'THIRD': '3RD', 'FOURTH': '4TH', 'FIFTH': '5TH',
+    'SIXTH': '6TH', 'SEVENTH': '7TH', 'EIGHTH': '8TH', 'NINTH': '9TH', 'TENTH': '10TH',
+}
+RE_HOUSE_NUMBER = re.compile(r'^(\d+[A-Z]?(?:-\d+)?|\d*1/2)$')
+RE_CLEAN = re.compile(r'[^A-Z0-9/#\s-]')
+
+
+def clean(text):
+    return ' '.join(RE_CLEAN.sub(' ', (text or '').upper()).split())
+
+
+def parse_street(addr1):
+    """
+    'S 9TH ST APT 4' → {house_number, unit, street_prefix, street_core, street_type, street_suffix}.
+    The core is what streets_index.street_core holds: the name without
+    directionals, type or unit.
+    """
+    tokens = clean(addr1).replace('#', ' # ').split()
+    parsed = {'house_number': '', 'unit': '', 'street_prefix': '', 'street_core': '',
+              'street_type': '', 'street_suffix': ''}
+    while tokens and RE_HOUSE_NUMBER.match(tokens[0]):
+        parsed['house_number'] = ' '.join(filter(None, (parsed['house_number'], tokens.pop(0))))
+    for i, token in enumerate(tokens):
+        if token in UNIT_WORDS and i > 0:
+            parsed['unit'] = ' '.join(tokens[i:])
+            tokens = tokens[:i]
+            break
+    if len(tokens) > 1 and tokens[0] in DIRECTIONALS:
+        parsed['street_prefix'] = DIRECTIONALS[tokens.pop(0)]
+    if len(tokens) > 1 and tokens[-1] in DIRECTIONALS:
+        parsed['street_suffix'] = DIRECTIONALS[tokens.pop()]
+    if len(tokens) > 1 and tokens[-1] in STREET_TYPES:
+        parsed['street_type'] = STREET_TYPES[tokens.pop()]
+    parsed['street_core'] = ' '.join(ORDINALS.get(t, t) for t in tokens)
+    return parsed
+
+
+# --- Typo-tolerant lookup (symmetric delete) ---
+
+def deletes(word, max_distance):
+    """Every string reachable from *word* by up to *max_distance* single-character deletions."""
+    found, frontier = {word}, {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein (adjacent transpositions) distance, or limit + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if prev2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def max_typos(word):
+    """Short names get no slack ('ELM' vs 'ELK'), long ones up to two edits."""
+    return 0 if len(word) < 4 else 1 if len(word) < 9 else 2
+
+
+class FuzzySet:
+    """Exact membership plus nearest-word lookup within max_typos() edits."""
+
+    def __init__(self, words):
+        self.words = set(words)
+        self.by_delete = defaultdict(set)
+        for word in self.words:
+            for d in deletes(word, max_typos(word)):
+                self.by_delete[d].add(word)
+
+    def closest(self, word):
+        if word in self.words:
+            return word, 0
+        limit = max_typos(word)
+        if not limit:
+            return None, None
+        candidates = set()
+        for d in deletes(word, limit):
+            candidates |= self.by_delete.get(d, set())
+        best = None
+        for candidate in sorted(candidates):
+            distance = edit_distance(word, candidate, limit)
+            if distance <= min(limit, max_typos(candidate)) and (best is None or distance < best[1]):
+                best = (candidate, distance)
+        return best or (None, None)
+
+
+# --- Indexes ---
+
+class AddressIndex:
+    """wy_city_county and streets_index, keyed for O(1) exact lookups plus typo fallbacks."""
+
+    def __init__(self, cities, streets):
+        self.city_ids = {}
+        for row in cities:
+            for name in (row['city_norm'], row['city'], row['city_raw']):
+                if name:
+                    self.city_ids.setdefault(clean(name), row['id'])
+        self.streets = defaultdict(list)
+        for row in streets:
+            self.streets[(row['city_county_id'], clean(row['street_core']))].append(row)
+        cores = defaultdict(set)
+        for ccid, core in self.streets:
+            cores[ccid].add(core)
+        self.fuzzy_cities = FuzzySet(self.city_ids)
+        self.fuzzy_streets = {ccid: FuzzySet(words) for ccid, words in cores.items()}
+
+    @classmethod
+    def from_backend(cls, backend):
+        cities = list(backend.query("SELECT id, city, city_norm, city_raw FROM wy_city_county;"))
+        streets = list(backend.query(
+            "SELECT id, city_county_id, street_prefix, street_core, street_type, street_suffix, "
+            "street_canonical FROM streets_index;"))
+        return cls(cities, streets)
+
+    def city_id(self, city):
+        city = clean(city)
+        if city in self.city_ids:
+            return self.city_ids[city]
+        match, _ = self.fuzzy_cities.closest(city)
+        return self.city_ids[match] if match else None
+
+    def match(self, city, addr1):
+        """Parsed street plus its streets_index match for one (city, addr1)."""
+        parsed = parse_street(addr1)
+        result = {**parsed, 'street_canonical': '', 'city_county_id': '', 'street_index_id': '', 'match': 'no_city'}
+        ccid = self.city_id(city)
+        if ccid is None:
+            return result
+        result['city_county_id'] = ccid
+        result['match'] = 'city_only'
+        core, kind = parsed['street_core'], 'exact'
+        rows = self.streets.get((ccid, core))
+        if not rows and ccid in self.fuzzy_streets:
+            near, _ = self.fuzzy_streets[ccid].closest(core)
+            if near:
+                rows, core, kind = self.streets[(ccid, near)], near, 'typo'
+        if not rows:
+            return result
+        # Several rows share a core (N vs S 9TH ST): prefer the one agreeing on the most parts,
+        # and refuse to pick when that still leaves a tie ("9TH ST" with no N/S given)
+        scores = [sum((r[k] or '') == parsed[k] for k in ('street_prefix', 'street_type', 'street_suffix'))
+                  for r in rows]
+        top = max(scores)
+        if scores.count(top) > 1:
+            result.update({'street_core': core, 'match': 'ambiguous'})
+            return result
+        best = rows[scores.index(top)]
+        result.update({
+            'street_prefix': best['street_prefix'] or '', 'street_core': core,
+            'street_type': best['street_type'] or '', 'street_suffix': best['street_suffix'] or '',
+            'street_canonical': best['street_canonical'], 'street_index_id': best['id'], 'match': kind,
+        })
+        return result
+
+
+# --- Process pool ---
+
+_index = None
+
+
+def _init_worker(index):
+    global _index
+    _index = index
+
+
+def normalize_batch(rows):
+    """Match each distinct (city, street) in *rows* once, then fan the result back out."""
+    cache = {}
+    out = []
+    for row in rows:
+        city = clean(row.get('city'))
+        parsed = parse_street(row.get('addr1'))
+        key = (city, parsed['street_prefix'], parsed['street_core'], parsed['street_type'], parsed['street_suffix'])
+        if key not in cache:
+            street_only = ' '.join(filter(None, key[1:]))
+            cache[key] = _index.match(city, street_only)
+        matched = {**cache[key], 'house_number': parsed['house_number'], 'unit': parsed['unit']}
+        out.append({**row, **matched})
+    return out, len(cache)
+
+
+def iter_batches(reader, size):
+    while batch := list(islice(reader, size)):
+        yield batch
+
+
+def pool_imap(pool, func, batches, window):
+    """Ordered map over *batches* with at most *window* in flight, so the input is streamed."""
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(func, batch))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def load_index(args):
+    if args.index_cache and os.path.exists(args.index_cache) and not args.refresh_index:
+        with open(args.index_cache, 'rb') as f:
+            return pickle.load(f), 'cache'
+    backend = get_backend(args.backend, sqlite_path=args.sqlite_path)
+    try:
+        index = AddressIndex.from_backend(backend)
+    finally:
+        backend.close()
+    if args.index_cache:
+        with open(args.index_cache, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return index, backend.name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize address CSVs against streets_index / wy_city_county.")
+    parser.add_argument('csv', help='Input CSV with voter_id, addr1, city[, state, zip]')
+    parser.add_argument('-o', '--output', default='-', help='Output CSV (default: stdout)')
+    add_backend_arguments(parser, default='sqlite')
+    parser.add_argument('--index-cache', help='Pickle the loaded indexes here and reuse them on later runs')
+    parser.add_argument('--refresh-index', action='store_true', help='Reload the tables even if --index-cache exists')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Rows per batch sent to a worker')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        index, source = load_index(args)
+    except D1Error as e:
+        print(f"❌ Could not load lookup tables: {e}", file=sys.stderr)
+        return 1
+    n_streets = sum(len(rows) for rows in index.streets.values())
+    print(f"📚 {len(index.city_ids)} city name(s), {n_streets} street(s) from {source} "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if not n_streets:
+        print("⚠️  streets_index is empty: rows will only get a city match", file=sys.stderr)
+
+    counts = defaultdict(int)
+    rows_done = distinct = 0
+    with open(args.csv, 'r', encoding='utf-8', newline='') as src:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames or []) + [c for c in MATCH_COLUMNS if c not in (reader.fieldnames or [])]
+        out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+        try:
+            writer = csv.DictWriter(out, fieldnames=fieldnames)
+            writer.writeheader()
+            batches = iter_batches(reader, args.batch_rows)
+            if args.jobs > 1:
+                pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(index,))
+                results = pool_imap(pool, normalize_batch, batches, window=2 * args.jobs)
+            else:
+                pool = None
+                _init_worker(index)
+                results = map(normalize_batch, batches)
+            try:
+                for rows, keys in results:
+                    writer.writerows(rows)
+                    rows_done += len(rows)
+                    distinct += keys
+                    for row in rows:
+                        counts[row['match']] += 1
+            finally:
+                if pool:
+                    pool.shutdown()
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    elapsed = time.perf_counter() - started
+    summary = ', '.join(f"{k}: {counts[k]}" for k in ('exact', 'typo', 'ambiguous', 'city_only', 'no_city') if counts[k])
+    print(f"✅ {rows_done} row(s) ({distinct} distinct street key(s) matched) in {elapsed:.1f}s "
+          f"({rows_done / elapsed if elapsed else 0:.0f} rows/s) – {summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -84,7 +84,9 @@ export async function handleGetDelegation(request, env) {
     // ─────────────────────────────────────────────────────────────────
     if (!houseDist && !senateDist && voterId) {
       const { results: voter } = await env.WY_DB.prepare(`
-        SELECT house, senate, city_county_id
+        SELECT COALESCE(house_geo, house) AS house,
+               COALESCE(senate_geo, senate) AS senate,
+               city_county_id
         FROM voters_addr_norm
         WHERE voter_id = ?1
         LIMIT 1
@@ -1,109 +1,162 @@
 #!/usr/bin/env python3
 """
 Sync Wyoming legislators from remote WY_DB to local WY_DB
-Exports all 93 legislators from remote and inserts into local database
+Diffs remote against local by voter_id and applies only the changed rows
+
+Usage:
+    python sync_legislators.py                    # local target via wrangler --local
+    python sync_legislators.py --backend sqlite   # local target via the Miniflare SQLite file
+    python sync_legislators.py --dry-run
 """
 
+import argparse
+import dataclasses
+import hashlib
 import json
-import subprocess
 import sys
 
+from d1_client import (
+    LEGISLATOR_COLUMNS as COLUMNS, D1Error, WranglerBackend, add_backend_arguments,
+    build_insert_statements, export_legislators, get_backend, sql_literal,
+)
+
+UPSERT_SUFFIX = "\nON CONFLICT(voter_id) DO UPDATE SET " + ', '.join(
+    f"{c} = excluded.{c}" for c in COLUMNS if c != 'voter_id'
+)
+
 def export_from_remote():
     """Export legislator data from remote database"""
-    cmd = [
-        './scripts/wr', 'd1', 'execute', 'WY_DB', '--remote',
-        '--command',
-        '''SELECT json_object(
-            'voter_id', voter_id,
-            'name', name,
-            'chamber', chamber,
-            'district', district,
-            'city', city,
-            'county', county,
-            'party', party,
-            'affiliations', affiliations,
-            'campaign_website', campaign_website,
-            'official_profile_url', official_profile_url,
-            'phone', phone,
-            'email', email,
-            'updated', updated
-        ) FROM wy_legislators;'''
-    ]
-    
+    return export_rows(WranglerBackend(remote=True))
+
+def export_from_local(backend=None):
+    """Export legislator data from local database"""
+    return export_rows(backend or WranglerBackend(remote=False))
+
+def export_rows(backend):
+    """Export every wy_legislators row through *backend* as Legislator objects"""
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd='/home/anchor/projects/this-is-us/worker')
-        if result.returncode != 0:
-            print(f"Error exporting from remote: {result.stderr}")
-            return []
-        
-        # Parse the output - it's in JSON format
-        output = result.stdout
-        # Extract JSON data from wrangler output
-        import re
-        json_matches = re.findall(r'\{[^{}]*"voter_id"[^{}]*\}', output)
-        
-        legislators = []
-        for match in json_matches:
-            try:
-                leg = json.loads(match)
-                legislators.append(leg)
-            except json.JSONDecodeError:
-                continue
-        
-        return legislators
-    except Exception as e:
-        print(f"Exception: {e}")
-        return []
-
-def insert_to_local(legislators):
-    """Insert legislator data into local database"""
+        return list(export_legislators(backend=backend))
+    except D1Error as e:
+        print(f"Error exporting from {backend.name}: {e}")
+        return None
+
+def insert_to_local(legislators, backend=None):
+    """Insert (or replace) every legislator into the local database in one batch"""
     if not legislators:
         print("No legislator data to insert")
         return False
-    
+
     print(f"Inserting {len(legislators)} legislators into local database...")
-    
-    for i, leg in enumerate(legislators):
-        # Build insert statement
-        voter_id = leg.get('voter_id')
-        name = leg.get('name', '').replace('"', '""')
-        chamber = leg.get('chamber', '')
-        district = leg.get('district')
-        city = leg.get('city', '').replace('"', '""')
-        county = leg.get('county', '').replace('"', '""')
-        party = leg.get('party', '').replace('"', '""')
-        affiliations = leg.get('affiliations', '').replace('"', '""')
-        campaign_website = leg.get('campaign_website', '').replace('"', '""')
-        official_profile_url = leg.get('official_profile_url', '').replace('"', '""')
-        phone = leg.get('phone', '').replace('"', '""')
-        email = leg.get('email', '').replace('"', '""')
-        updated = leg.get('updated', '').replace('"', '""')
-        
-        # Handle NULL district
-        district_val = 'NULL' if district is None else str(district)
-        
-        insert_sql = f'''INSERT INTO wy_legislators VALUES({voter_id},"{name}","{chamber}",{district_val},"{city}","{county}","{party}","{affiliations}","{campaign_website}","{official_profile_url}","{phone}","{email}","{updated}");'''
-        
-        cmd = ['./scripts/wr', 'd1', 'execute', 'WY_DB', '--local', '--command', insert_sql]
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd='/home/anchor/projects/this-is-us/worker')
-            if result.returncode != 0:
-                print(f"Error inserting legislator {i+1}: {result.stderr}")
-            elif (i + 1) % 10 == 0:
-                print(f"  ✓ Inserted {i + 1}/{len(legislators)}")
-        except Exception as e:
-            print(f"Exception inserting legislator {i+1}: {e}")
-    
+    backend = backend or WranglerBackend(remote=False)
+    try:
+        backend.insert_many('wy_legislators', COLUMNS, [dataclasses.astuple(leg) for leg in legislators])
+    except D1Error as e:
+        print(f"Error inserting legislators: {e}")
+        return False
+
     print(f"✓ Completed inserting {len(legislators)} legislators")
     return True
 
+def row_hash(row):
+    """Stable content hash of a legislator row over COLUMNS"""
+    payload = json.dumps(dataclasses.astuple(row), separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def compute_delta(remote_rows, local_rows):
+    """
+    Diff remote against local keyed by voter_id.
+    Returns (inserts, updates, deletes): two lists of rows and a list of voter_ids.
+    """
+    remote_by_id = {row.voter_id: row for row in remote_rows if row.voter_id is not None}
+    local_hashes = {row.voter_id: row_hash(row) for row in local_rows if row.voter_id is not None}
+
+    inserts, updates = [], []
+    for voter_id, row in remote_by_id.items():
+        local_hash = local_hashes.get(voter_id)
+        if local_hash is None:
+            inserts.append(row)
+        elif local_hash != row_hash(row):
+            updates.append(row)
+    deletes = sorted(voter_id for voter_id in local_hashes if voter_id not in remote_by_id)
+    return inserts, updates, deletes
+
+def build_delete_sql(deletes):
+    """Single DELETE for every voter_id no longer on remote (None if there are none)"""
+    if not deletes:
+        return None
+    ids = ', '.join(sql_literal(v) for v in deletes)
+    return f"DELETE FROM wy_legislators WHERE voter_id IN ({ids});\n"
+
+def build_delta_sql(upserts, deletes):
+    """Render the delta as one script: batched UPSERTs followed by a single DELETE"""
+    statements = build_insert_statements(
+        [dataclasses.astuple(row) for row in upserts], 'wy_legislators', COLUMNS,
+        verb='INSERT', suffix=UPSERT_SUFFIX,
+    )
+    return ''.join(statements) + (build_delete_sql(deletes) or '')
+
+def apply_delta_to_local(upserts, deletes, backend=None):
+    """Apply the delta to the local database as one batch (one wrangler call or one transaction)"""
+    backend = backend or WranglerBackend(remote=False)
+    try:
+        backend.insert_many(
+            'wy_legislators', COLUMNS, [dataclasses.astuple(row) for row in upserts],
+            verb='INSERT', suffix=UPSERT_SUFFIX, trailing_sql=build_delete_sql(deletes),
+        )
+    except D1Error as e:
+        print(f"Error applying delta: {e}")
+        return False
+    return True
+
+def sync(dry_run=False, backend=None):
+    """Bring local wy_legislators in line with remote, touching only changed rows"""
+    remote_rows = export_from_remote()
+    if not remote_rows:
+        # An empty export is far more likely a wrangler/auth failure than an
+        # empty remote table; refuse to turn it into 93 deletes.
+        print("No legislator data exported from remote")
+        return False
+    local_rows = export_from_local(backend)
+    if local_rows is None:
+        return False
+    print(f"Exported {len(remote_rows)} remote / {len(local_rows)} local legislators")
+
+    inserts, updates, deletes = compute_delta(remote_rows, local_rows)
+    print(f"Delta: {len(inserts)} insert(s), {len(updates)} update(s), {len(deletes)} delete(s)")
+    if not (inserts or updates or deletes):
+        print("✓ Local already in sync, nothing to apply")
+        return True
+
+    if dry_run:
+        print(build_delta_sql(inserts + updates, deletes))
+        return True
+    if not apply_delta_to_local(inserts + updates, deletes, backend):
+        return False
+    print(f"✓ Applied {len(inserts) + len(updates) + len(deletes)} row change(s) in one batch")
+    return True
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sync wy_legislators from remote WY_DB to local WY_DB.")
+    parser.add_argument('--dry-run', action='store_true', help='Print the delta SQL instead of applying it')
+    parser.add_argument('--full', action='store_true', help='Re-insert every remote row instead of diffing')
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+    if args.backend == 'remote':
+        parser.error("the sync target must be local (--backend local or sqlite)")
+
     print("Starting legislator data sync...")
-    legislators = export_from_remote()
-    print(f"Exported {len(legislators)} legislators from remote")
-    
-    if insert_to_local(legislators):
+    local = get_backend(args.backend, sqlite_path=args.sqlite_path)
+    try:
+        if args.full:
+            legislators = export_from_remote()
+            print(f"Exported {len(legislators or [])} legislators from remote")
+            ok = insert_to_local(legislators, local)
+        else:
+            ok = sync(dry_run=args.dry_run, backend=local)
+    finally:
+        local.close()
+
+    if ok:
         print("\n✅ Sync complete!")
     else:
         print("\n❌ Sync failed")